@@ -0,0 +1,480 @@
+"""App factory that serves the FileHandler API with any of the authentication modes.
+
+>>> uvicorn app:create_app --factory
+
+See Also:
+    The env var ``AUTH_MODE`` picks the authentication when the app is created by uvicorn.
+
+    - ``apikey``: APIKey sent as a form field (``auth_apikey.py``)
+    - ``server``: Bearer token issued for the server's ``USER`` and ``PASSWORD`` (``auth_server.py``)
+    - ``basic``: Browser uploader with session cookies and http basic auth (``upload.py``), which only uploads to
+      and deletes from the upload root.
+"""
+
+import logging
+import os
+import socket
+from typing import Optional, Union
+
+import uvicorn
+from fastapi import (Depends, FastAPI, File, Form, Header, HTTPException,
+                     Response, UploadFile)
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import (FileResponse, JSONResponse, PlainTextResponse,
+                               RedirectResponse)
+
+from models.auth import AUTH_MODES
+from models.cache import cache
+from models.classes import (UPLOAD_ROOT, BatchHandler, DownloadHandler,
+                            ListHandler, MoveHandler, MultiFileUploadHandler,
+                            PreviewHandler, SyncHandler, UploadHandler)
+from models.executor import Executor, resolve_path, size_converter
+from models.filters import APIKeyFilter, EndpointFilter
+from models.journal import journal
+from models.limits import UploadLimitMiddleware
+from models.logger import start_logging, stop_logging
+from models.preview import previews
+from models.replication import ReplicationMiddleware, replication
+from models.retention import engine
+from models.tracing import (TracingMiddleware, stage, start_tracing,
+                            stop_tracing)
+
+LOGGER = logging.getLogger("LOGGER")
+
+# Added once per process, since the factory can be called more than once
+logging.getLogger("uvicorn.access").addFilter(EndpointFilter())
+logging.getLogger("uvicorn.access").addFilter(APIKeyFilter())
+
+DESCRIPTIONS = {
+    "apikey": "Vignesh's **FileHandler** API to upload and download files to and from a server using a apikey.",
+    "server": "**Description:** Vignesh's **FileHandler** to upload and download files to and from a server using "
+              "the server's login credentials.",
+    "basic": "Vignesh's **FileHandler** to upload multiple files at once, authenticating using http basic auth.",
+}
+
+VERSIONS = {"apikey": "v1.0", "server": "v2.0", "basic": "v3.0"}
+
+origins = [
+    "http://localhost.com",
+    "https://localhost.com"
+]
+
+
+def batch_form(paths: list[str] = Form([]), pattern: Optional[str] = Form(None),
+               digest: bool = Form(False)) -> BatchHandler:
+    """Reads the input for the batch endpoints from form fields, when the credentials are sent as a form.
+
+    Args:
+        paths: Paths of the files, relative to the upload root.
+        pattern: Glob pattern for the files, relative to the upload root.
+        digest: Takes a boolean flag to include the sha256 of each file.
+
+    Returns:
+        BatchHandler:
+        Input for the batch endpoints.
+    """
+    return BatchHandler(Paths=paths, Pattern=pattern, Digest=digest)
+
+
+def batch_body(argument: BatchHandler) -> BatchHandler:
+    """Reads the input for the batch endpoints from a JSON body."""
+    return argument
+
+
+def move_form(sources: list[str] = Form(...), destinations: list[str] = Form(...),
+              overwrite: bool = Form(False)) -> MoveHandler:
+    """Reads the input for the batch move from form fields, when the credentials are sent as a form.
+
+    Args:
+        sources: Paths of the files to be moved, relative to the upload root.
+        destinations: New paths for each of the sources, relative to the upload root.
+        overwrite: Takes a boolean flag to replace existing destinations.
+
+    Returns:
+        MoveHandler:
+        Input for the batch move.
+    """
+    return MoveHandler(Sources=sources, Destinations=destinations, Overwrite=overwrite)
+
+
+def move_body(argument: MoveHandler) -> MoveHandler:
+    """Reads the input for the batch move from a JSON body."""
+    return argument
+
+
+def create_app(auth_mode: Optional[str] = None) -> FastAPI:
+    """Creates the app with the endpoints and the authentication for the mode.
+
+    Args:
+        auth_mode: ``apikey``, ``server`` or ``basic``, defaults to the env var ``AUTH_MODE`` or ``apikey``
+
+    Returns:
+        FastAPI:
+        App that is ready to be served.
+
+    See Also:
+        Nothing is read from the terminal and no directories are created until the app starts up.
+    """
+    auth_mode = auth_mode or os.environ.get("AUTH_MODE", "apikey")
+    if auth_mode not in AUTH_MODES:
+        raise ValueError(f"Unsupported AUTH_MODE: {auth_mode!r}, use one of {', '.join(AUTH_MODES)}")
+    if auth_mode == "basic":
+        from models.assets import AssetStore
+        assets = AssetStore(source_dir=os.path.join(os.path.dirname(os.path.abspath(__file__)), "sources"))
+        auth = AUTH_MODES[auth_mode](landing_url=assets.url(file_name="upload.html"))
+    else:
+        auth = AUTH_MODES[auth_mode]()
+    authenticate = Depends(auth.authenticate)
+    read_method = "POST" if auth.form else "GET"
+    batch_input, move_input = (batch_form, move_form) if auth.form else (batch_body, move_body)
+    task_executor = Executor()
+    log_listeners, trace_workers = [], []
+
+    app = FastAPI(
+        title="FileHandler API",
+        description=f"{DESCRIPTIONS[auth_mode]}\n\n"
+                    "**Contact:** [https://vigneshrao.com/contact](https://vigneshrao.com/contact)",
+        version=VERSIONS[auth_mode]
+    )
+    app.add_middleware(UploadLimitMiddleware)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,
+        allow_origin_regex="https://.*\.loca\.lt/*",  # noqa: W605
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["Server-Timing"],
+    )
+    app.add_middleware(ReplicationMiddleware)
+    app.add_middleware(TracingMiddleware)
+    auth.register(app=app)
+
+    @app.on_event(event_type="startup")
+    async def startup_event():
+        """Runs during startup. Configures custom logging using LogConfig and starts the background workers."""
+        log_listeners.extend(start_logging())
+        trace_workers.extend(start_tracing())
+        os.makedirs(UPLOAD_ROOT, exist_ok=True)
+        auth.startup()
+        journal.start(root=UPLOAD_ROOT)
+        await engine.start(root=UPLOAD_ROOT)
+        previews.start(root=UPLOAD_ROOT)
+        await replication.start(root=UPLOAD_ROOT)
+
+    @app.on_event(event_type="shutdown")
+    async def shutdown_event():
+        """Runs during shutdown. Stops the background workers, trace exporter and profiler, then flushes logs."""
+        await replication.stop()
+        await engine.stop()
+        journal.stop()
+        await previews.stop()
+        stop_tracing(workers=trace_workers)
+        stop_logging(listeners=log_listeners)
+
+    @app.get("/", response_class=RedirectResponse, include_in_schema=False)
+    async def redirect_index() -> str:
+        """Redirect to documents, or to the login page for the browser uploader.
+
+        Returns:
+            str:
+            Redirects `/` url to `/docs` or `/login`
+        """
+        return "/login" if auth_mode == "basic" else "/docs"
+
+    @app.get("/status/", include_in_schema=False)
+    def health() -> dict:
+        """Health Check for the server.
+
+        Returns:
+            dict:
+            Health status in a dictionary.
+        """
+        return {'Message': 'Healthy'}
+
+    @app.api_route("/metrics/cache/", methods=[read_method], include_in_schema=False)
+    def cache_metrics(owner: str = authenticate) -> dict:
+        """Metrics of the in-memory download cache.
+
+        Args:
+            owner: Authenticates the user request.
+
+        Returns:
+            dict:
+            Hit ratio, evictions and memory usage of the cache.
+        """
+        return cache.metrics()
+
+    @app.api_route("/metrics/replication/", methods=[read_method], include_in_schema=False)
+    def replication_metrics(owner: str = authenticate) -> dict:
+        """Metrics of the replication to the peers.
+
+        Args:
+            owner: Authenticates the user request.
+
+        Returns:
+            dict:
+            Pending entries, lag and errors of every peer.
+        """
+        return replication.metrics()
+
+    if auth_mode == "basic":
+        # The browser uploader only writes to and deletes from the upload root, the rest of the API is not served
+        @app.post("/upload-files/", response_class=PlainTextResponse)
+        async def upload_page_files(files: list[UploadFile] = File(..., description="Upload files."),
+                                    owner: str = authenticate) -> Union[JSONResponse, str]:
+            """Upload handler for the browser uploader.
+
+            Args:
+                files: Takes list[UploadFile] as an argument. Use list[bytes] to upload using bytes.
+                owner: Authenticates the user request.
+
+            Returns:
+                str:
+                File names and the size of each file.
+            """
+            return_val = []
+            if not [f for f in files if f.filename]:
+                return JSONResponse(
+                    content={
+                        "error_message": "No input received."
+                    },
+                    status_code=404
+                )
+            for file in files:
+                if not (file_path := resolve_path(root=UPLOAD_ROOT, path=file.filename)):
+                    raise HTTPException(status_code=403,
+                                        detail=f"{file.filename} is outside the upload directory or hidden")
+                with stage("read"):
+                    data = await file.read()
+                engine.check_quota(path=file_path, size=len(data), owner=owner)
+                with stage("write"):
+                    await journal.store(path=file_path, content=data, owner=owner)
+                cache.invalidate(path=file_path)
+                previews.invalidate(path=file_path)
+                engine.record(path=file_path, size=len(data), owner=owner)
+                replication.record(op="put", path=file_path)
+                padding = ''.join([' ' for _ in range(60 - len(file.filename))])
+                return_val.append(f"{file.filename}{padding}{size_converter(len(data))}")
+            return "\n".join(return_val)
+
+        @app.delete("/delete/file/{name_file}")
+        def delete_file(name_file: str, owner: str = authenticate) -> JSONResponse:
+            """Deletes a file.
+
+            Args:
+                name_file: Takes name of the file to be deleted as an argument.
+                owner: Authenticates the user request.
+
+            Returns:
+                JSONResponse:
+                Deletion status wrapped in a JSON blurb.
+            """
+            if not (file_path := resolve_path(root=UPLOAD_ROOT, path=name_file)):
+                return JSONResponse(
+                    content={
+                        "removed": False,
+                        "error_message": "File is outside the upload directory or hidden"
+                    },
+                    status_code=403
+                )
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                return JSONResponse(
+                    content={
+                        "removed": False,
+                        "error_message": "File not found"
+                    },
+                    status_code=404
+                )
+            engine.forget(path=file_path)
+            journal.deleted(path=file_path)
+            replication.record(op="delete", path=file_path)
+            cache.invalidate(path=file_path)
+            previews.invalidate(path=file_path)
+            return JSONResponse(
+                content={
+                    "removed": True
+                },
+                status_code=200
+            )
+
+        @app.get("/static/{name}")
+        async def static_asset(name: str, owner: str = authenticate,
+                               accept_encoding: Optional[str] = Header(None),
+                               if_none_match: Optional[str] = Header(None)) -> Response:
+            """Serves the content-hashed static files from ``sources`` with immutable cache headers.
+
+            Args:
+                name: Content-hashed name of the asset.
+                owner: Authenticates the user request.
+                accept_encoding: Encodings supported by the client.
+                if_none_match: ETag of the version cached by the client.
+
+            Returns:
+                Response:
+                Precompressed asset or a ``304`` if the cached version is still valid.
+            """
+            return assets.response(name=name, accept_encoding=accept_encoding, if_none_match=if_none_match)
+
+        return app
+
+    @app.api_route("/list-directory/", methods=[read_method])
+    async def list_directory(argument: ListHandler = Depends(), owner: str = authenticate) -> dict:
+        """Lists all the files in a directory.
+
+        Args:
+            argument: Takes the file path as an argument.
+            owner: Authenticates the user request.
+
+        Returns:
+            dict:
+            Returns a dictionary of files and directories in the given path.
+        """
+        return await task_executor.execute_list_directory(argument=argument)
+
+    @app.api_route("/download-file/", methods=[read_method])
+    async def download_file(argument: DownloadHandler = Depends(), owner: str = authenticate,
+                            range_header: Optional[str] = Header(None, alias="Range"),
+                            if_range: Optional[str] = Header(None)) -> FileResponse:
+        """Asynchronously streams a file as the response, or a part of it if a ``Range`` is requested.
+
+        Args:
+            argument: Takes the class **DownloadHandler** as an argument.
+            owner: Authenticates the user request.
+            range_header: Takes the ``Range`` header to download a part of the file.
+            if_range: Takes the ``ETag`` of a previous response, to resume only if the file has not changed.
+
+        Returns:
+            FileResponse:
+            Returns the download-able version of the file.
+        """
+        return await task_executor.execute_download_file(argument=argument, range_header=range_header,
+                                                         if_range=if_range)
+
+    @app.api_route("/preview/", methods=[read_method])
+    async def preview(argument: PreviewHandler = Depends(), owner: str = authenticate,
+                      if_none_match: Optional[str] = Header(None)) -> FileResponse:
+        """Gets a downsized thumbnail of an image, or the first and last lines of a text file.
+
+        Args:
+            argument: Takes the class ``PreviewHandler`` as an argument.
+            owner: Authenticates the user request.
+            if_none_match: ETag of the preview cached by the client.
+
+        Returns:
+            FileResponse:
+            Returns the preview, which is generated once for every version of the file.
+        """
+        return await task_executor.execute_preview(argument=argument, if_none_match=if_none_match)
+
+    @app.post("/upload-file/")
+    async def upload_file(data: UploadFile = File(...), upload: UploadHandler = Depends(),
+                          owner: str = authenticate) -> None:
+        """Allows the user to send a ``POST`` request to upload a file to the server.
+
+        Args:
+            data: Takes the file that has to be uploaded as an argument.
+            upload: Takes the class ``UploadHandler`` as an argument.
+            owner: Authenticates the user request.
+        """
+        await task_executor.execute_upload_file(argument=upload, file=data, owner=owner)
+
+    @app.post("/batch/delete/")
+    async def batch_delete(argument: BatchHandler = Depends(batch_input), owner: str = authenticate) -> dict:
+        """Deletes multiple files within the upload root in a single request.
+
+        Args:
+            argument: Takes the class ``BatchHandler`` as an argument.
+            owner: Authenticates the user request.
+
+        Returns:
+            dict:
+            Returns the deletion status of every file.
+        """
+        return await task_executor.execute_batch_delete(argument=argument)
+
+    @app.post("/batch/stat/")
+    async def batch_stat(argument: BatchHandler = Depends(batch_input), owner: str = authenticate) -> dict:
+        """Gets the size, modified time and optionally the digest of multiple files in a single request.
+
+        Args:
+            argument: Takes the class ``BatchHandler`` as an argument.
+            owner: Authenticates the user request.
+
+        Returns:
+            dict:
+            Returns the stat of every file.
+        """
+        return await task_executor.execute_batch_stat(argument=argument)
+
+    @app.post("/batch/move/")
+    async def batch_move(argument: MoveHandler = Depends(move_input), owner: str = authenticate) -> dict:
+        """Renames or moves multiple files within the upload root in a single request.
+
+        Args:
+            argument: Takes the class ``MoveHandler`` as an argument.
+            owner: Authenticates the user request.
+
+        Returns:
+            dict:
+            Returns the status of every move.
+        """
+        return await task_executor.execute_batch_move(argument=argument)
+
+    @app.api_route("/sync/signature/", methods=[read_method])
+    async def sync_signature(argument: SyncHandler = Depends(), owner: str = authenticate) -> dict:
+        """Gets the block checksums of a file on the server, to create a delta against.
+
+        Args:
+            argument: Takes the class ``SyncHandler`` as an argument.
+            owner: Authenticates the user request.
+
+        Returns:
+            dict:
+            Returns the block size, file size and the checksums of every block.
+        """
+        return await task_executor.execute_sync_signature(argument=argument)
+
+    @app.post("/sync/patch/")
+    async def sync_patch(instructions: str = Form(...), block_size: int = Form(...),
+                         checksum: Optional[str] = Form(None), data: UploadFile = File(...),
+                         argument: SyncHandler = Depends(), owner: str = authenticate) -> None:
+        """Updates a file on the server by sending only the blocks that changed.
+
+        Args:
+            instructions: JSON list of ``["copy", index, count]`` and ``["data", length]`` instructions.
+            block_size: Block size of the signature that the delta was created against.
+            checksum: Expected sha256 of the updated file.
+            data: Literal data for the ``data`` instructions.
+            argument: Takes the class ``SyncHandler`` as an argument.
+            owner: Authenticates the user request.
+        """
+        await task_executor.execute_sync_patch(argument=argument, instructions=instructions, data=data,
+                                               block_size=block_size, checksum=checksum, owner=owner)
+
+    @app.post("/upload-files/")
+    async def upload_files(data: list[UploadFile] = File(...), upload: MultiFileUploadHandler = Depends(),
+                           owner: str = authenticate) -> None:
+        """Allows the user to send a ``POST`` request to upload multiple files to the server.
+
+        Args:
+            data: Takes the files that have to be uploaded as an argument.
+            upload: Takes the class ``MultiFileUploadHandler`` as an argument.
+            owner: Authenticates the user request.
+        """
+        await task_executor.execute_upload_files(argument=upload, files=data, owner=owner)
+
+    return app
+
+
+if __name__ == '__main__':
+    argument_dict = {
+        "app": "app:create_app",
+        "factory": True,
+        "host": socket.gethostbyname('localhost'),
+        "port": int(os.environ.get('port', 1914)),
+        "reload": True
+    }
+    uvicorn.run(**argument_dict)
@@ -0,0 +1,388 @@
+"""Shared helpers to spawn the apps locally and drive them over HTTP without third party dependencies."""
+
+import base64
+import http.client
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterable
+from contextlib import ExitStack
+from typing import Optional
+from urllib.parse import urlencode
+
+from client.api import multipart
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHUNK_SIZE = 1024 * 1024
+APPS = {
+    "upload": "upload",
+    "apikey": "auth_apikey",
+    "server": "auth_server",
+}
+
+
+def parse_size(value: str) -> int:
+    """Converts a human friendly size like ``64KB`` or ``10GB`` into bytes.
+
+    Args:
+        value: Size with an optional ``B``, ``KB``, ``MB``, ``GB`` or ``TB`` suffix.
+
+    Returns:
+        int:
+        Size in bytes.
+    """
+    value = value.strip().upper()
+    for index, suffix in enumerate(("TB", "GB", "MB", "KB")):
+        if value.endswith(suffix):
+            return int(float(value[:-2]) * pow(1024, 4 - index))
+    return int(value.rstrip("B"))
+
+
+def free_port() -> int:
+    """Gets a free TCP port on localhost.
+
+    Returns:
+        int:
+        Port number.
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Gets the nearest-rank percentile of a list of values.
+
+    Args:
+        values: Samples to be summarized.
+        pct: Percentile between 0 and 100.
+
+    Returns:
+        float:
+        Value at the requested percentile or ``0`` if there are no samples.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def git_revision() -> Optional[str]:
+    """Gets the current git revision of the repository, so results can be compared across versions.
+
+    Returns:
+        str:
+        Short commit hash or ``None`` if unavailable.
+    """
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def make_file(path: str, size: int) -> str:
+    """Creates a file of random bytes, reusing it if a file of the same size already exists.
+
+    Args:
+        path: Path of the file to be created.
+        size: Size of the file in bytes.
+
+    Returns:
+        str:
+        Path of the file.
+    """
+    if os.path.isfile(path) and os.path.getsize(path) == size:
+        return path
+    block = os.urandom(min(size, CHUNK_SIZE))
+    with open(path, "wb") as f_stream:
+        remaining = size
+        while remaining > 0:
+            f_stream.write(block[:remaining])
+            remaining -= len(block)
+    return path
+
+
+class ResourceMonitor:
+    """Samples peak RSS and CPU time of a process, using ``/proc`` and falling back to ``psutil``.
+
+    >>> ResourceMonitor
+
+    """
+
+    def __init__(self, pid: int, interval: float = 0.05):
+        """Instantiates the monitor for a process.
+
+        Args:
+            pid: Process id to be monitored.
+            interval: Seconds between two RSS samples.
+        """
+        self.pid = pid
+        self.interval = interval
+        self.peak_rss = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def rss(self) -> int:
+        """Gets the resident set size of the process in bytes."""
+        if psutil:
+            return psutil.Process(self.pid).memory_info().rss
+        with open(f"/proc/{self.pid}/status") as f_stream:
+            for line in f_stream:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+        return 0
+
+    def cpu_time(self) -> float:
+        """Gets the user and system CPU seconds consumed by the process so far."""
+        if psutil:
+            times = psutil.Process(self.pid).cpu_times()
+            return times.user + times.system
+        with open(f"/proc/{self.pid}/stat") as f_stream:
+            fields = f_stream.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+    def _sample(self) -> None:
+        """Records the peak RSS until stopped."""
+        while not self._stop.is_set():
+            try:
+                self.peak_rss = max(self.peak_rss, self.rss())
+            except (OSError, ValueError):
+                return
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "ResourceMonitor":
+        """Starts sampling and stores the CPU time at the beginning of a scenario."""
+        self.peak_rss = self.rss()
+        self.cpu_start = self.cpu_time()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        """Stops sampling and stores the CPU time consumed during the scenario."""
+        self._stop.set()
+        self._thread.join()
+        self.cpu_seconds = self.cpu_time() - self.cpu_start
+
+
+class ServerProcess:
+    """Runs one of the apps with uvicorn in a subprocess on a free port.
+
+    >>> ServerProcess
+
+    """
+
+    def __init__(self, app: str, workdir: str, env: dict = None, startup_timeout: float = 30):
+        """Instantiates the server.
+
+        Args:
+            app: Key of the app in ``APPS``.
+            workdir: Working directory for the server, where the default ``uploads`` directory gets created.
+            env: Extra environment variables for the server.
+            startup_timeout: Seconds to wait for the server to accept connections.
+
+        See Also:
+            Server output is written to ``<workdir>/<app>.log`` to keep the benchmark output readable.
+        """
+        self.app = app
+        self.workdir = workdir
+        self.port = free_port()
+        self.startup_timeout = startup_timeout
+        self.env = {**os.environ, "PYTHONPATH": REPO_ROOT, **(env or {})}
+        self.process = None
+        self.log = None
+
+    @property
+    def upload_root(self) -> str:
+        """Gets the upload root of the server, which is the ``uploads`` directory in its working directory."""
+        return os.path.join(self.workdir, "uploads")
+
+    def start(self) -> float:
+        """Starts the server and waits until it responds.
+
+        Returns:
+            float:
+            Seconds taken from spawning the process to the first HTTP response.
+        """
+        start = time.perf_counter()
+        self.log = open(os.path.join(self.workdir, f"{self.app}.log"), "ab")
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", f"{APPS[self.app]}:app", "--host", "127.0.0.1",
+             "--port", str(self.port), "--no-access-log", "--log-level", "warning"],
+            cwd=self.workdir, env=self.env, stdin=subprocess.DEVNULL, stdout=self.log, stderr=self.log
+        )
+        while time.perf_counter() - start < self.startup_timeout:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"{self.app} exited with code {self.process.returncode}")
+            try:
+                connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=1)
+                connection.request("GET", "/")
+                connection.getresponse().read()
+                connection.close()
+                return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.02)
+        self.stop()
+        raise TimeoutError(f"{self.app} did not start within {self.startup_timeout}s")
+
+    def stop(self) -> None:
+        """Terminates the server."""
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        if self.log:
+            self.log.close()
+
+    def __enter__(self) -> "ServerProcess":
+        """Starts the server."""
+        self.startup_seconds = self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        """Stops the server."""
+        self.stop()
+
+
+class Client:
+    """Minimal keep-alive HTTP client that authenticates against any of the three apps.
+
+    >>> Client
+
+    """
+
+    def __init__(self, app: str, port: int, apikey: str, username: str, password: str):
+        """Instantiates a client with its own connection.
+
+        Args:
+            app: Key of the app in ``APPS``.
+            port: Port where the app is running.
+            apikey: APIKey for ``auth_apikey``.
+            username: Username for ``upload`` and ``auth_server``.
+            password: Password for ``upload`` and ``auth_server``.
+        """
+        self.app = app
+        self.port = port
+        self.apikey = apikey
+        self.connection = http.client.HTTPConnection("127.0.0.1", port, timeout=3600)
+        self.headers = {}
+        if app == "upload":
+            basic = base64.b64encode(f"{username}:{password}".encode()).decode()
+            status, headers, _ = self.request("GET", "/login/", headers={"Authorization": f"Basic {basic}"})
+            if cookie := headers.get("set-cookie"):
+                self.headers["Cookie"] = cookie.split(";")[0]
+            else:
+                self.headers["Authorization"] = f"Basic {basic}"
+        elif app == "server":
+            body = urlencode({"username": username, "password": password})
+            _, _, content = self.request("POST", "/authenticator/", body=body,
+                                         headers={"Content-Type": "application/x-www-form-urlencoded"})
+            self.headers["Authorization"] = f"Bearer {json.loads(content)['access_token']}"
+
+    def request(self, method: str, path: str, body=None, headers: dict = None,
+                sink: bool = False) -> tuple[int, dict, bytes]:
+        """Sends a request reusing the connection, reconnecting once if the server closed it.
+
+        Args:
+            method: HTTP method.
+            path: Url path including the query string.
+            body: Request body as bytes or a string, or a function that builds the extra headers and the chunks of a
+                streamed body, which is called again when the request is retried.
+            headers: Request headers.
+            sink: Takes a boolean flag to discard the response body while reading it in chunks.
+
+        Returns:
+            tuple:
+            Status code, response headers and the response body.
+        """
+        try:
+            response = self._send(method=method, path=path, body=body, headers=headers)
+        except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+            self.connection.close()
+            response = self._send(method=method, path=path, body=body, headers=headers)
+        if sink:
+            size = 0
+            while chunk := response.read(CHUNK_SIZE):
+                size += len(chunk)
+            content = b""
+        else:
+            content = response.read()
+            size = len(content)
+        self.received = size
+        return response.status, {k.lower(): v for k, v in response.getheaders()}, content
+
+    def _send(self, method: str, path: str, body, headers: Optional[dict]) -> http.client.HTTPResponse:
+        """Sends a request, building a streamed body from scratch so that it can be sent again on a retry."""
+        headers = {**self.headers, **(headers or {})}
+        with ExitStack() as stack:
+            if callable(body):
+                extra, body = body(stack)
+                headers.update(extra)
+            self.connection.request(method, path, body=body, headers=headers)
+            return self.connection.getresponse()
+
+    def _form(self, files: list[tuple[str, str, str]]) -> Callable[[ExitStack], tuple[dict, Iterable[bytes]]]:
+        """Gets a function that builds the headers and the body for an upload, adding the apikey field when required.
+
+        Args:
+            files: List of tuples with the form field name, the file name sent to the server and the local path.
+        """
+        fields = {"apikey": self.apikey} if self.app == "apikey" else {}
+
+        def build(stack: ExitStack) -> tuple[dict, Iterable[bytes]]:
+            """Builds a new body, since a streamed body can be sent only once, opening the files on the stack."""
+            content_type, length, body = multipart(fields=fields, files=[
+                (name, file_name, stack.enter_context(open(path, "rb")), os.path.getsize(path))
+                for name, file_name, path in files
+            ])
+            return {"Content-Type": content_type, "Content-Length": str(length)}, body
+
+        return build
+
+    def upload_file(self, path: str, name: str, remote_dir: str) -> int:
+        """Uploads a single file and returns the status code."""
+        if self.app == "upload":
+            return self.upload_files(paths=[path], names=[name], remote_dir=remote_dir)
+        query = urlencode({"FilePath": remote_dir, "FileName": name})
+        return self.request("POST", f"/upload-file/?{query}", body=self._form(files=[("data", name, path)]))[0]
+
+    def upload_files(self, paths: list[str], names: list[str], remote_dir: str) -> int:
+        """Uploads a batch of files in a single request and returns the status code."""
+        field = "files" if self.app == "upload" else "data"
+        body = self._form(files=[(field, name, path) for name, path in zip(names, paths)])
+        query = "" if self.app == "upload" else "?" + urlencode({"FilePath": remote_dir})
+        return self.request("POST", f"/upload-files/{query}", body=body)[0]
+
+    def download_file(self, name: str, remote_dir: str) -> int:
+        """Downloads a file discarding its content and returns the status code."""
+        query = urlencode({"FileName": name, "FilePath": remote_dir})
+        if self.app == "apikey":
+            return self.request("POST", f"/download-file/?{query}", body=urlencode({"apikey": self.apikey}),
+                                headers={"Content-Type": "application/x-www-form-urlencoded"}, sink=True)[0]
+        return self.request("GET", f"/download-file/?{query}", sink=True)[0]
+
+    def list_directory(self, remote_dir: str) -> int:
+        """Lists a directory and returns the status code."""
+        query = urlencode({"FilePath": remote_dir})
+        if self.app == "apikey":
+            return self.request("POST", f"/list-directory/?{query}", body=urlencode({"apikey": self.apikey}),
+                                headers={"Content-Type": "application/x-www-form-urlencoded"})[0]
+        return self.request("GET", f"/list-directory/?{query}")[0]
+
+    def close(self) -> None:
+        """Closes the connection."""
+        self.connection.close()
@@ -0,0 +1,265 @@
+"""Upload, download and listing load test for ``upload.py``, ``auth_apikey.py`` and ``auth_server.py``.
+
+Usage:
+    python -m benchmarks.load_test --apps apikey,server --sizes 1KB,1MB,1GB --concurrency 1,8 --output results.json
+    python -m benchmarks.load_test --compare results.json --output new.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from benchmarks.common import (APPS, Client, ResourceMonitor, ServerProcess,
+                               git_revision, make_file, parse_size, percentile)
+
+APIKEY = "benchmark-apikey"
+USERNAME = "benchmark"
+PASSWORD = "benchmark-password"
+GB = pow(1024, 3)
+
+
+def run_scenario(server: ServerProcess, name: str, operations: int, concurrency: int, payload: int,
+                 operation: Callable[[Client, int], int]) -> dict:
+    """Runs an operation a number of times across concurrent clients, each with its own keep-alive connection.
+
+    Args:
+        server: Server that is being benchmarked.
+        name: Name of the scenario.
+        operations: Total number of operations.
+        concurrency: Number of concurrent clients.
+        payload: Bytes transferred by a single operation.
+        operation: Callable that receives a client and the operation index and returns the status code.
+
+    Returns:
+        dict:
+        Throughput, latency percentiles, peak RSS, CPU per GB and error count for the scenario.
+    """
+    clients = [Client(app=server.app, port=server.port, apikey=APIKEY, username=USERNAME, password=PASSWORD)
+               for _ in range(concurrency)]
+    latencies, errors = [], []
+
+    def worker(index: int) -> None:
+        """Runs every n-th operation on the client assigned to the worker."""
+        for op in range(index, operations, concurrency):
+            start = time.perf_counter()
+            try:
+                code = operation(clients[index], op)
+            except OSError as error:
+                code = repr(error)
+            latencies.append(time.perf_counter() - start)
+            if code != 200:
+                errors.append(code)
+
+    with ResourceMonitor(pid=server.process.pid) as monitor:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(worker, range(concurrency)))
+        elapsed = time.perf_counter() - start
+    for client in clients:
+        client.close()
+
+    transferred = payload * operations
+    result = {
+        "app": server.app,
+        "scenario": name,
+        "concurrency": concurrency,
+        "operations": operations,
+        "payload_bytes": payload,
+        "elapsed_s": round(elapsed, 6),
+        "ops_per_s": round(operations / elapsed, 3),
+        "throughput_mb_s": round(transferred / elapsed / pow(1024, 2), 3),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "peak_rss_mb": round(monitor.peak_rss / pow(1024, 2), 3),
+        "cpu_s": round(monitor.cpu_seconds, 3),
+        "cpu_s_per_gb": round(monitor.cpu_seconds / (transferred / GB), 3) if transferred else None,
+        "errors": len(errors),
+    }
+    if errors:
+        result["error_sample"] = str(errors[0])
+    print(f"{server.app:<7} {name:<28} c={concurrency:<4} {result['throughput_mb_s']:>10} MB/s "
+          f"p50={result['p50_ms']}ms p99={result['p99_ms']}ms rss={result['peak_rss_mb']}MB "
+          f"errors={result['errors']}", file=sys.stderr)
+    return result
+
+
+def operation_count(args: argparse.Namespace, payload: int) -> int:
+    """Caps the number of operations, so that large payloads do not exceed the byte budget of a scenario."""
+    return max(1, min(args.requests, args.max_bytes // max(payload, 1)))
+
+
+def benchmark_app(app: str, args: argparse.Namespace, workdir: str) -> list[dict]:
+    """Runs all the scenarios for a single app.
+
+    Args:
+        app: Key of the app in ``APPS``.
+        args: Parsed command line arguments.
+        workdir: Temporary directory for the generated and uploaded files.
+
+    Returns:
+        list:
+        Results for every scenario.
+    """
+    results = []
+    sources = os.path.join(workdir, "sources")
+    remote = os.path.join(workdir, "remote", app)
+    os.makedirs(sources, exist_ok=True)
+    os.makedirs(remote, exist_ok=True)
+    prefix = f"bench-{uuid.uuid4().hex[:8]}"
+    env = {"APIKEY": APIKEY, "USER": USERNAME, "PASSWORD": PASSWORD}
+
+    with ServerProcess(app=app, workdir=workdir, env=env) as server:
+        results.append({"app": app, "scenario": "startup", "elapsed_s": round(server.startup_seconds, 6)})
+        for size in args.sizes:
+            local = make_file(os.path.join(sources, f"{size}.bin"), size)
+            for concurrency in args.concurrency:
+                operations = operation_count(args, size)
+                results.append(run_scenario(
+                    server=server, name=f"upload-file/{size}", operations=operations, concurrency=concurrency,
+                    payload=size,
+                    operation=lambda client, op: client.upload_file(path=local, name=f"{prefix}-{size}-{op}",
+                                                                    remote_dir=remote)
+                ))
+                if app == "upload":
+                    continue
+                results.append(run_scenario(
+                    server=server, name=f"download-file/{size}", operations=operations, concurrency=concurrency,
+                    payload=size,
+                    operation=lambda client, op: client.download_file(name=f"{prefix}-{size}-{op}",
+                                                                      remote_dir=remote)
+                ))
+        batch_file = make_file(os.path.join(sources, f"{args.batch_file_size}.bin"), args.batch_file_size)
+        for batch in args.batch_sizes:
+            for concurrency in args.concurrency:
+                operations = operation_count(args, batch * args.batch_file_size)
+                results.append(run_scenario(
+                    server=server, name=f"upload-files/{batch}x{args.batch_file_size}", operations=operations,
+                    concurrency=concurrency, payload=batch * args.batch_file_size,
+                    operation=lambda client, op: client.upload_files(
+                        paths=[batch_file] * batch, names=[f"{prefix}-batch-{op}-{i}" for i in range(batch)],
+                        remote_dir=remote
+                    )
+                ))
+        if app != "upload":
+            for entries in args.dir_sizes:
+                listing = os.path.join(workdir, "listing", str(entries))
+                os.makedirs(listing, exist_ok=True)
+                for index in range(len(os.listdir(listing)), entries):
+                    open(os.path.join(listing, f"entry-{index}"), "w").close()
+                for concurrency in args.concurrency:
+                    results.append(run_scenario(
+                        server=server, name=f"list-directory/{entries}", operations=args.requests,
+                        concurrency=concurrency, payload=0,
+                        operation=lambda client, op: client.list_directory(remote_dir=listing)
+                    ))
+    if app == "upload" and os.path.isdir(server.upload_root):
+        for file_name in os.listdir(server.upload_root):
+            if file_name.startswith(prefix):
+                os.remove(os.path.join(server.upload_root, file_name))
+    shutil.rmtree(remote, ignore_errors=True)
+    return results
+
+
+def compare(previous: dict, current: dict, threshold: float) -> list[str]:
+    """Compares two result files and lists the scenarios that regressed beyond the threshold.
+
+    Args:
+        previous: Results from an earlier run.
+        current: Results from the current run.
+        threshold: Allowed regression in percent.
+
+    Returns:
+        list:
+        Human readable descriptions of the regressions.
+    """
+    def key(result: dict) -> tuple:
+        """Identifies a scenario across runs."""
+        return result["app"], result["scenario"], result.get("concurrency")
+
+    baseline = {key(result): result for result in previous["results"]}
+    regressions = []
+    for result in current["results"]:
+        if not (before := baseline.get(key(result))):
+            continue
+        for metric, higher_is_better in (("throughput_mb_s", True), ("ops_per_s", True), ("p99_ms", False),
+                                         ("peak_rss_mb", False), ("elapsed_s", False)):
+            old, new = before.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            if (change < -threshold) if higher_is_better else (change > threshold):
+                regressions.append(f"{' '.join(map(str, key(result)))} {metric}: {old} -> {new} ({change:+.1f}%)")
+    return regressions
+
+
+def main() -> int:
+    """Parses the arguments, runs the benchmarks and writes the results as JSON.
+
+    Returns:
+        int:
+        Exit code, ``1`` if a regression was detected when comparing against previous results.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apps", default=",".join(APPS), help="Comma separated apps: upload, apikey, server.")
+    parser.add_argument("--sizes", default="1KB,64KB,1MB,16MB,256MB",
+                        help="Comma separated file sizes, anything from 1KB to 10GB.")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma separated number of concurrent clients.")
+    parser.add_argument("--batch-sizes", default="1,10,100", help="Files per request for /upload-files/.")
+    parser.add_argument("--batch-file-size", default="64KB", help="Size of each file in a batch upload.")
+    parser.add_argument("--dir-sizes", default="10,1000,10000", help="Entries per directory for /list-directory/.")
+    parser.add_argument("--requests", type=int, default=200, help="Maximum operations per scenario.")
+    parser.add_argument("--max-bytes", default="2GB", help="Maximum bytes transferred per scenario.")
+    parser.add_argument("--workdir", help="Directory for generated files, defaults to a temporary directory.")
+    parser.add_argument("--output", default="bench_results.json", help="Path of the JSON results file.")
+    parser.add_argument("--compare", help="Previous results file to detect regressions against.")
+    parser.add_argument("--threshold", type=float, default=10, help="Allowed regression in percent.")
+    args = parser.parse_args()
+
+    args.sizes = [parse_size(size) for size in args.sizes.split(",")]
+    args.concurrency = [int(value) for value in args.concurrency.split(",")]
+    args.batch_sizes = [int(value) for value in args.batch_sizes.split(",")]
+    args.batch_file_size = parse_size(args.batch_file_size)
+    args.dir_sizes = [int(value) for value in args.dir_sizes.split(",")]
+    args.max_bytes = parse_size(args.max_bytes)
+    apps = args.apps.split(",")
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="filehandler-bench-")
+    try:
+        results = [result for app in apps for result in benchmark_app(app=app, args=args, workdir=workdir)]
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": int(time.time()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "arguments": {key: value for key, value in vars(args).items() if key not in ("compare", "output")},
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f_stream:
+        json.dump(report, f_stream, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f_stream:
+            regressions = compare(previous=json.load(f_stream), current=report, threshold=args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
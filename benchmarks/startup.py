@@ -0,0 +1,168 @@
+"""Cold start benchmark for ``upload.py``, ``auth_apikey.py`` and ``auth_server.py``.
+
+Usage:
+    python -m benchmarks.startup --apps apikey,server,upload --runs 10 --output startup.json
+
+See Also:
+    - ``import`` is the time taken by a fresh interpreter to import the app module, which builds the app.
+    - ``spawn`` is the time taken from spawning a uvicorn worker to its first HTTP response.
+    - ``slowest_imports`` lists the modules with the highest cumulative import time, from ``python -X importtime``
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import (APPS, REPO_ROOT, ServerProcess, git_revision,
+                               percentile)
+
+ENV = {"APIKEY": "benchmark-apikey", "USER": "benchmark", "PASSWORD": "benchmark-password", "LOG_JSON": "false"}
+
+IMPORT_SCRIPT = """
+import time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+
+def summarize(values: list[float]) -> dict:
+    """Summarizes the samples in milliseconds.
+
+    Args:
+        values: Samples in seconds.
+
+    Returns:
+        dict:
+        Minimum, median, 90th percentile and maximum of the samples.
+    """
+    return {
+        "min_ms": round(min(values) * 1000, 3),
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p90_ms": round(percentile(values, 90) * 1000, 3),
+        "max_ms": round(max(values) * 1000, 3),
+    }
+
+
+def import_time(app: str, workdir: str) -> float:
+    """Imports an app module in a fresh interpreter.
+
+    Args:
+        app: Key of the app in ``APPS``.
+        workdir: Working directory for the interpreter.
+
+    Returns:
+        float:
+        Seconds taken to import the module, as measured within the interpreter.
+    """
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT.format(module=APPS[app])], cwd=workdir, check=True,
+        env={**os.environ, "PYTHONPATH": REPO_ROOT, **ENV}, stdin=subprocess.DEVNULL, capture_output=True, text=True
+    )
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(app: str, workdir: str, top: int) -> list[dict]:
+    """Lists the modules that take the longest to import, using ``python -X importtime``.
+
+    Args:
+        app: Key of the app in ``APPS``.
+        workdir: Working directory for the interpreter.
+        top: Number of modules to list.
+
+    Returns:
+        list:
+        Module names with their own and cumulative import time, slowest first.
+    """
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {APPS[app]}"], cwd=workdir, check=True,
+        env={**os.environ, "PYTHONPATH": REPO_ROOT, **ENV}, stdin=subprocess.DEVNULL, capture_output=True, text=True
+    )
+    modules = []
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        if name.strip() != APPS[app]:
+            modules.append({"module": name.strip(), "self_ms": round(int(self_us) / 1000, 3),
+                            "cumulative_ms": round(int(cumulative) / 1000, 3)})
+    return sorted(modules, key=lambda module: module["cumulative_ms"], reverse=True)[:top]
+
+
+def benchmark_app(app: str, runs: int, top: int, workdir: str) -> dict:
+    """Measures the import and spawn times of a single app.
+
+    Args:
+        app: Key of the app in ``APPS``.
+        runs: Number of cold starts for each measurement.
+        top: Number of the slowest imports to list.
+        workdir: Working directory for the servers.
+
+    Returns:
+        dict:
+        Summary of the import and spawn times, with the slowest imports.
+    """
+    imports = [import_time(app=app, workdir=workdir) for _ in range(runs)]
+    spawns = []
+    for _ in range(runs):
+        with ServerProcess(app=app, workdir=workdir, env=ENV) as server:
+            spawns.append(server.startup_seconds)
+    return {
+        "app": app,
+        "runs": runs,
+        "import": summarize(imports),
+        "spawn": summarize(spawns),
+        "slowest_imports": slowest_imports(app=app, workdir=workdir, top=top),
+    }
+
+
+def main() -> int:
+    """Parses the arguments, runs the benchmark and writes the results as JSON.
+
+    Returns:
+        int:
+        Exit code.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apps", default=",".join(APPS), help="Comma separated apps: upload, apikey, server.")
+    parser.add_argument("--runs", type=int, default=10, help="Number of cold starts for each measurement.")
+    parser.add_argument("--top", type=int, default=10, help="Number of the slowest imports to list.")
+    parser.add_argument("--workdir", help="Working directory for the servers, defaults to a temporary directory.")
+    parser.add_argument("--output", default="startup_results.json", help="Path of the JSON results file.")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="filehandler-startup-")
+    try:
+        results = [benchmark_app(app=app, runs=args.runs, top=args.top, workdir=workdir)
+                   for app in args.apps.split(",")]
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": int(time.time()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "arguments": {key: value for key, value in vars(args).items() if key != "output"},
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f_stream:
+        json.dump(report, f_stream, indent=2)
+    for result in results:
+        print(f"{result['app']:<8} import p50 {result['import']['p50_ms']:>8.1f} ms   "
+              f"spawn p50 {result['spawn']['p50_ms']:>8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
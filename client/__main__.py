@@ -0,0 +1,159 @@
+"""Command line interface for the client.
+
+>>> python -m client --url http://localhost:1914 upload photos --remote-dir /srv/uploads
+>>> python -m client --url http://localhost:1918 --auth server download /srv/uploads/photos -r -o photos
+
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+from client.api import FileHandlerClient
+
+
+def human(size: float) -> str:
+    """Converts bytes into a human friendly size."""
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if size < 1024 or unit == "TB":
+            return f"{size:.1f} {unit}"
+        size /= 1024
+
+
+class Progress:
+    """Prints the overall progress of the transfers on a single line.
+
+    >>> Progress
+
+    """
+
+    def __init__(self, quiet: bool = False):
+        """Instantiates the progress with no transfers.
+
+        Args:
+            quiet: Takes a boolean flag to print nothing.
+        """
+        self.quiet = quiet
+        self.files: dict[str, tuple[int, int]] = {}
+        self.lock = threading.Lock()
+        self.start = time.monotonic()
+        self.printed = 0.0
+
+    def __call__(self, path: str, done: int, total: int) -> None:
+        """Records the progress of a file and prints the totals, at most five times a second."""
+        with self.lock:
+            self.files[path] = (done, total)
+            now = time.monotonic()
+            if self.quiet or now - self.printed < 0.2:
+                return
+            self.printed = now
+            self.print(now=now)
+
+    def print(self, now: float, end: str = "") -> None:
+        """Prints the files completed, bytes transferred and the rate."""
+        done = sum(value[0] for value in self.files.values())
+        total = sum(value[1] for value in self.files.values())
+        complete = sum(value[0] >= value[1] for value in self.files.values())
+        rate = done / max(now - self.start, 1e-3)
+        sys.stderr.write(f"\r{complete}/{len(self.files)} files  {human(done)}/{human(total)}  "
+                         f"{human(rate)}/s   {end}")
+        sys.stderr.flush()
+
+    def finish(self) -> None:
+        """Prints the final totals."""
+        if not self.quiet and self.files:
+            self.print(now=time.monotonic(), end="\n")
+
+
+def split_remote(path: str) -> tuple[str, str]:
+    """Splits a remote path into its directory and name."""
+    directory, _, name = path.rstrip("/").rpartition("/")
+    return directory or "/", name
+
+
+def main() -> int:
+    """Parses the arguments and runs the command.
+
+    Returns:
+        int:
+        Exit code, ``1`` if any of the transfers failed.
+    """
+    parser = argparse.ArgumentParser(prog="python -m client", description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=os.environ.get("FILE_HANDLER_URL", "http://localhost:1914"),
+                        help="Base url of the server, defaults to env var FILE_HANDLER_URL.")
+    parser.add_argument("--auth", choices=("apikey", "server"), default=os.environ.get("AUTH_MODE", "apikey"))
+    parser.add_argument("--apikey", default=os.environ.get("APIKEY"), help="Defaults to env var APIKEY.")
+    parser.add_argument("--username", default=os.environ.get("USER"), help="Defaults to env var USER.")
+    parser.add_argument("--password", default=os.environ.get("PASSWORD"), help="Defaults to env var PASSWORD.")
+    parser.add_argument("--workers", type=int, default=4, help="Files transferred concurrently.")
+    parser.add_argument("--segments", type=int, default=4, help="Ranged requests running concurrently.")
+    parser.add_argument("--segment-mb", type=int, default=8, help="Size of each download segment in MB.")
+    parser.add_argument("--retries", type=int, default=5, help="Retries for each failed request.")
+    parser.add_argument("--quiet", action="store_true", help="Prints only the errors.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ls = commands.add_parser("ls", help="Lists a directory on the server.")
+    ls.add_argument("remote_dir")
+
+    upload = commands.add_parser("upload", help="Uploads files and directory trees.")
+    upload.add_argument("paths", nargs="+")
+    upload.add_argument("--remote-dir", help="Directory on the server, required to upload directories.")
+
+    sync = commands.add_parser("sync", help="Uploads only the blocks that changed for each file.")
+    sync.add_argument("paths", nargs="+")
+    sync.add_argument("--remote-dir", help="Directory on the server.")
+
+    download = commands.add_parser("download", help="Downloads files and directory trees.")
+    download.add_argument("remote_paths", nargs="+", help="Paths of the files on the server.")
+    download.add_argument("-o", "--output", default=".", help="Local directory for the downloads.")
+    download.add_argument("-r", "--recursive", action="store_true", help="Downloads the remote paths as directories.")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR if args.quiet else logging.WARNING, format="%(levelname)s %(message)s")
+    progress = Progress(quiet=args.quiet)
+    client = FileHandlerClient(url=args.url, auth=args.auth, apikey=args.apikey, username=args.username,
+                               password=args.password, workers=args.workers, segments=args.segments,
+                               segment_size=args.segment_mb * 1024 * 1024, retries=args.retries, progress=progress)
+    results = {}
+    with client:
+        if args.command == "ls":
+            print(json.dumps(client.list_directory(remote_dir=args.remote_dir), indent=2))
+            return 0
+        if args.command == "upload":
+            files = [path for path in args.paths if not os.path.isdir(path)]
+            for directory in (path for path in args.paths if os.path.isdir(path)):
+                if not args.remote_dir:
+                    parser.error("--remote-dir is required to upload directories")
+                remote = f"{args.remote_dir.rstrip('/')}/{os.path.basename(os.path.abspath(directory))}"
+                results.update(client.upload_tree(local_dir=directory, remote_dir=remote))
+            results.update(client.upload_files(paths=files, remote_dir=args.remote_dir,
+                                               parents=bool(args.remote_dir)))
+        elif args.command == "sync":
+            results.update(client.run_all(items={path: dict(path=path, remote_dir=args.remote_dir)
+                                                 for path in args.paths}, func=client.sync_file))
+        elif args.command == "download":
+            os.makedirs(args.output, exist_ok=True)
+            files = {}
+            for remote_path in args.remote_paths:
+                directory, name = split_remote(remote_path)
+                if args.recursive:
+                    results.update(client.download_tree(remote_dir=remote_path.rstrip("/"),
+                                                        local_dir=os.path.join(args.output, name)))
+                else:
+                    files[os.path.join(args.output, name)] = dict(name=name, remote_dir=directory,
+                                                                  local_path=os.path.join(args.output, name))
+            results.update(client.run_all(items=files, func=client.download_file))
+    progress.finish()
+    failed = {path: result["error"] for path, result in results.items()
+              if isinstance(result, dict) and "error" in result}
+    for path, error in failed.items():
+        sys.stderr.write(f"FAILED {path}: {error}\n")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
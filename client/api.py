@@ -0,0 +1,833 @@
+"""Client for the ``auth_apikey`` and ``auth_server`` APIs, built on the standard library and ``models.delta``.
+
+Run it from the repository, since the delta sync uses ``models.delta`` to compute the patches.
+
+>>> from client.api import FileHandlerClient
+>>> with FileHandlerClient(url="http://localhost:1914", auth="apikey", apikey="...") as client:
+...     client.upload_tree(local_dir="photos", remote_dir="/srv/uploads/photos")
+...     client.download_file(name="report.pdf", remote_dir="/srv/uploads", local_path="report.pdf")
+
+"""
+
+import hashlib
+import http.client
+import json
+import logging
+import math
+import os
+import queue
+import random
+import tempfile
+import threading
+import time
+import uuid
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import BinaryIO, Optional
+from urllib.parse import urlencode, urlsplit
+
+from models.delta import write_delta
+
+LOGGER = logging.getLogger("LOGGER")
+
+CHUNK_SIZE = 1024 * 1024
+RETRY_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class ClientError(Exception):
+    """Raised when the server responds with an error.
+
+    >>> ClientError
+
+    """
+
+    def __init__(self, status: int, detail):
+        """Instantiates the error with the status code and the detail sent by the server.
+
+        Args:
+            status: HTTP status code.
+            detail: Detail of the error from the response body.
+        """
+        super().__init__(f"{status}: {detail}")
+        self.status = status
+        self.detail = detail
+
+
+class FileChanged(ClientError):
+    """Raised when a file changed on the server while it was being downloaded in segments.
+
+    >>> FileChanged
+
+    """
+
+
+class ConnectionPool:
+    """Pool of persistent HTTP/1.1 connections to a single server.
+
+    >>> ConnectionPool
+
+    See Also:
+        Connections are checked out for one request at a time and returned for reuse once the response is read, so
+        consecutive requests skip the TCP and TLS handshakes.
+    """
+
+    def __init__(self, url: str, size: int, timeout: float):
+        """Instantiates an empty pool.
+
+        Args:
+            url: Base url of the server, eg: ``http://localhost:1914``
+            size: Maximum number of connections open at a time.
+            timeout: Socket timeout in seconds.
+        """
+        parsed = urlsplit(url)
+        self.https = parsed.scheme == "https"
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port
+        self.prefix = parsed.path.rstrip("/")
+        self.timeout = timeout
+        self.idle: queue.LifoQueue = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(size)
+
+    def _connect(self) -> http.client.HTTPConnection:
+        """Opens a new connection."""
+        if self.https:
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    @contextmanager
+    def connection(self) -> Iterator[http.client.HTTPConnection]:
+        """Checks out a connection, closing it instead of returning it to the pool if the request failed.
+
+        Yields:
+            HTTPConnection:
+            Idle connection or a new one.
+        """
+        with self.slots:
+            try:
+                conn = self.idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            try:
+                yield conn
+            except BaseException:
+                conn.close()
+                raise
+            self.idle.put(conn)
+
+    def close(self) -> None:
+        """Closes all the idle connections."""
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def escape_name(name: str) -> str:
+    """Escapes a field or file name for the ``Content-Disposition`` header of a part.
+
+    Args:
+        name: Name of the form field or the file.
+
+    Returns:
+        str:
+        Name with the quotes and line breaks percent encoded, as browsers send them.
+
+    See Also:
+        A line break in a name would otherwise end the header, and let the rest of the name add headers to the part.
+    """
+    return name.replace('"', "%22").replace("\r", "%0D").replace("\n", "%0A")
+
+
+def multipart(fields: dict, files: list[tuple[str, str, BinaryIO, int]],
+              progress: Callable[[int], None] = None) -> tuple[str, int, Iterable[bytes]]:
+    """Builds a streaming ``multipart/form-data`` body, so large files are never loaded into memory.
+
+    Args:
+        fields: Form fields as a dictionary of names and values.
+        files: List of tuples with the form field name, file name, an open binary stream and its size.
+        progress: Called with the number of bytes of the files sent so far.
+
+    Returns:
+        tuple:
+        Content type header, content length and an iterable of body chunks.
+    """
+    boundary = uuid.uuid4().hex
+    head = b"".join(f'--{boundary}\r\nContent-Disposition: form-data; name="{escape_name(name)}"\r\n\r\n'
+                    f'{value}\r\n'.encode() for name, value in fields.items())
+    parts = []
+    for name, file_name, stream, size in files:
+        header = (f'--{boundary}\r\nContent-Disposition: form-data; name="{escape_name(name)}"; '
+                  f'filename="{escape_name(file_name)}"\r\n'
+                  "Content-Type: application/octet-stream\r\n\r\n").encode()
+        parts.append((header, stream, size))
+    tail = f"--{boundary}--\r\n".encode()
+    length = len(head) + sum(len(header) + size + 2 for header, _, size in parts) + len(tail)
+
+    def chunks() -> Iterator[bytes]:
+        """Yields the body in chunks."""
+        sent = 0
+        yield head
+        for part_header, part_stream, _ in parts:
+            yield part_header
+            while chunk := part_stream.read(CHUNK_SIZE):
+                sent += len(chunk)
+                yield chunk
+                if progress:
+                    progress(sent)
+            yield b"\r\n"
+        yield tail
+
+    return f"multipart/form-data; boundary={boundary}", length, chunks()
+
+
+class Transfer:
+    """State of a segmented download, persisted next to the partial file so that it can be resumed.
+
+    >>> Transfer
+
+    See Also:
+        The data is written to ``<local_path>.part`` and the bytes completed in each segment are stored in
+        ``<local_path>.part.json``. The state is discarded if the size or the ``ETag`` of the remote file changed.
+    """
+
+    def __init__(self, local_path: str, size: int, etag: Optional[str], segment_size: int,
+                 done: list[int] = None):
+        """Instantiates the state of a download.
+
+        Args:
+            local_path: Path where the downloaded file is stored.
+            size: Size of the remote file.
+            etag: ``ETag`` of the remote file.
+            segment_size: Number of bytes in each segment.
+            done: Number of bytes completed in each segment.
+        """
+        self.local_path = local_path
+        self.part = f"{local_path}.part"
+        self.sidecar = f"{local_path}.part.json"
+        self.size = size
+        self.etag = etag
+        self.segment_size = segment_size
+        self.done = done or [0] * max(math.ceil(size / segment_size), 1)
+        self.lock = threading.Lock()
+        self.saved = time.monotonic()
+
+    @classmethod
+    def load(cls, local_path: str) -> Optional["Transfer"]:
+        """Loads the state of an interrupted download.
+
+        Args:
+            local_path: Path where the downloaded file is stored.
+
+        Returns:
+            Transfer:
+            State of the download or ``None`` if there is nothing to resume.
+        """
+        try:
+            with open(f"{local_path}.part.json") as f_stream:
+                state = json.load(f_stream)
+            transfer = cls(local_path=local_path, size=state["size"], etag=state["etag"],
+                           segment_size=state["segment_size"], done=state["done"])
+        except (OSError, ValueError, KeyError):
+            return
+        if os.path.isfile(transfer.part) and os.path.getsize(transfer.part) == transfer.size:
+            return transfer
+
+    def bounds(self, index: int) -> tuple[int, int]:
+        """Gets the first byte position that is pending and the last byte position of a segment."""
+        start = index * self.segment_size
+        return start + self.done[index], min(start + self.segment_size, self.size) - 1
+
+    def pending(self) -> list[int]:
+        """Gets the segments that are not complete."""
+        return [index for index in range(len(self.done)) if self.bounds(index)[0] <= self.bounds(index)[1]]
+
+    def save(self, force: bool = False) -> None:
+        """Writes the state atomically, at most once a second unless forced."""
+        with self.lock:
+            if not force and time.monotonic() - self.saved < 1:
+                return
+            with open(f"{self.sidecar}.tmp", "w") as f_stream:
+                json.dump({"size": self.size, "etag": self.etag, "segment_size": self.segment_size,
+                           "done": self.done}, f_stream)
+            os.replace(f"{self.sidecar}.tmp", self.sidecar)
+            self.saved = time.monotonic()
+
+    def discard(self) -> None:
+        """Removes the partial file and the state."""
+        for path in (self.part, self.sidecar):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+class FileHandlerClient:
+    """Uploads and downloads files concurrently, with ranged segments, retries and resumable downloads.
+
+    >>> FileHandlerClient
+
+    """
+
+    def __init__(self, url: str = "http://localhost:1914", auth: str = "apikey", apikey: Optional[str] = None,
+                 username: Optional[str] = None, password: Optional[str] = None, workers: int = 4,
+                 segments: int = 4, segment_size: int = 8 * 1024 * 1024, retries: int = 5, backoff: float = 0.5,
+                 max_backoff: float = 30, timeout: float = 60, headers: dict = None,
+                 progress: Callable[[str, int, int], None] = None):
+        """Instantiates the client with its connection pool and worker threads.
+
+        Args:
+            url: Base url of the server.
+            auth: ``apikey`` for ``auth_apikey`` or ``server`` for ``auth_server``
+            apikey: APIKey for ``auth_apikey``
+            username: Username for ``auth_server``
+            password: Password for ``auth_server``
+            workers: Number of files transferred concurrently.
+            segments: Number of ranged requests running concurrently across all the downloads.
+            segment_size: Files larger than this are downloaded in segments of this size.
+            retries: Number of times a failed request is retried.
+            backoff: Base delay in seconds between retries, doubled on every attempt.
+            max_backoff: Maximum delay in seconds between retries.
+            timeout: Socket timeout in seconds.
+            headers: Additional headers sent with every request.
+            progress: Called with the local path, bytes transferred and the total bytes as a transfer progresses.
+        """
+        if auth not in ("apikey", "server"):
+            raise ValueError(f"Unsupported auth: {auth!r}, use 'apikey' or 'server'")
+        self.auth = auth
+        self.apikey = apikey
+        self.username = username
+        self.password = password
+        self.segment_size = segment_size
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.headers = dict(headers or {})
+        self.progress = progress
+        self.pool = ConnectionPool(url=url, size=workers + segments, timeout=timeout)
+        self.file_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="client-file")
+        self.segment_pool = ThreadPoolExecutor(max_workers=segments, thread_name_prefix="client-segment")
+        self._token = None
+        self._token_lock = threading.Lock()
+
+    def __enter__(self) -> "FileHandlerClient":
+        """Returns the client to be used as a context manager."""
+        return self
+
+    def __exit__(self, *exc) -> None:
+        """Closes the client."""
+        self.close()
+
+    def close(self) -> None:
+        """Stops the worker threads and closes the connections."""
+        self.file_pool.shutdown(wait=True)
+        self.segment_pool.shutdown(wait=True)
+        self.pool.close()
+
+    def _report(self, path: str, done: int, total: int) -> None:
+        """Calls the progress callback, if any."""
+        if self.progress:
+            self.progress(path, done, total)
+
+    def token(self) -> str:
+        """Gets an access token from ``auth_server``, once per client.
+
+        Returns:
+            str:
+            Access token sent as a bearer token.
+        """
+        with self._token_lock:
+            if not self._token:
+                status, _, content = self.exchange(
+                    "POST", "/authenticator/", body=urlencode({"username": self.username,
+                                                               "password": self.password}),
+                    headers={"Content-Type": "application/x-www-form-urlencoded"}, authenticate=False
+                )
+                self._token = self.check(status=status, content=content)["access_token"]
+            return self._token
+
+    def exchange(self, method: str, path: str, query: dict = None, body=None, headers: dict = None,
+                 handler: Callable[[http.client.HTTPResponse], object] = None,
+                 authenticate: bool = True) -> tuple[int, dict, object]:
+        """Sends a single request on a pooled connection and reads the response.
+
+        Args:
+            method: HTTP method.
+            path: Path of the endpoint.
+            query: Query parameters.
+            body: Request body as bytes, string or an iterable of chunks.
+            headers: Request headers.
+            handler: Reads a successful response instead of loading the body into memory.
+            authenticate: Takes a boolean flag to add the credentials for the ``auth`` mode.
+
+        Returns:
+            tuple:
+            Status code, response headers and the response body or the value returned by the handler.
+        """
+        headers = {**self.headers, **(headers or {})}
+        if authenticate and self.auth == "server":
+            headers["Authorization"] = f"Bearer {self.token()}"
+        if authenticate and self.auth == "apikey" and body is None:
+            body = urlencode({"apikey": self.apikey})
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        url = self.pool.prefix + path + (f"?{urlencode(query)}" if query else "")
+        with self.pool.connection() as conn:
+            conn.request(method, url, body=body, headers=headers)
+            response = conn.getresponse()
+            if handler and response.status < 300:
+                result = handler(response)
+            else:
+                result = response.read()
+            if response.will_close:
+                conn.close()
+        return response.status, {key.lower(): value for key, value in response.getheaders()}, result
+
+    @staticmethod
+    def check(status: int, content: bytes):
+        """Decodes a JSON response, raising ``ClientError`` if it failed.
+
+        Args:
+            status: Status code of the response.
+            content: Body of the response.
+
+        Returns:
+            Decoded JSON body, ``None`` if the body is empty.
+        """
+        try:
+            payload = json.loads(content) if content else None
+        except ValueError:
+            payload = content.decode(errors="replace")
+        if status >= 400:
+            raise ClientError(status=status, detail=payload.get("detail") if isinstance(payload, dict) else payload)
+        return payload
+
+    def request_json(self, method: str, path: str, **kwargs):
+        """Sends a request with ``exchange`` and decodes the response with ``check``.
+
+        Args:
+            method: HTTP method.
+            path: Path of the endpoint.
+            **kwargs: Keyword arguments for ``exchange``
+
+        Returns:
+            Decoded JSON body.
+        """
+        status, _, content = self.exchange(method, path, **kwargs)
+        return self.check(status=status, content=content)
+
+    def retry(self, func: Callable[[], object], description: str):
+        """Calls a function, retrying connection failures and retryable status codes with exponential backoff.
+
+        Args:
+            func: Function that runs one attempt.
+            description: Description of the attempt for the logs.
+
+        Returns:
+            Value returned by the function.
+        """
+        attempt, refreshed = 0, False
+        while True:
+            try:
+                return func()
+            except ClientError as error:
+                if error.status == 401 and self.auth == "server" and self._token and not refreshed:
+                    # Tokens issued by the server expire, so a rejected token is replaced once without a backoff
+                    LOGGER.info(f"Requesting a new token for {description}")
+                    with self._token_lock:
+                        self._token = None
+                    refreshed = True
+                    continue
+                if error.status not in RETRY_STATUS or attempt == self.retries:
+                    raise
+                reason = error
+            except (OSError, http.client.HTTPException) as error:
+                if attempt == self.retries:
+                    raise
+                reason = error
+            delay = random.uniform(0, min(self.max_backoff, self.backoff * pow(2, attempt)))
+            LOGGER.warning(f"Retrying {description} in {delay:.2f}s after: {reason!r}")
+            time.sleep(delay)
+            attempt += 1
+
+    def run_all(self, items: dict[str, dict], func: Callable[..., object]) -> dict:
+        """Runs a transfer for every item in the file pool.
+
+        Args:
+            items: Keyword arguments for each call, keyed by the local path.
+            func: Function that transfers a single item.
+
+        Returns:
+            dict:
+            Result of each item, or a dictionary with the error if it failed.
+        """
+        futures = {key: self.file_pool.submit(func, **kwargs) for key, kwargs in items.items()}
+        results = {}
+        for key, future in futures.items():
+            try:
+                results[key] = future.result()
+            except (ClientError, OSError, http.client.HTTPException) as error:
+                LOGGER.error(f"Failed: {key} - {error}")
+                results[key] = {"error": str(error)}
+        return results
+
+    def list_directory(self, remote_dir: str) -> dict:
+        """Lists the files and directories in a directory on the server.
+
+        Args:
+            remote_dir: Directory on the server.
+
+        Returns:
+            dict:
+            Lists of ``files`` and ``directories``
+        """
+        method = "POST" if self.auth == "apikey" else "GET"
+        content = self.retry(lambda: self.request_json(method, "/list-directory/", query={"FilePath": remote_dir}),
+                             description=f"list {remote_dir}")
+        return content.get(remote_dir, {}) if isinstance(content, dict) else {}
+
+    def walk(self, remote_dir: str) -> Iterator[tuple[str, list[str]]]:
+        """Walks a directory tree on the server.
+
+        Args:
+            remote_dir: Directory on the server.
+
+        Yields:
+            tuple:
+            Directory and the files in it.
+        """
+        listing = self.list_directory(remote_dir=remote_dir)
+        yield remote_dir, listing.get("files", [])
+        for directory in listing.get("directories", []):
+            yield from self.walk(remote_dir=f"{remote_dir.rstrip('/')}/{directory}")
+
+    def upload_file(self, path: str, remote_dir: Optional[str] = None, name: Optional[str] = None,
+                    parents: bool = False) -> dict:
+        """Uploads a single file, retrying it from the beginning if it fails.
+
+        Args:
+            path: Path of the local file.
+            remote_dir: Directory on the server, defaults to the upload root of the server.
+            name: Name of the file on the server, defaults to the local name.
+            parents: Takes a boolean flag to create the remote directory within the upload root.
+
+        Returns:
+            dict:
+            Response from the server.
+
+        See Also:
+            Uploads are not resumable, unlike downloads, so every retry sends the whole file again. Use ``sync_file``
+            to send only the changed blocks of a large file that is already on the server.
+        """
+        name = name or os.path.basename(path)
+        query = {"FileName": name}
+        if remote_dir:
+            query["FilePath"] = remote_dir
+        if parents:
+            query["Parents"] = "true"
+        size = os.path.getsize(path)
+
+        def attempt() -> dict:
+            """Streams the file in a single request."""
+            self._report(path, 0, size)
+            with open(path, "rb") as f_stream:
+                content_type, length, body = multipart(
+                    fields={"apikey": self.apikey} if self.auth == "apikey" else {},
+                    files=[("data", name, f_stream, size)], progress=lambda sent: self._report(path, sent, size)
+                )
+                return self.request_json("POST", "/upload-file/", query=query, body=body, headers={
+                    "Content-Type": content_type, "Content-Length": str(length)
+                })
+
+        return self.retry(attempt, description=f"upload {name}")
+
+    def upload_files(self, paths: list[str], remote_dir: Optional[str] = None, parents: bool = False) -> dict:
+        """Uploads multiple files concurrently.
+
+        Args:
+            paths: Paths of the local files.
+            remote_dir: Directory on the server, defaults to the upload root of the server.
+            parents: Takes a boolean flag to create the remote directory within the upload root.
+
+        Returns:
+            dict:
+            Response from the server or the error for each path.
+        """
+        return self.run_all(items={path: dict(path=path, remote_dir=remote_dir, parents=parents) for path in paths},
+                            func=self.upload_file)
+
+    def upload_tree(self, local_dir: str, remote_dir: str) -> dict:
+        """Uploads a directory tree concurrently, creating the directories on the server.
+
+        Args:
+            local_dir: Local directory.
+            remote_dir: Directory on the server where the contents of the local directory are stored.
+
+        Returns:
+            dict:
+            Response from the server or the error for each path.
+        """
+        items = {}
+        for directory, _, files in os.walk(local_dir):
+            relative = os.path.relpath(directory, local_dir)
+            target = remote_dir if relative == "." else f"{remote_dir.rstrip('/')}/{relative.replace(os.sep, '/')}"
+            for file in files:
+                items[os.path.join(directory, file)] = dict(path=os.path.join(directory, file), remote_dir=target,
+                                                            parents=True)
+        return self.run_all(items=items, func=self.upload_file)
+
+    def batch(self, path: str, fields: dict, description: str) -> dict:
+        """Sends a request to one of the batch endpoints, as a form for ``apikey`` or as JSON for ``server``.
+
+        Args:
+            path: Path of the batch endpoint.
+            fields: Input for the endpoint, with the names of the form fields.
+            description: Description of the request for the logs.
+
+        Returns:
+            dict:
+            Response from the server.
+        """
+        if self.auth == "apikey":
+            body, content_type = urlencode({"apikey": self.apikey, **fields}, doseq=True), \
+                "application/x-www-form-urlencoded"
+        else:
+            body, content_type = json.dumps({key.title(): value for key, value in fields.items()}), "application/json"
+        return self.retry(lambda: self.request_json("POST", path, body=body, headers={"Content-Type": content_type}),
+                          description=description)
+
+    def delete_files(self, paths: list[str]) -> dict:
+        """Deletes files on the server.
+
+        Args:
+            paths: Paths of the files, relative to the upload root of the server.
+
+        Returns:
+            dict:
+            Deletion status of every file.
+        """
+        return self.batch("/batch/delete/", fields={"paths": paths}, description=f"delete {len(paths)} files")
+
+    def move_files(self, sources: list[str], destinations: list[str], overwrite: bool = False) -> dict:
+        """Renames or moves files on the server.
+
+        Args:
+            sources: Paths of the files, relative to the upload root of the server.
+            destinations: New paths for each of the sources, relative to the upload root of the server.
+            overwrite: Takes a boolean flag to replace existing destinations.
+
+        Returns:
+            dict:
+            Status of every move.
+        """
+        return self.batch("/batch/move/", fields={"sources": sources, "destinations": destinations,
+                                                  "overwrite": overwrite},
+                          description=f"move {len(sources)} files")
+
+    def download_file(self, name: str, remote_dir: str, local_path: Optional[str] = None) -> dict:
+        """Downloads a single file, in parallel segments if it is larger than the segment size.
+
+        Args:
+            name: Name of the file on the server.
+            remote_dir: Directory of the file on the server.
+            local_path: Path where the file is stored, defaults to the name of the file.
+
+        Returns:
+            dict:
+            Local path, size and the number of segments.
+
+        See Also:
+            An interrupted download resumes from the ``.part`` file, unless the file changed on the server.
+        """
+        local_path = local_path or name
+        try:
+            return self._download(name=name, remote_dir=remote_dir, local_path=local_path)
+        except FileChanged:
+            LOGGER.warning(f"{name} changed on the server, restarting the download.")
+            if transfer := Transfer.load(local_path=local_path):
+                transfer.discard()
+            return self._download(name=name, remote_dir=remote_dir, local_path=local_path)
+
+    def _download_request(self, name: str, remote_dir: str, headers: dict,
+                          handler: Callable[[http.client.HTTPResponse], object]) -> tuple[int, dict, object]:
+        """Sends a download request for the auth mode."""
+        method = "POST" if self.auth == "apikey" else "GET"
+        return self.exchange(method, "/download-file/", query={"FileName": name, "FilePath": remote_dir},
+                             headers=headers, handler=handler)
+
+    def _download(self, name: str, remote_dir: str, local_path: str) -> dict:
+        """Downloads the first segment to learn the size of the file, then the rest in parallel."""
+        def probe() -> Optional[Transfer]:
+            """Requests the first segment, or the whole file if the server ignores the range."""
+            if transfer := Transfer.load(local_path=local_path):
+                return transfer
+
+            def handler(response: http.client.HTTPResponse) -> Optional[Transfer]:
+                """Writes the response into the partial file."""
+                if response.status == 206:
+                    size = int(response.getheader("Content-Range").rsplit("/", 1)[1])
+                    transfer = Transfer(local_path=local_path, size=size, etag=response.getheader("ETag"),
+                                        segment_size=self.segment_size)
+                    with open(transfer.part, "wb") as f_stream:
+                        f_stream.truncate(size)
+                    transfer.save(force=True)
+                    self._write_segment(transfer=transfer, index=0, response=response)
+                    return transfer
+                size = int(response.getheader("Content-Length") or 0)
+                written = 0
+                with open(f"{local_path}.part", "wb") as f_stream:
+                    while chunk := response.read(CHUNK_SIZE):
+                        f_stream.write(chunk)
+                        written += len(chunk)
+                        self._report(local_path, written, size)
+                os.replace(f"{local_path}.part", local_path)
+
+            status, headers, result = self._download_request(
+                name=name, remote_dir=remote_dir, headers={"Range": f"bytes=0-{self.segment_size - 1}"},
+                handler=handler
+            )
+            if status == 416 and headers.get("content-range") == "bytes */0":
+                open(local_path, "wb").close()
+                self._report(local_path, 0, 0)
+                return
+            if status >= 300:
+                self.check(status=status, content=result)
+            return result
+
+        transfer = self.retry(probe, description=f"download {name}")
+        if transfer is None:
+            return {"path": local_path, "size": os.path.getsize(local_path), "segments": 1}
+
+        def fetch(index: int) -> None:
+            """Downloads the pending bytes of a segment with retries."""
+            self.retry(lambda: self._fetch_segment(transfer=transfer, index=index, name=name, remote_dir=remote_dir),
+                       description=f"segment {index} of {name}")
+
+        futures = [self.segment_pool.submit(fetch, index) for index in transfer.pending()]
+        wait(futures)
+        transfer.save(force=True)
+        for future in futures:
+            future.result()
+        os.replace(transfer.part, local_path)
+        os.remove(transfer.sidecar)
+        return {"path": local_path, "size": transfer.size, "segments": len(transfer.done)}
+
+    def _fetch_segment(self, transfer: Transfer, index: int, name: str, remote_dir: str) -> None:
+        """Requests the pending bytes of a segment, only if the file has not changed."""
+        start, end = transfer.bounds(index=index)
+        if start > end:
+            return
+
+        def handler(response: http.client.HTTPResponse) -> None:
+            """Writes the response into the partial file."""
+            if response.status != 206 or not response.getheader("Content-Range", "").startswith(f"bytes {start}-"):
+                raise FileChanged(status=412, detail=f"{name} changed on the server.")
+            self._write_segment(transfer=transfer, index=index, response=response)
+
+        headers = {"Range": f"bytes={start}-{end}"}
+        if transfer.etag:
+            headers["If-Range"] = transfer.etag
+        status, _, content = self._download_request(name=name, remote_dir=remote_dir, headers=headers,
+                                                    handler=handler)
+        if status >= 300:
+            self.check(status=status, content=content)
+
+    def _write_segment(self, transfer: Transfer, index: int, response: http.client.HTTPResponse) -> None:
+        """Streams a ranged response into its position in the partial file, saving the progress as it goes."""
+        start, end = transfer.bounds(index=index)
+        with open(transfer.part, "r+b") as f_stream:
+            f_stream.seek(start)
+            while start <= end and (chunk := response.read(min(CHUNK_SIZE, end - start + 1))):
+                f_stream.write(chunk)
+                f_stream.flush()
+                start += len(chunk)
+                with transfer.lock:
+                    transfer.done[index] += len(chunk)
+                    done = sum(transfer.done)
+                self._report(transfer.local_path, done, transfer.size)
+                transfer.save()
+        if start <= end:
+            raise http.client.IncompleteRead(partial=b"", expected=end - start + 1)
+
+    def download_files(self, names: list[str], remote_dir: str, local_dir: str = ".") -> dict:
+        """Downloads multiple files concurrently.
+
+        Args:
+            names: Names of the files on the server.
+            remote_dir: Directory of the files on the server.
+            local_dir: Local directory where the files are stored.
+
+        Returns:
+            dict:
+            Download result or the error for each name.
+        """
+        os.makedirs(local_dir, exist_ok=True)
+        return self.run_all(items={os.path.join(local_dir, name): dict(name=name, remote_dir=remote_dir,
+                                                                       local_path=os.path.join(local_dir, name))
+                                   for name in names}, func=self.download_file)
+
+    def download_tree(self, remote_dir: str, local_dir: str) -> dict:
+        """Downloads a directory tree from the server concurrently.
+
+        Args:
+            remote_dir: Directory on the server.
+            local_dir: Local directory where the contents of the remote directory are stored.
+
+        Returns:
+            dict:
+            Download result or the error for each file.
+        """
+        items = {}
+        for directory, files in self.walk(remote_dir=remote_dir):
+            relative = directory[len(remote_dir):].strip("/")
+            target = os.path.join(local_dir, *relative.split("/")) if relative else local_dir
+            os.makedirs(target, exist_ok=True)
+            for name in files:
+                items[os.path.join(target, name)] = dict(name=name, remote_dir=directory,
+                                                         local_path=os.path.join(target, name))
+        return self.run_all(items=items, func=self.download_file)
+
+    def sync_file(self, path: str, remote_dir: Optional[str] = None, name: Optional[str] = None) -> dict:
+        """Updates a file on the server by sending only the blocks that changed, or the whole file if it is new.
+
+        Args:
+            path: Path of the local file.
+            remote_dir: Directory on the server, defaults to the upload root of the server.
+            name: Name of the file on the server, defaults to the local name.
+
+        Returns:
+            dict:
+            Response from the server.
+        """
+        name = name or os.path.basename(path)
+        query = {"FileName": name}
+        if remote_dir:
+            query["FilePath"] = remote_dir
+        method = "POST" if self.auth == "apikey" else "GET"
+
+        def get_signature() -> Optional[dict]:
+            """Gets the signature of the file on the server."""
+            status, _, content = self.exchange(method, "/sync/signature/", query=query)
+            return None if status == 404 else self.check(status=status, content=content)
+
+        if not (sig := self.retry(get_signature, description=f"signature of {name}")):
+            return self.upload_file(path=path, remote_dir=remote_dir, name=name, parents=True)
+        sha256 = hashlib.sha256()
+        with open(path, "rb") as f_stream:
+            while chunk := f_stream.read(CHUNK_SIZE):
+                sha256.update(chunk)
+        with tempfile.TemporaryFile() as data:
+            instructions = write_delta(sig=sig, path=path, data=data)
+            size = data.tell()
+            fields = {"instructions": json.dumps(instructions), "block_size": sig["block_size"],
+                      "checksum": sha256.hexdigest()}
+            if self.auth == "apikey":
+                fields["apikey"] = self.apikey
+
+            def attempt() -> dict:
+                """Streams the delta in a single request."""
+                data.seek(0)
+                content_type, length, body = multipart(fields=fields, files=[("data", name, data, size)])
+                return self.request_json("POST", "/sync/patch/", query=query, body=body, headers={
+                    "Content-Type": content_type, "Content-Length": str(length)
+                })
+
+            return self.retry(attempt, description=f"sync {name}")
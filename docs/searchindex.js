@@ -1 +1 @@
-Search.setIndex({docnames:["README","index"],envversion:{"sphinx.domains.c":2,"sphinx.domains.changeset":1,"sphinx.domains.citation":1,"sphinx.domains.cpp":5,"sphinx.domains.index":1,"sphinx.domains.javascript":2,"sphinx.domains.math":2,"sphinx.domains.python":3,"sphinx.domains.rst":2,"sphinx.domains.std":2,sphinx:56},filenames:["README.md","index.rst"],objects:{"":[[1,0,0,"-","auth_apikey"],[1,0,0,"-","auth_server"],[1,0,0,"-","upload"]],"models.classes":[[1,2,1,"","Bogus"],[1,2,1,"","DownloadHandler"],[1,2,1,"","ListHandler"],[1,2,1,"","UploadHandler"]],"models.classes.Bogus":[[1,3,1,"","authentication"]],"models.classes.DownloadHandler":[[1,3,1,"","FileName"],[1,3,1,"","FilePath"]],"models.classes.ListHandler":[[1,3,1,"","FilePath"]],"models.classes.UploadHandler":[[1,3,1,"","FileName"],[1,3,1,"","FilePath"]],"models.config":[[1,2,1,"","LogConfig"]],"models.executor":[[1,2,1,"","Executor"]],"models.executor.Executor":[[1,4,1,"","execute_download_file"],[1,4,1,"","execute_list_directory"],[1,4,1,"","execute_upload_file"],[1,4,1,"","execute_upload_files"]],"models.filters":[[1,2,1,"","APIKeyFilter"],[1,2,1,"","EndpointFilter"]],"models.filters.APIKeyFilter":[[1,4,1,"","filter"]],"models.filters.EndpointFilter":[[1,4,1,"","filter"]],"models.secrets":[[1,2,1,"","Secrets"]],auth_apikey:[[1,1,1,"","download_file"],[1,1,1,"","health"],[1,1,1,"","list_directory"],[1,1,1,"","redirect_index"],[1,1,1,"","startup_event"],[1,1,1,"","upload_file"],[1,1,1,"","upload_files"],[1,1,1,"","verify_auth"]],auth_server:[[1,1,1,"","download_file"],[1,1,1,"","health"],[1,1,1,"","list_directory"],[1,1,1,"","redirect_index"],[1,1,1,"","server_authenticator"],[1,1,1,"","startup_event"],[1,1,1,"","upload_file"],[1,1,1,"","upload_files"]],models:[[1,0,0,"-","secrets"]],upload:[[1,1,1,"","delete_file"],[1,1,1,"","login"],[1,1,1,"","read_cookie"],[1,1,1,"","redirect_index"],[1,1,1,"","set_cookie"],[1,1,1,"","upload_files"]]},objnames:{"0":["py","module","Python module"],"1":["py","function","Python function"],"2":["py","class","Python class"],"3":["py","attribute","Python attribute"],"4":["py","method","Python method"]},objtypes:{"0":"py:module","1":"py:function","2":"py:class","3":"py:attribute","4":"py:method"},terms:{"1xx":1,"200":1,"204":1,"304":1,"400":1,"401":1,"403":1,"404":1,"500":1,"8":0,"boolean":1,"byte":1,"default":0,"new":1,"null":1,"return":1,"var":[0,1],"while":1,A:1,If:[0,1],No:1,Not:1,_:0,abl:1,access:1,after:1,all:[0,1],allow:1,alwai:1,an:[0,1],ani:1,apikei:0,apikeyfilt:1,ar:[0,1],argument:1,async:1,asynchron:1,auth:[0,1],auth_apikei:1,auth_serv:1,authent:0,avail:0,base:1,basemodel:1,basic:1,blurb:1,bodi:1,bogu:1,bool:1,cach:0,call:1,can:0,cannot:1,check:1,children:1,clean:0,code:1,commit:0,config:1,configur:1,contain:1,content:1,convent:0,cooki:1,copyright:1,creat:1,creation:0,credenti:1,data:1,datastructur:1,delet:1,delete_fil:1,depend:1,detail:1,dict:1,dictconfig:1,dictionari:1,directori:1,doc:[0,1],docstr:0,doe:1,doesn:1,dot:1,download:[0,1],download_fil:1,downloadhandl:1,dure:1,each:1,ellipsi:1,empti:1,endpoint:1,endpointfilt:1,ensur:0,enter:1,env:[0,1],event:1,everi:[0,1],execut:1,execute_download_fil:1,execute_list_directori:1,execute_upload_fil:1,exist:1,fail:1,fals:1,fastapi:[0,1],field:1,filenam:1,filepath:1,filerespons:1,first:1,flag:1,flake8:0,form:1,form_data:1,format:[0,1],from:[0,1],gener:0,getlogg:1,github:0,given:1,googl:0,ha:1,handl:1,handler:1,have:1,head:1,header:1,health:1,hook:0,htmlrespons:1,http:[0,1],httpbasic:1,httpbasiccredenti:1,httpexcept:1,index:1,inform:1,initi:1,input:1,instal:0,instead:1,invest:1,io:0,isort:0,its:1,jprq:0,json:1,jsonrespons:1,keyword:1,kwarg:1,licens:1,line:1,lint:1,list:1,list_directori:1,listhandl:1,localtunnel:0,log_format:1,logconfig:1,logger:1,logger_nam:1,login:1,logrecord:1,look:1,match:1,member:1,messag:1,mit:0,modifi:1,modul:1,multifileuploadhandl:1,multipl:1,name:1,name_fil:1,need:1,ngrok:0,none:1,nonetyp:1,noreturn:1,oauth2:1,oauth2passwordbear:1,oauth2passwordrequestform:1,onc:1,option:1,other:1,out:1,page:1,paramet:1,pars:1,pass:1,password:[0,1],path:1,pep:0,pip:0,post:1,pre:0,precommit:0,present:1,preserv:1,pro:1,py:0,pydant:1,rais:1,randomli:0,rao:0,read_cooki:1,recommonmark:0,record:1,redirect:1,redirect_index:1,redirectrespons:1,refresh_token:1,regardless:1,repres:1,request:[0,1],requir:0,respons:1,root:1,run:[0,1],runbook:1,s:0,safe:0,search:1,secur:1,send:1,server:0,server_authent:1,set:1,set_cooki:1,should:1,simpl:1,sinc:1,sivanandha:0,size:1,someth:1,specifi:1,sphinx:0,standard:1,starlett:1,startup:1,startup_ev:1,statu:1,store:0,str:1,stream:1,style:0,successfulli:1,t:1,take:1,task:1,termin:1,thevickypedia:0,thi:1,through:1,thu:1,time:1,tip:1,togeth:1,token:1,tortois:1,treat:1,type:1,unauthor:1,unavail:1,under:0,union:1,upgrad:0,upload:0,upload_fil:1,uploadfil:1,uploadhandl:1,url:[0,1],us:[0,1],usag:1,user:[0,1],uuid:0,uvicorn:1,valid:1,validationerror:1,valu:1,verify_auth:1,version:1,vignesh:0,wa:1,when:1,which:1,wrap:1},titles:["API File Handler","Welcome to FileHandler API\u2019s documentation!"],titleterms:{"class":1,api:[0,1],apikei:1,authent:1,code:0,copyright:0,custom:1,document:1,executor:1,file:[0,1],filehandl:1,filter:1,handler:0,indic:1,licens:0,lint:0,log:1,me:1,model:1,multi:1,pro:0,read:1,runbook:0,s:1,secret:1,server:1,standard:0,tabl:1,tip:0,upload:1,usag:0,welcom:1}})
\ No newline at end of file
+Search.setIndex({docnames:["README","index"],envversion:{"sphinx.domains.c":2,"sphinx.domains.changeset":1,"sphinx.domains.citation":1,"sphinx.domains.cpp":5,"sphinx.domains.index":1,"sphinx.domains.javascript":2,"sphinx.domains.math":2,"sphinx.domains.python":3,"sphinx.domains.rst":2,"sphinx.domains.std":2,sphinx:56},filenames:["README.md","index.rst"],objects:{"":[[1,0,0,"-","app"],[1,0,0,"-","auth_apikey"],[1,0,0,"-","auth_server"],[1,0,0,"-","upload"]],"client.api":[[1,2,1,"","ClientError"],[1,3,1,"","ConnectionPool"],[1,2,1,"","FileChanged"],[1,3,1,"","FileHandlerClient"],[1,3,1,"","Transfer"],[1,1,1,"","escape_name"],[1,1,1,"","multipart"]],"client.api.ConnectionPool":[[1,4,1,"","close"],[1,4,1,"","connection"]],"client.api.FileHandlerClient":[[1,4,1,"","batch"],[1,4,1,"","check"],[1,4,1,"","close"],[1,4,1,"","delete_files"],[1,4,1,"","download_file"],[1,4,1,"","download_files"],[1,4,1,"","download_tree"],[1,4,1,"","exchange"],[1,4,1,"","list_directory"],[1,4,1,"","move_files"],[1,4,1,"","request_json"],[1,4,1,"","retry"],[1,4,1,"","run_all"],[1,4,1,"","sync_file"],[1,4,1,"","token"],[1,4,1,"","upload_file"],[1,4,1,"","upload_files"],[1,4,1,"","upload_tree"],[1,4,1,"","walk"]],"client.api.Transfer":[[1,4,1,"","bounds"],[1,4,1,"","discard"],[1,4,1,"","load"],[1,4,1,"","pending"],[1,4,1,"","save"]],"models.assets":[[1,3,1,"","Asset"],[1,3,1,"","AssetStore"]],"models.assets.Asset":[[1,5,1,"","brotli"],[1,5,1,"","content"],[1,5,1,"","digest"],[1,5,1,"","gzip"],[1,5,1,"","media_type"],[1,5,1,"","name"]],"models.assets.AssetStore":[[1,4,1,"","response"],[1,4,1,"","url"]],"models.auth":[[1,3,1,"","APIKeyAuth"],[1,3,1,"","BasicAuth"],[1,3,1,"","ServerAuth"],[1,1,1,"","unauthorized"],[1,1,1,"","valid_credentials"]],"models.auth.APIKeyAuth":[[1,4,1,"","authenticate"],[1,5,1,"","form"],[1,4,1,"","register"],[1,4,1,"","startup"]],"models.auth.BasicAuth":[[1,4,1,"","authenticate"],[1,5,1,"","form"],[1,4,1,"","login"],[1,4,1,"","logout"],[1,4,1,"","read_session"],[1,4,1,"","register"],[1,4,1,"","startup"]],"models.auth.ServerAuth":[[1,4,1,"","authenticate"],[1,4,1,"","authenticator"],[1,5,1,"","form"],[1,4,1,"","register"],[1,4,1,"","startup"]],"models.cache":[[1,3,1,"","ContentCache"]],"models.cache.ContentCache":[[1,4,1,"","get"],[1,4,1,"","invalidate"],[1,4,1,"","lookup"],[1,4,1,"","metrics"],[1,4,1,"","stat"],[1,4,1,"","store"]],"models.classes":[[1,3,1,"","BatchHandler"],[1,3,1,"","DownloadHandler"],[1,3,1,"","ListHandler"],[1,3,1,"","MoveHandler"],[1,3,1,"","PreviewHandler"],[1,3,1,"","SyncHandler"],[1,3,1,"","UploadHandler"]],"models.classes.BatchHandler":[[1,5,1,"","Digest"],[1,5,1,"","Paths"],[1,5,1,"","Pattern"]],"models.classes.DownloadHandler":[[1,5,1,"","FileName"],[1,5,1,"","FilePath"]],"models.classes.ListHandler":[[1,5,1,"","FilePath"]],"models.classes.MoveHandler":[[1,5,1,"","Destinations"],[1,5,1,"","Overwrite"],[1,5,1,"","Sources"]],"models.classes.PreviewHandler":[[1,5,1,"","FileName"],[1,5,1,"","FilePath"],[1,5,1,"","Height"],[1,5,1,"","Lines"],[1,5,1,"","Width"]],"models.classes.SyncHandler":[[1,5,1,"","BlockSize"],[1,5,1,"","FileName"],[1,5,1,"","FilePath"],[1,5,1,"","Parents"]],"models.classes.UploadHandler":[[1,5,1,"","FileName"],[1,5,1,"","FilePath"],[1,5,1,"","Parents"]],"models.config":[[1,3,1,"","LogConfig"]],"models.delta":[[1,1,1,"","apply_delta"],[1,1,1,"","block_size_for"],[1,1,1,"","delta"],[1,1,1,"","signature"],[1,1,1,"","strong_checksum"],[1,1,1,"","write_delta"]],"models.executor":[[1,3,1,"","Executor"]],"models.executor.Executor":[[1,4,1,"","execute_batch_delete"],[1,4,1,"","execute_batch_move"],[1,4,1,"","execute_batch_stat"],[1,4,1,"","execute_download_file"],[1,4,1,"","execute_list_directory"],[1,4,1,"","execute_preview"],[1,4,1,"","execute_sync_patch"],[1,4,1,"","execute_sync_signature"],[1,4,1,"","execute_upload_file"],[1,4,1,"","execute_upload_files"]],"models.filters":[[1,3,1,"","APIKeyFilter"],[1,3,1,"","EndpointFilter"]],"models.filters.APIKeyFilter":[[1,4,1,"","filter"]],"models.filters.EndpointFilter":[[1,4,1,"","filter"]],"models.journal":[[1,3,1,"","Transfer"],[1,3,1,"","TransferJournal"],[1,1,1,"","parse"],[1,1,1,"","pending"],[1,1,1,"","repair_log"],[1,1,1,"","running"]],"models.journal.Transfer":[[1,5,1,"","id"],[1,5,1,"","partial"],[1,5,1,"","path"],[1,5,1,"","started"],[1,5,1,"","written"]],"models.journal.TransferJournal":[[1,4,1,"","abort"],[1,4,1,"","append"],[1,4,1,"","begin"],[1,4,1,"","commit"],[1,4,1,"","deleted"],[1,4,1,"","follow"],[1,4,1,"","header"],[1,4,1,"","locked"],[1,4,1,"","moved"],[1,4,1,"","read"],[1,4,1,"","recover"],[1,4,1,"","repair"],[1,4,1,"","rotate"],[1,4,1,"","rotated"],[1,4,1,"","run"],[1,4,1,"","size"],[1,4,1,"","start"],[1,4,1,"","stop"],[1,4,1,"","store"],[1,4,1,"","take"],[1,4,1,"","write"]],"models.limits":[[1,3,1,"","MultipartScanner"],[1,3,1,"","UploadLimitMiddleware"],[1,3,1,"","UploadLimits"]],"models.limits.MultipartScanner":[[1,4,1,"","content"],[1,4,1,"","feed"],[1,4,1,"","start_part"]],"models.limits.UploadLimitMiddleware":[[1,4,1,"","reject"]],"models.limits.UploadLimits":[[1,5,1,"","AllowedExtensions"],[1,5,1,"","FilenamePattern"],[1,5,1,"","MaxFieldSize"],[1,5,1,"","MaxFilenameLength"],[1,5,1,"","MaxHeaderSize"],[1,5,1,"","MaxPartSize"],[1,5,1,"","MaxParts"],[1,5,1,"","MaxTotalSize"]],"models.logger":[[1,3,1,"","AsyncQueueHandler"],[1,3,1,"","JSONFormatter"],[1,3,1,"","LoggerListener"],[1,3,1,"","SamplingFilter"],[1,1,1,"","request_path"],[1,1,1,"","start_logging"],[1,1,1,"","stop_logging"]],"models.logger.AsyncQueueHandler":[[1,4,1,"","prepare"]],"models.logger.JSONFormatter":[[1,4,1,"","format"]],"models.logger.LoggerListener":[[1,4,1,"","start"],[1,4,1,"","stop"]],"models.logger.SamplingFilter":[[1,4,1,"","filter"]],"models.preview":[[1,3,1,"","PreviewStore"],[1,1,1,"","digest"],[1,1,1,"","render_snippet"],[1,1,1,"","render_thumbnail"]],"models.preview.PreviewStore":[[1,4,1,"","file_digest"],[1,4,1,"","get"],[1,4,1,"","invalidate"],[1,4,1,"","kind"],[1,4,1,"","load"],[1,4,1,"","prune"],[1,4,1,"","run"],[1,4,1,"","save"],[1,4,1,"","shutdown"],[1,4,1,"","start"],[1,4,1,"","stop"]],"models.replication":[[1,3,1,"","Peer"],[1,3,1,"","ReplicationMiddleware"],[1,3,1,"","Replicator"]],"models.replication.Peer":[[1,4,1,"","load"],[1,4,1,"","save"]],"models.replication.ReplicationMiddleware":[[1,4,1,"","replicated"]],"models.replication.Replicator":[[1,4,1,"","compact"],[1,4,1,"","elect"],[1,4,1,"","lag"],[1,4,1,"","last_seq"],[1,4,1,"","locked"],[1,4,1,"","metrics"],[1,4,1,"","put"],[1,4,1,"","read"],[1,4,1,"","record"],[1,4,1,"","relative"],[1,4,1,"","ship"],[1,4,1,"","start"],[1,4,1,"","stop"],[1,4,1,"","supervise"],[1,4,1,"","sync"],[1,4,1,"","worker"]],"models.retention":[[1,3,1,"","Entry"],[1,3,1,"","RetentionEngine"],[1,3,1,"","RetentionPolicy"],[1,3,1,"","UsageLedger"]],"models.retention.Entry":[[1,5,1,"","atime"],[1,5,1,"","mtime"],[1,5,1,"","owner"],[1,5,1,"","size"]],"models.retention.RetentionEngine":[[1,4,1,"","check_quota"],[1,4,1,"","follow"],[1,4,1,"","forget"],[1,4,1,"","load"],[1,4,1,"","moved"],[1,4,1,"","record"],[1,4,1,"","relative"],[1,4,1,"","replay"],[1,4,1,"","save"],[1,4,1,"","scan"],[1,4,1,"","start"],[1,4,1,"","stop"],[1,4,1,"","sweep"],[1,4,1,"","touch"],[1,4,1,"","usage"]],"models.retention.RetentionPolicy":[[1,5,1,"","BatchPause"],[1,5,1,"","BatchSize"],[1,5,1,"","Eviction"],[1,5,1,"","MaxBytes"],[1,5,1,"","MaxFiles"],[1,5,1,"","Quotas"],[1,5,1,"","SweepInterval"],[1,5,1,"","TTL"],[1,4,1,"","load"],[1,4,1,"","valid_eviction"]],"models.retention.UsageLedger":[[1,4,1,"","add"],[1,4,1,"","evictable"],[1,4,1,"","expired"],[1,4,1,"","move"],[1,4,1,"","remove"],[1,4,1,"","touch"],[1,4,1,"","ttl"]],"models.secrets":[[1,3,1,"","Credentials"]],"models.secrets.Credentials":[[1,6,1,"","PASSWORD"],[1,6,1,"","USERNAME"]],"models.session":[[1,3,1,"","Session"],[1,3,1,"","SessionStore"]],"models.session.Session":[[1,5,1,"","created"],[1,5,1,"","expiry"],[1,5,1,"","username"]],"models.session.SessionStore":[[1,4,1,"","create"],[1,4,1,"","delete"],[1,4,1,"","get"],[1,4,1,"","startup"],[1,4,1,"","sweep"]],"models.tracing":[[1,3,1,"","OTLPExporter"],[1,3,1,"","SamplingProfiler"],[1,3,1,"","Span"],[1,3,1,"","Trace"],[1,3,1,"","TracingMiddleware"],[1,1,1,"","current_trace"],[1,1,1,"","stage"],[1,1,1,"","start_tracing"],[1,1,1,"","stop_tracing"],[1,1,1,"","timed"]],"models.tracing.OTLPExporter":[[1,4,1,"","export"],[1,4,1,"","start"],[1,4,1,"","stop"]],"models.tracing.SamplingProfiler":[[1,4,1,"","start"],[1,4,1,"","stop"]],"models.tracing.Span":[[1,5,1,"","attributes"],[1,6,1,"","duration"],[1,5,1,"","end"],[1,5,1,"","name"],[1,5,1,"","parent_id"],[1,5,1,"","span_id"],[1,5,1,"","start"]],"models.tracing.Trace":[[1,4,1,"","finish"],[1,4,1,"","server_timing"],[1,4,1,"","to_otlp"]],app:[[1,1,1,"","batch_body"],[1,1,1,"","batch_form"],[1,1,1,"","create_app"],[1,1,1,"","move_body"],[1,1,1,"","move_form"]],client:[[1,0,0,"-","api"]],models:[[1,0,0,"-","auth"],[1,0,0,"-","cache"],[1,0,0,"-","delta"],[1,0,0,"-","journal"],[1,0,0,"-","logger"],[1,0,0,"-","preview"],[1,0,0,"-","replication"],[1,0,0,"-","retention"],[1,0,0,"-","tracing"]]},objnames:{"0":["py","module","Python module"],"1":["py","function","Python function"],"2":["py","exception","Python exception"],"3":["py","class","Python class"],"4":["py","method","Python method"],"5":["py","attribute","Python attribute"],"6":["py","property","Python property"]},objtypes:{"0":"py:module","1":"py:function","2":"py:exception","3":"py:class","4":"py:method","5":"py:attribute","6":"py:property"},terms:{"0":1,"05":1,"1":[0,1],"10":0,"100":1,"1000":0,"1048576":1,"1073741824":0,"10737418240":0,"10gb":0,"128":1,"16":0,"16777216":1,"1914":[0,1],"1918":0,"1gb":0,"1kb":0,"1mb":0,"1xx":1,"2":1,"200":1,"204":1,"3":1,"30":1,"304":1,"3339":1,"4":[0,1],"400":1,"401":1,"403":1,"404":1,"413":1,"415":1,"416":1,"4194304":1,"4318":[0,1],"5":1,"500":1,"501":1,"503":1,"507":1,"512":1,"60":1,"64":[0,1],"65536":1,"67108864":1,"8":0,"8388608":1,"86400":0,"900":1,"boolean":1,"break":1,"byte":[0,1],"catch":0,"default":[0,1],"do":1,"export":[0,1],"float":1,"function":1,"import":[0,1],"int":1,"long":1,"new":[0,1],"null":1,"return":[0,1],"short":1,"static":1,"true":[0,1],"var":[0,1],"while":[0,1],A:1,At:1,If:[0,1],No:1,Not:1,On:1,The:[0,1],With:0,_:0,abc:1,abl:1,abort:1,abov:1,absolut:[0,1],accept:[0,1],accept_encod:1,access:[0,1],acknowledg:1,across:[0,1],ad:1,add:1,addit:1,adler32:1,advanc:1,after:[0,1],ag:1,again:[0,1],against:[0,1],aggreg:1,aliv:0,all:[0,1],allow:1,allowedextens:1,along:[0,1],alreadi:1,alwai:[0,1],an:[0,1],ani:[0,1],anoth:1,anyth:0,anywai:1,apikei:0,apikeyauth:1,apikeyfilt:1,app:0,append:[0,1],appli:1,applic:[0,1],apply_delta:1,ar:[0,1],arg:1,argument:1,arriv:1,asgi:1,assetstor:1,async:1,asyncqueuehandl:1,atim:1,atom:[0,1],attach:1,attempt:1,attribut:1,auth:0,auth_apikei:[0,1],auth_mod:[0,1],auth_serv:[0,1],authent:0,avail:[0,1],awai:1,await:1,back:1,background:[0,1],backoff:[0,1],backup:0,base:1,basemodel:1,basic:[0,1],basicauth:1,batch:[0,1],batch_bodi:1,batch_form:1,batch_siz:1,batchhandl:1,batchpaus:1,batchsiz:1,bearer:[0,1],becom:1,been:1,befor:[0,1],begin:[0,1],behind:1,being:1,below:[0,1],benchmark:1,best:1,between:[0,1],beyond:[0,1],binari:1,binaryio:1,bit:1,blake2b:1,block:[0,1],block_siz:1,block_size_for:1,blocksiz:1,blurb:1,bodi:[0,1],bodyreject:1,bool:1,both:1,bound:1,boundari:1,brotli:1,browser:[0,1],budget:[0,1],buffer:1,build:1,built:1,calcul:1,call:1,callabl:1,caller:1,can:[0,1],cancel:1,cannot:1,carri:[0,1],caught:1,chang:[0,1],check:[0,1],check_quota:1,checkpoint:[0,1],checkpoint_byt:1,checksum:[0,1],children:1,chosen:0,chunk:1,classmethod:1,clean:[0,1],client_addr:1,clienterror:1,close:[0,1],code:1,cold:0,collaps:[0,1],collect:1,collector:[0,1],comma:[0,1],commit:[0,1],compact:1,compact_byt:1,compar:[0,1],compat:1,complet:[0,1],compress:1,comput:1,concurr:[0,1],config:1,configur:1,connect:[0,1],connectionpool:1,consecut:1,constant:1,consum:1,contain:1,content:1,contentcach:1,continu:1,convent:0,convert:1,cooki:[0,1],copi:[0,1],copyright:1,coroutin:1,corrupt:1,cost:1,count:1,cpu:0,crash:1,creat:1,create_app:[0,1],creation:[0,1],credenti:[0,1],current:1,current_trac:1,cursor:[0,1],cursor_path:1,dai:[0,1],data:[0,1],datastructur:1,date:1,datefmt:1,decod:1,decor:1,delai:1,delet:[0,1],delete_fil:1,delimit:1,depend:[0,1],describ:1,descript:1,descriptor:1,destin:1,detail:1,dict:1,dictconfig:1,dictionari:1,did:1,digest:1,dir:0,directli:0,directori:[0,1],disabl:0,discard:1,disk:[0,1],disposit:1,doc:[0,1],doc_gener:1,docstr:0,doe:1,doesn:1,don:1,done:1,dot:1,doubl:1,down:0,download:1,download_cache_byt:0,download_cache_entry_byt:0,download_cache_stat_ttl:0,download_fil:[0,1],download_tre:1,downloadhandl:1,downsiz:1,drive:0,drop:1,dur:1,durat:1,dure:[0,1],each:[0,1],ed:1,eg:[0,1],either:1,elaps:1,elect:1,ellipsi:1,empti:1,enabl:[0,1],enclos:1,encod:1,end:1,endpoint:[0,1],endpointfilt:1,enforc:1,engin:1,enqueu:0,ensur:0,enter:1,entri:[0,1],env:[0,1],equival:1,error:1,escap:1,escape_nam:1,etag:1,even:1,event:1,everi:[0,1],evict:[0,1],eviction_mod:1,exampl:[0,1],exce:1,except:1,exchang:1,exclus:1,execut:1,execute_batch_delet:1,execute_batch_mov:1,execute_batch_stat:1,execute_download_fil:1,execute_list_directori:1,execute_preview:1,execute_sync_patch:1,execute_sync_signatur:1,execute_upload_fil:1,executor:0,exist:[0,1],exit:1,expect:1,expir:[0,1],expiri:[0,1],exponenti:1,express:[0,1],extens:0,factori:[0,1],fail:[0,1],failur:[0,1],fall:1,fals:1,far:1,fastapi:[0,1],feed:1,few:0,field:[0,1],file_digest:1,file_nam:1,filechang:1,filehandlercli:[0,1],filenam:1,filenamepattern:1,fileno:1,filepath:1,filerespons:1,finish:1,first:[0,1],flag:[0,1],flake8:0,flamegraph:1,flush:1,fmt:1,fold:[0,1],follow:1,forc:1,forget:1,form:[0,1],form_data:1,format:[0,1],formatt:1,fraction:[0,1],free:0,fresh:0,from:[0,1],full:0,full_path:1,func:1,further:0,gb:0,gener:[0,1],get:[0,1],getlogg:1,getmessag:1,github:0,given:1,glob:1,gone:1,googl:0,grow:1,gzip:1,ha:1,hand:1,handl:1,handler:1,handshak:1,hash:1,have:1,head:[0,1],header:[0,1],heap:1,height:1,held:1,hex:1,hidden:0,high:1,hit:[0,1],hmac:1,hold:1,hook:0,hot:1,html:1,http:[0,1],http_version:1,httpbasic:1,httpbasiccredenti:1,httpconnect:1,httpexcept:1,httprespons:1,httpx:0,id:[0,1],ident:1,identifi:1,idl:1,if_none_match:1,if_rang:1,ignor:1,imag:[0,1],immut:1,importtim:0,includ:1,increment:1,index:1,inform:1,initi:1,initialis:1,input:1,instal:[0,1],instanc:1,instanti:1,instead:[0,1],instruct:[0,1],interpret:0,interrupt:[0,1],interv:1,invalid:1,invest:1,io:0,iso8601:1,isort:0,issu:[0,1],item:1,iter:1,its:[0,1],journal_checkpoint_byt:[0,1],journal_compact_byt:0,jpeg:1,jpg:0,jprq:0,json:[0,1],jsonformatt:1,jsonrespons:1,just:1,kb:0,keep:[0,1],kei:1,kept:[0,1],keyword:1,kind:1,kwarg:1,lag:[0,1],land:1,landing_url:1,larg:[0,1],larger:[0,1],last:[0,1],last_seq:1,latenc:0,lazili:1,least:1,ledger:[0,1],left:1,length:1,let:1,librari:1,licens:1,like:1,line:[0,1],lint:1,list:[0,1],list_directori:1,listen:1,listhandl:1,liter:1,live:1,load:[0,1],load_test:0,local:[0,1],local_dir:1,local_path:[0,1],localhost:[0,1],localtunnel:0,lock:[0,1],log_format:1,log_json:[0,1],log_sample_r:[0,1],logconfig:1,logger:1,logger_nam:1,loggerlisten:1,login:1,logout:1,logrecord:1,longer:[0,1],longest:1,look:1,lookup:1,loop:1,lost:1,lru:[0,1],m:0,made:1,mai:1,maintain:1,manag:[0,1],mani:1,mark:1,match:[0,1],max_backoff:1,max_byt:1,max_entry_byt:1,maxbyt:[0,1],maxfields:1,maxfil:1,maxfilenamelength:1,maxheaders:1,maximum:[0,1],maxpart:1,maxparts:1,maxtotals:1,mb:0,meantim:1,measur:0,media:1,media_typ:1,member:1,memori:[0,1],messag:1,method:[0,1],metric:[0,1],middlewar:1,millisecond:1,minimum:1,miss:1,mit:0,mode:[0,1],model:0,modifi:[0,1],modul:1,more:[0,1],most:1,move:[0,1],move_bodi:1,move_fil:1,move_form:1,movehandl:1,mtime:1,multifileuploadhandl:1,multipart:[0,1],multipartscann:1,multipl:[0,1],must:[0,1],mutablemap:1,n:[0,1],name:[0,1],need:1,negoti:1,neither:1,never:[0,1],newer:1,next:[0,1],ngrok:0,node:[0,1],none:1,nonetyp:1,nor:1,noreturn:1,noth:[0,1],now:1,number:[0,1],o:0,oauth2:1,oauth2passwordbear:1,oauth2passwordrequestform:1,object:1,off:1,offset:1,often:0,old:1,older:1,oldest:1,omit:1,onc:[0,1],one:[0,1],ones:[0,1],onli:[0,1],op:1,open:1,opentelemetri:[0,1],option:1,order:1,origin:1,os:1,otel_exporter_otlp_endpoint:[0,1],other:[0,1],otherwis:1,otlp:[0,1],otlpexport:1,out:[0,1],output:[0,1],outsid:1,over:[0,1],overwrit:1,overwritten:1,own:[0,1],owner:1,p50:0,p99:0,packag:1,page:[0,1],parallel:[0,1],paramet:1,parent:1,parent_id:1,pars:[0,1],part:[0,1],partial:[0,1],pass:1,password:[0,1],patch:[0,1],path:[0,1],pattern:1,payload:1,pdf:[0,1],peak:0,peer:[0,1],pend:[0,1],pep:0,per:[0,1],percent:1,perf_counter_n:1,perman:1,persist:1,photo:[0,1],pick:1,pid:[0,1],pillow:[0,1],pip:0,pixel:1,pl:1,place:[0,1],plain:[0,1],polici:1,poll_interv:1,pool:[0,1],pop:1,port:0,posit:1,post:1,power:1,pre:0,precommit:0,precompress:1,prefix:1,prepar:1,present:1,preserv:1,preview_text_byt:0,preview_work:0,previewhandl:1,previewstor:1,previou:[0,1],primari:0,pro:1,process:[0,1],profil:[0,1],profile_interval_m:[0,1],profile_output:[0,1],progress:[0,1],prompt:[0,1],properti:1,prune:1,put:1,py:[0,1],pydant:1,pytest:0,python:0,queri:1,queu:1,queue:1,queuehandl:1,queuelisten:1,quot:1,quota:[0,1],r:0,rais:1,random:[0,1],randomli:[0,1],rang:[0,1],range_head:1,rao:0,rate:1,ratio:[0,1],raw:1,read:0,read_sess:1,readi:1,real:[0,1],reason:1,rebuild:[0,1],rebuilt:1,receiv:1,recent:1,recommonmark:0,record:[0,1],recov:[0,1],redirect:1,redirectrespons:1,refer:1,referenc:1,regardless:1,region:1,regist:1,regress:0,regular:[0,1],reject:[0,1],rel:1,remot:[0,1],remote_dir:[0,1],remote_root:1,remov:[0,1],renam:[0,1],render:1,render_snippet:1,render_thumbnail:1,reopen:1,repair:1,repair_log:1,replac:[0,1],replai:1,replication_apikei:0,replication_auth:0,replication_batch_s:0,replication_p:[0,1],replication_password:0,replication_remote_root:[0,1],replication_secret:[0,1],replication_us:0,replicationmiddlewar:1,report:[0,1],repositori:[0,1],repres:1,request:[0,1],request_json:1,request_path:1,requir:[0,1],reset:1,resolv:1,resourc:1,respond:1,respons:[0,1],rest:[0,1],restart:[0,1],restor:[0,1],result:[0,1],resum:[0,1],retention_polici:[0,1],retentionengin:1,retentionpolici:1,retri:[0,1],retryabl:1,reus:[0,1],revalid:1,revok:1,rewrot:1,rfc:1,right:1,roll:[0,1],root:1,rotat:1,rss:0,run:[0,1],run_al:1,runbook:1,runtimeerror:1,s:0,safe:[0,1],same:[0,1],sampl:[0,1],sample_r:1,sampled_logg:1,samplingfilt:1,samplingprofil:1,save:[0,1],scan:[0,1],scanner:1,scenario:0,scope:1,search:1,second:[0,1],secret:0,secur:1,segment:[0,1],segment_s:1,self:1,send:1,sent:[0,1],separ:[0,1],sequenc:1,serv:[0,1],server:0,server_tim:1,serverauth:1,servic:1,service_nam:1,session:0,session_secret:[0,1],session_token:1,sessionstor:1,set:[0,1],sha256:[0,1],share:[0,1],ship:[0,1],shipper:1,should:1,shutdown:[0,1],sig:1,sign:[0,1],signatur:[0,1],signer:1,simpl:1,sinc:1,singl:[0,1],sivanandha:0,size:[0,1],skip:1,slowest:0,small:[0,1],snapshot:1,snippet:1,so:[0,1],socket:1,someth:1,sourc:1,source_dir:1,span:1,span_id:1,spawn:[0,1],special:1,specifi:1,speedscop:1,spent:0,sphinx:0,spin:0,split:0,squar:1,srv:[0,1],stack:[0,1],stage:[0,1],stai:1,stale:1,standard:1,starlett:1,start:[0,1],start_log:1,start_part:1,start_trac:1,startup:[0,1],stat:[0,1],stat_result:1,stat_ttl:1,state:1,statist:1,statu:1,status_cod:1,still:1,stop:[0,1],stop_log:1,stop_trac:1,storag:1,store:[0,1],str:1,stream:[0,1],streamingrespons:1,string:1,strong:[0,1],strong_checksum:1,structur:1,style:[0,1],subsequ:1,succe:1,success:1,successfulli:1,supervis:1,surviv:1,sweep:1,sweep_interv:1,sweeper:1,sweepinterv:1,swept:1,sync_fil:1,synchandl:1,t:1,tail:[0,1],take:[0,1],tar:0,target:[0,1],task:[0,1],tcp:1,templat:1,temporari:1,termin:[0,1],test:1,text:[0,1],than:[0,1],thei:1,them:[0,1],therefor:1,thevickypedia:0,thi:[0,1],thread:[0,1],thread_id:1,three:0,through:1,throughput:0,thu:1,thumbnail:[0,1],time:[0,1],timeout:1,timestamp:1,tip:1,tl:1,tmp:0,to_otlp:1,togeth:1,token:[0,1],token_ttl:[0,1],too:1,total:1,touch:1,trace_sample_r:[0,1],tracingmiddlewar:1,track:1,transfer:1,transfer_id:1,transferjourn:1,treat:1,tree:1,tri:1,truncat:1,trust:1,ttl:[0,1],tupl:1,twice:1,two:1,txt:0,type:1,unauthor:1,unavail:1,unchang:1,under:[0,1],unformat:1,union:1,uniqu:1,unknown:1,unless:1,unlik:1,unset:1,until:[0,1],up:[0,1],updat:[0,1],upgrad:0,upload_:1,upload_allowed_extens:[0,1],upload_fil:1,upload_filename_pattern:0,upload_max_field_s:0,upload_max_part:0,upload_max_part_s:0,upload_max_total_s:0,upload_tre:1,uploadfil:1,uploadhandl:1,uploadlimit:1,uploadlimitmiddlewar:1,uploadreject:1,url:[0,1],us:[0,1],usabl:1,usag:1,usageledg:1,user:[0,1],usernam:[0,1],usual:1,uuid:[0,1],uvicorn:[0,1],valid:1,valid_credenti:1,valid_evict:1,validationerror:1,valu:1,valueerror:1,variant:1,verifi:[0,1],version:1,vignesh:0,violat:1,volum:1,wa:[0,1],wait:1,wake:1,walk:[0,1],want:1,warn:[0,1],web_concurr:0,were:[0,1],what:0,when:[0,1],whenev:1,where:[0,1],whether:1,which:[0,1],who:1,whole:1,whose:1,width:1,win:1,within:1,without:[0,1],worker:[0,1],worth:1,would:1,wrap:1,write:[0,1],write_delta:[0,1],written:[0,1],x:[0,1],yet:1,yield:1,you:1,your:1,zlib:1},titles:["API File Handler","Welcome to FileHandler API\u2019s documentation!"],titleterms:{"class":1,api:[0,1],apikei:1,app:1,asset:1,auth:1,authent:1,benchmark:0,cach:[0,1],client:[0,1],code:0,copyright:0,custom:1,delta:[0,1],document:1,download:0,executor:1,file:[0,1],filehandl:1,filter:1,handler:0,indic:1,journal:[0,1],licens:0,limit:[0,1],lint:0,log:[0,1],me:1,model:1,multi:1,pipelin:1,preview:[0,1],pro:0,read:1,replic:[0,1],retent:[0,1],runbook:0,s:1,secret:1,server:1,session:1,standard:0,sync:[0,1],tabl:1,test:0,tip:0,trace:[0,1],transfer:0,upload:[0,1],usag:0,welcom:1}})
\ No newline at end of file
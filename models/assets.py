@@ -0,0 +1,125 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+from typing import Optional
+
+from fastapi import status
+from fastapi.exceptions import HTTPException
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# The assets are served behind the authentication, so only the browser may cache them and not a shared proxy
+IMMUTABLE_HEADERS = {
+    "Cache-Control": "private, max-age=31536000, immutable",
+    "Vary": "Accept-Encoding"
+}
+
+
+class Asset(BaseModel):
+    """BaseModel that holds a static file along with its precompressed variants.
+
+    >>> Asset
+
+    """
+
+    name: str
+    media_type: str
+    digest: str
+    content: bytes
+    gzip: bytes
+    brotli: Optional[bytes]
+
+
+class AssetStore:
+    """Serves the files in a source directory under content-hashed names with long-lived cache headers.
+
+    >>> AssetStore
+
+    See Also:
+        - Every file is read, hashed and compressed once when the store is instantiated.
+        - A file named ``upload.html`` is served as ``upload.<digest>.html``, so any change to its content changes the
+          url and the response can be cached as ``immutable`` by the client.
+    """
+
+    def __init__(self, source_dir: str, prefix: str = "/static"):
+        """Loads all the files in the source directory.
+
+        Args:
+            source_dir: Directory where the static files are stored.
+            prefix: Url prefix under which the assets are served.
+        """
+        self.prefix = prefix
+        self.assets: dict[str, Asset] = {}
+        self.names: dict[str, str] = {}
+        for file_name in sorted(os.listdir(source_dir)):
+            file_path = os.path.join(source_dir, file_name)
+            if file_name.startswith(".") or not os.path.isfile(file_path):
+                continue
+            with open(file_path, "rb") as f_stream:
+                content = f_stream.read()
+            digest = hashlib.sha256(content).hexdigest()[:12]
+            stem, extension = os.path.splitext(file_name)
+            asset = Asset(
+                name=f"{stem}.{digest}{extension}",
+                media_type=mimetypes.guess_type(file_name)[0] or "application/octet-stream",
+                digest=digest,
+                content=content,
+                gzip=gzip.compress(content, compresslevel=9, mtime=0),
+                brotli=brotli.compress(content, quality=11) if brotli else None
+            )
+            self.assets[asset.name] = asset
+            self.names[file_name] = asset.name
+
+    def url(self, file_name: str) -> str:
+        """Gets the content-hashed url for a file in the source directory.
+
+        Args:
+            file_name: Original name of the file.
+
+        Returns:
+            str:
+            Url path of the hashed asset.
+        """
+        return f"{self.prefix}/{self.names[file_name]}"
+
+    def response(self, name: str, accept_encoding: Optional[str] = None,
+                 if_none_match: Optional[str] = None) -> Response:
+        """Creates the response for a hashed asset, negotiating the best precompressed variant.
+
+        Args:
+            name: Content-hashed name of the asset.
+            accept_encoding: Value of the ``Accept-Encoding`` header sent by the client.
+            if_none_match: Value of the ``If-None-Match`` header sent by the client.
+
+        Returns:
+            Response:
+            Asset content, or an empty ``304`` response if the client already has the same version.
+
+        Raises:
+            HTTPExceptions:
+            - 404: If the asset doesn't exist.
+        """
+        if not (asset := self.assets.get(name)):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=status.HTTP_404_NOT_FOUND)
+        encodings = {token.split(";")[0].strip() for token in (accept_encoding or "").split(",")
+                     if not token.replace(" ", "").endswith(";q=0")}
+        if asset.brotli is not None and "br" in encodings:
+            encoding, content = "br", asset.brotli
+        elif "gzip" in encodings:
+            encoding, content = "gzip", asset.gzip
+        else:
+            encoding, content = None, asset.content
+        etag = f'"{asset.digest}-{encoding}"' if encoding else f'"{asset.digest}"'
+        headers = {**IMMUTABLE_HEADERS, "ETag": etag}
+        if if_none_match and (if_none_match.strip() == "*" or etag in
+                              [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(content=content, media_type=asset.media_type, headers=headers)
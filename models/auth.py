@@ -0,0 +1,322 @@
+import base64
+import hmac
+import logging
+import os
+import uuid
+from typing import Optional
+
+from fastapi import (Cookie, Depends, FastAPI, Form, HTTPException, Response,
+                     Security, status)
+from fastapi.responses import JSONResponse, RedirectResponse
+from fastapi.security import (HTTPBasic, HTTPBasicCredentials,
+                              OAuth2PasswordBearer, OAuth2PasswordRequestForm)
+
+from models.secrets import Secrets
+from models.session import SessionStore
+from models.tracing import stage
+
+LOGGER = logging.getLogger("LOGGER")
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="authenticator")
+basic_scheme = HTTPBasic(realm="simple", auto_error=False)
+
+NO_CACHE_HEADERS = {
+    "Pragma": "no-cache",
+    "Expires": "0",
+    "Cache-Control": "no-cache, no-store, must-revalidate"
+}
+
+RESET_HEADERS = {
+    **NO_CACHE_HEADERS,
+    "WWW-Authenticate": "Basic",
+    "Clear-Site-Data": '"cache", "cookies", "storage", "executionContexts"'
+}
+
+
+def valid_credentials(username: Optional[str], password: Optional[str]) -> bool:
+    """Compares the credentials received against the stored secrets in constant time.
+
+    Args:
+        username: Username received from the client.
+        password: Password received from the client.
+
+    Returns:
+        bool:
+        True if both username and password match.
+    """
+    if not (username and password):
+        return False
+    username = hmac.compare_digest(username.encode(), Secrets.USERNAME.encode())
+    password = hmac.compare_digest(password.encode(), Secrets.PASSWORD.encode())
+    return username and password
+
+
+def unauthorized(detail: str) -> HTTPException:
+    """Creates a ``401`` that resets the browser's cached credentials and removes the session cookie.
+
+    Args:
+        detail: Reason sent to the client.
+
+    Returns:
+        HTTPException:
+        Exception to be raised by the endpoint.
+    """
+    response = Response()
+    response.delete_cookie(key=SessionStore.COOKIE_NAME)
+    return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=detail,
+                         headers={**RESET_HEADERS, "Set-Cookie": response.headers["set-cookie"]})
+
+
+class APIKeyAuth:
+    """Authenticates requests using an APIKey sent as a form field, stored as the env var ``APIKEY``.
+
+    >>> APIKeyAuth
+
+    See Also:
+        - Defaults to a randomly generated url safe UUID, which is logged during startup.
+        - Credentials are sent in a form body, so the endpoints that read data use ``POST`` instead of ``GET``.
+    """
+
+    form = True
+
+    def __init__(self):
+        """Loads the APIKey from the env var or generates one."""
+        self.apikey = os.environ.get("APIKEY") or \
+            base64.urlsafe_b64encode(uuid.uuid1().bytes).rstrip(b"=").decode("ascii")
+
+    def startup(self) -> None:
+        """Logs the APIKey."""
+        LOGGER.info(f"Authentication Bearer: {self.apikey}")
+
+    def register(self, app: FastAPI) -> None:
+        """No additional endpoints are required to authenticate with an APIKey."""
+
+    async def authenticate(self, apikey: str = Form(...)) -> str:
+        """Authenticates the APIKey.
+
+        Args:
+            apikey: Takes the APIKey entered by the user as an argument.
+
+        Returns:
+            str:
+            APIKey, which identifies the owner of the uploads.
+
+        Raises:
+            HTTPExceptions:
+            - 401: If authentication fails.
+        """
+        with stage("auth"):
+            if not hmac.compare_digest(apikey.encode(), self.apikey.encode()):
+                LOGGER.error(f"Authentication Failed: {apikey}")
+                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=status.HTTP_401_UNAUTHORIZED)
+        LOGGER.info("Authentication Success")
+        return apikey
+
+
+class ServerAuth:
+    """Authenticates requests using bearer tokens issued for the server's ``USER`` and ``PASSWORD``.
+
+    >>> ServerAuth
+
+    See Also:
+        Tokens are signed with ``SESSION_SECRET`` and expire after ``TOKEN_TTL`` seconds (defaults to a day), so every
+        worker accepts them and they survive a restart.
+    """
+
+    form = False
+
+    def __init__(self):
+        """Instantiates the signer for the issued tokens."""
+        self.tokens = SessionStore(ttl=int(os.environ.get("TOKEN_TTL", 86_400)))
+
+    def startup(self) -> None:
+        """Resolves the credentials before the server starts accepting requests, prompting for them if required."""
+        if Secrets.USERNAME and Secrets.PASSWORD:
+            LOGGER.info(f"Authentication enabled for: {Secrets.USERNAME}")
+        self.tokens.startup()
+
+    def register(self, app: FastAPI) -> None:
+        """Adds the endpoint that issues the tokens.
+
+        Args:
+            app: FastAPI app.
+        """
+        app.add_api_route("/authenticator/", self.authenticator, methods=["POST"], include_in_schema=False)
+
+    async def authenticator(self, form_data: OAuth2PasswordRequestForm = Depends()) -> dict:
+        """Authenticates the user entered information.
+
+        Args:
+            form_data: Takes the user input as an argument.
+
+        Returns:
+            dict:
+            A dictionary of access token.
+
+        Raises:
+            HTTPExceptions:
+            - 401: If user is unauthorized.
+        """
+        if valid_credentials(username=form_data.username, password=form_data.password):
+            LOGGER.info("Authentication Successful")
+            return {"access_token": self.tokens.create(username=form_data.username), "token_type": "bearer"}
+        LOGGER.error("Authentication failed")
+        LOGGER.error(f"Username: {form_data.username}")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=status.HTTP_401_UNAUTHORIZED)
+
+    async def authenticate(self, token: str = Depends(oauth2_scheme)) -> str:
+        """Authenticates the bearer token.
+
+        Args:
+            token: Access token issued by ``/authenticator``
+
+        Returns:
+            str:
+            Username the token was issued to.
+
+        Raises:
+            HTTPExceptions:
+            - 401: If the token is invalid or expired.
+        """
+        with stage("auth"):
+            if not (session := self.tokens.get(token=token)):
+                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=status.HTTP_401_UNAUTHORIZED,
+                                    headers={"WWW-Authenticate": "Bearer"})
+        return session.username
+
+
+class BasicAuth:
+    """Authenticates browser sessions using a signed cookie, falling back to http basic auth for other clients.
+
+    >>> BasicAuth
+
+    See Also:
+        - Credentials are verified only once per session, subsequent requests are authenticated using the cookie.
+        - An expired or unknown session cookie is removed along with the browser's cached credentials, so the user
+          has to log in again.
+    """
+
+    form = False
+
+    def __init__(self, landing_url: str = "/docs"):
+        """Instantiates the session store.
+
+        Args:
+            landing_url: Url where the user is redirected after login.
+        """
+        self.sessions = SessionStore()
+        self.landing_url = landing_url
+
+    def startup(self) -> None:
+        """Resolves the credentials before the server starts accepting requests, prompting for them if required."""
+        if Secrets.USERNAME and Secrets.PASSWORD:
+            LOGGER.info(f"Authentication enabled for: {Secrets.USERNAME}")
+        self.sessions.startup()
+
+    def register(self, app: FastAPI) -> None:
+        """Adds the endpoints to log in, log out and read the session.
+
+        Args:
+            app: FastAPI app.
+        """
+        app.add_api_route("/login/", self.login, methods=["GET"], response_class=RedirectResponse)
+        app.add_api_route("/logout/", self.logout, methods=["GET"])
+        app.add_api_route("/session/", self.read_session, methods=["GET"])
+
+    async def authenticate(self, session_token: Optional[str] = Cookie(None),
+                           credentials: Optional[HTTPBasicCredentials] = Security(basic_scheme)) -> str:
+        """Authenticates a request using the cached session, falling back to http basic auth.
+
+        Args:
+            session_token: Signed session cookie.
+            credentials: HTTPBasicCredentials for authentication.
+
+        Returns:
+            str:
+            Username of the session.
+
+        Raises:
+            HTTPExceptions:
+            - 401: If there is neither a valid session nor valid credentials.
+        """
+        with stage("auth"):
+            if session := self.sessions.get(token=session_token):
+                return session.username
+            if credentials and valid_credentials(username=credentials.username, password=credentials.password):
+                return credentials.username
+        raise unauthorized(detail="Login required.")
+
+    async def read_session(self, session_token: Optional[str] = Cookie(None),
+                           credentials: Optional[HTTPBasicCredentials] = Security(basic_scheme)) -> JSONResponse:
+        """Reads the current session.
+
+        Args:
+            session_token: Signed session cookie.
+            credentials: HTTPBasicCredentials for authentication.
+
+        Returns:
+            JSONResponse:
+            Returns the user and the expiry of the session as a json blurb.
+        """
+        if session := self.sessions.get(token=session_token):
+            content = {"username": session.username, "expiry": session.expiry}
+        else:
+            content = {"username": await self.authenticate(session_token=None, credentials=credentials), "expiry": 0}
+        return JSONResponse(content=content, status_code=200, headers=NO_CACHE_HEADERS)
+
+    async def logout(self, response: Response, session_token: Optional[str] = Cookie(None)) -> bool:
+        """Removes the current session and its cookie.
+
+        Args:
+            response: Takes the url response as an argument.
+            session_token: Signed session cookie.
+
+        Returns:
+            bool:
+            A simple boolean flag.
+        """
+        self.sessions.delete(token=session_token)
+        response.delete_cookie(key=SessionStore.COOKIE_NAME)
+        return True
+
+    async def login(self, session_token: Optional[str] = Cookie(None),
+                    credentials: Optional[HTTPBasicCredentials] = Security(basic_scheme)) -> RedirectResponse:
+        """Login request handler.
+
+        Args:
+            session_token: Signed session cookie.
+            credentials: HTTPBasicCredentials for authentication.
+
+        Returns:
+            RedirectResponse:
+            Redirects to the landing page.
+        """
+        if self.sessions.get(token=session_token):
+            return RedirectResponse(url=self.landing_url, status_code=status.HTTP_303_SEE_OTHER,
+                                    headers=NO_CACHE_HEADERS)
+
+        # Credentials are checked before the cookie, so a cookie that went stale after a restart never locks anyone out
+        if credentials and valid_credentials(username=credentials.username, password=credentials.password):
+            response = RedirectResponse(url=self.landing_url, status_code=status.HTTP_303_SEE_OTHER,
+                                        headers=NO_CACHE_HEADERS)
+            response.set_cookie(
+                key=SessionStore.COOKIE_NAME,
+                value=self.sessions.create(username=credentials.username),
+                max_age=self.sessions.ttl,
+                httponly=True,
+                samesite="strict"
+            )
+            return response
+
+        if credentials and (credentials.username or credentials.password):
+            raise unauthorized(detail="Incorrect username or password")
+        if session_token:
+            raise unauthorized(detail="Session expired. Username and password are required to proceed.")
+        raise unauthorized(detail="Username and password are required to proceed.")
+
+
+AUTH_MODES = {
+    "apikey": APIKeyAuth,
+    "server": ServerAuth,
+    "basic": BasicAuth,
+}
@@ -0,0 +1,174 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from stat import S_ISREG
+from typing import Optional
+
+
+class ContentCache:
+    """LRU cache for the content of small files, bound by a byte budget.
+
+    >>> ContentCache
+
+    See Also:
+        - Entries are keyed on the path, and are valid only while the modified time and size of the file are unchanged.
+        - Stat results are cached for ``stat_ttl`` seconds, so a hot file costs one ``os.stat`` per interval. A cached
+          stat is only trusted along with the content cached for it, since another worker may have written the file.
+        - Files larger than ``max_entry_bytes`` are never cached.
+        - Every path that writes, moves or deletes a file, including the retention sweep, calls ``invalidate``.
+    """
+
+    def __init__(self, max_bytes: int = int(os.environ.get("DOWNLOAD_CACHE_BYTES", 64 * 1024 * 1024)),
+                 max_entry_bytes: int = int(os.environ.get("DOWNLOAD_CACHE_ENTRY_BYTES", 1024 * 1024)),
+                 stat_ttl: float = float(os.environ.get("DOWNLOAD_CACHE_STAT_TTL", 1.0))):
+        """Instantiates an empty cache.
+
+        Args:
+            max_bytes: Maximum bytes of file content held in memory.
+            max_entry_bytes: Maximum size of a single file to be cached.
+            stat_ttl: Seconds for which a stat result is reused before it is revalidated.
+        """
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.stat_ttl = stat_ttl
+        self.entries: OrderedDict[str, tuple[tuple[int, int], bytes]] = OrderedDict()
+        self.stats: dict[str, tuple[float, Optional[os.stat_result]]] = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stat(self, path: str) -> Optional[os.stat_result]:
+        """Gets the stat of a regular file, reusing a recent result.
+
+        Args:
+            path: Path of the file.
+
+        Returns:
+            os.stat_result:
+            Stat result of the file, or ``None`` if the path is not a regular file.
+        """
+        path = os.path.abspath(path)
+        now = time.monotonic()
+        if (cached := self.stats.get(path)) and cached[0] > now:
+            return cached[1]
+        try:
+            stat_result = os.stat(path)
+            if not S_ISREG(stat_result.st_mode):
+                stat_result = None
+        except OSError:
+            stat_result = None
+        if len(self.stats) > 4 * max(len(self.entries), 1024):
+            self.stats = {key: value for key, value in self.stats.items() if value[0] > now}
+        self.stats[path] = (now + self.stat_ttl, stat_result)
+        return stat_result
+
+    @staticmethod
+    def _read(path: str) -> bytes:
+        """Reads the content of a file, runs in a thread."""
+        with open(path, "rb") as f_stream:
+            return f_stream.read()
+
+    def lookup(self, path: str, stat_result: os.stat_result) -> Optional[bytes]:
+        """Gets the content of a file from memory, without reading the file.
+
+        Args:
+            path: Path of the file.
+            stat_result: Stat result of the file from ``stat``
+
+        Returns:
+            bytes:
+            Content of the version of the file in ``stat_result``, or ``None`` if it is not cached.
+        """
+        if stat_result.st_size > self.max_entry_bytes:
+            return
+        path = os.path.abspath(path)
+        if (entry := self.entries.get(path)) and entry[0] == (stat_result.st_mtime_ns, stat_result.st_size):
+            self.entries.move_to_end(path)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+
+    def store(self, path: str, stat_result: os.stat_result, content: bytes) -> None:
+        """Caches the content of a file, evicting the least recently used files beyond the byte budget.
+
+        Args:
+            path: Path of the file.
+            stat_result: Stat result of the file that the content was read from.
+            content: Content of the file.
+        """
+        # The file was written while it was being read, so the content is served but not cached
+        if len(content) != stat_result.st_size or len(content) > self.max_entry_bytes:
+            return
+        path = os.path.abspath(path)
+        self._discard(path=path)
+        self.entries[path] = ((stat_result.st_mtime_ns, stat_result.st_size), content)
+        self.size += len(content)
+        while self.size > self.max_bytes and self.entries:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+            self.evictions += 1
+
+    async def get(self, path: str, stat_result: os.stat_result) -> Optional[bytes]:
+        """Gets the content of a file from memory, reading it in a thread and caching it on a miss.
+
+        Args:
+            path: Path of the file.
+            stat_result: Stat result of the file from ``stat``
+
+        Returns:
+            bytes:
+            Content of the file, or ``None`` if the file is too large to be cached.
+        """
+        if stat_result.st_size > self.max_entry_bytes:
+            return
+        if (content := self.lookup(path=path, stat_result=stat_result)) is not None:
+            return content
+        path = os.path.abspath(path)
+        validated = self.stats.get(path)
+        try:
+            content = await asyncio.to_thread(self._read, path)
+        except OSError:
+            self.invalidate(path=path)
+            return
+        # The file was written, moved or deleted while it was being read, so the content is served but not cached
+        if self.stats.get(path) is validated:
+            self.store(path=path, stat_result=stat_result, content=content)
+        return content
+
+    def _discard(self, path: str) -> None:
+        """Removes the content of a file from memory."""
+        if entry := self.entries.pop(path, None):
+            self.size -= len(entry[1])
+
+    def invalidate(self, path: str) -> None:
+        """Drops the cached stat and content of a file after it was written, moved or deleted.
+
+        Args:
+            path: Path of the file.
+        """
+        path = os.path.abspath(path)
+        self.stats.pop(path, None)
+        self._discard(path=path)
+
+    def metrics(self) -> dict:
+        """Gets the hit ratio, evictions and memory usage of the cache.
+
+        Returns:
+            dict:
+            Cache metrics.
+        """
+        requests = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / requests, 4) if requests else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+        }
+
+
+cache = ContentCache()
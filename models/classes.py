@@ -1,12 +1,9 @@
 import os
 from typing import Optional
 
-from pydantic import BaseModel
-from tortoise import fields
-from tortoise.models import Model
+from pydantic import BaseModel, Field
 
-if not os.path.isdir('uploads'):
-    os.makedirs('uploads')
+UPLOAD_ROOT = os.path.join(os.getcwd(), 'uploads')
 
 
 class DownloadHandler(BaseModel):
@@ -20,15 +17,35 @@ class DownloadHandler(BaseModel):
     FilePath: str = os.path.expanduser('~')
 
 
+class PreviewHandler(BaseModel):
+    """BaseModel that handles input data for the API which is treated as members for the class ``PreviewHandler``.
+
+    >>> PreviewHandler
+
+    See Also:
+        ``Width`` and ``Height`` bound the thumbnail of an image, ``Lines`` is the number of lines from the head and the
+        tail of a text file.
+    """
+
+    FileName: str
+    FilePath: str = UPLOAD_ROOT
+    Width: int = Field(256, ge=16, le=2048)
+    Height: int = Field(256, ge=16, le=2048)
+    Lines: int = Field(20, ge=1, le=500)
+
+
 class UploadHandler(BaseModel):
     """BaseModel that handles input data for the API which is treated as members for the class ``UploadHandler``.
 
     >>> UploadHandler
 
+    See Also:
+        ``Parents`` creates the ``FilePath`` along with its parents, if it is within the upload root.
     """
 
     FileName: Optional[str]
-    FilePath: str = os.path.join(os.getcwd(), 'uploads')
+    FilePath: str = UPLOAD_ROOT
+    Parents: bool = False
 
 
 class MultiFileUploadHandler(BaseModel):
@@ -36,9 +53,12 @@ class MultiFileUploadHandler(BaseModel):
 
     >>> MultiFileUploadHandler
 
+    See Also:
+        ``Parents`` creates the ``FilePath`` along with its parents, if it is within the upload root.
     """
 
-    FilePath: str = os.path.join(os.getcwd(), 'uploads')
+    FilePath: str = UPLOAD_ROOT
+    Parents: bool = False
 
 
 class ListHandler(BaseModel):
@@ -51,11 +71,47 @@ class ListHandler(BaseModel):
     FilePath: str
 
 
-class Bogus(Model):
-    """Model that handles input data for the API which is treated as members for the class ``Bogus``.
+class BatchHandler(BaseModel):
+    """BaseModel that handles input data for the API which is treated as members for the class ``BatchHandler``.
+
+    >>> BatchHandler
+
+    See Also:
+        - ``Paths`` are relative to the upload root, absolute paths are accepted only if they are within the root.
+        - ``Pattern`` is a glob pattern relative to the upload root, eg: ``logs/**/*.log``
+        - ``Digest`` adds the sha256 of each file to the stat results.
+    """
+
+    Paths: list[str] = []
+    Pattern: Optional[str]
+    Digest: bool = False
+
+
+class MoveHandler(BaseModel):
+    """BaseModel that handles input data for the API which is treated as members for the class ``MoveHandler``.
+
+    >>> MoveHandler
+
+    See Also:
+        Each source is moved to the destination at the same index, both relative to the upload root.
+    """
+
+    Sources: list[str]
+    Destinations: list[str]
+    Overwrite: bool = False
+
 
-    >>> Bogus
+class SyncHandler(BaseModel):
+    """BaseModel that handles input data for the API which is treated as members for the class ``SyncHandler``.
 
+    >>> SyncHandler
+
+    See Also:
+        - ``BlockSize`` is used only for signatures, and defaults to a size based on the file.
+        - ``Parents`` is used only for patches, to create the ``FilePath`` if it is within the upload root.
     """
 
-    authentication: str = fields.CharField(50)
+    FileName: str
+    FilePath: str = UPLOAD_ROOT
+    BlockSize: Optional[int]
+    Parents: bool = False
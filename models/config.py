@@ -1,18 +1,24 @@
+import os
+
 from pydantic import BaseModel
 
 
 class LogConfig(BaseModel):
-    """Custom log configuration that matches uvicorn log format.
+    """Custom log configuration that writes plain text logs, or structured JSON logs if ``LOG_JSON`` is set.
 
     >>> LogConfig
 
     See Also:
         - ``LOGGER_NAME`` should match the name passed to ``getLogger`` when this class is used for ``dictConfig``
-        - ``LOG_FORMAT`` is set to match the format of ``uvicorn.access`` logs.
+        - ``LOG_FORMAT`` is set to match the format of ``uvicorn.access`` logs, and is used unless ``LOG_JSON`` is set.
+        - ``SAMPLE_RATE`` keeps one in every ``n`` access log records below ``WARNING``, set using the env var
+          ``LOG_SAMPLE_RATE``
     """
 
     LOGGER_NAME = 'LOGGER'
     LOG_FORMAT = '%(levelname)s:\t  %(message)s'
+    LOG_JSON = os.environ.get('LOG_JSON', 'false').lower() in ('1', 'true', 'yes')
+    SAMPLE_RATE = int(os.environ.get('LOG_SAMPLE_RATE', 1))
 
     version = 1
     disable_existing_loggers = False
@@ -21,15 +27,24 @@ class LogConfig(BaseModel):
             "()": "uvicorn.logging.DefaultFormatter",
             "fmt": LOG_FORMAT,
             "datefmt": None,
+        },
+        "json": {
+            "()": "models.logger.JSONFormatter",
         }
     }
     handlers = {
         "default": {
-            "formatter": "default",
+            "formatter": "json" if LOG_JSON else "default",
             "class": "logging.StreamHandler",
             "stream": "ext://sys.stderr",
+        },
+        "access": {
+            "formatter": "json" if LOG_JSON else "default",
+            "class": "logging.StreamHandler",
+            "stream": "ext://sys.stdout",
         }
     }
     loggers = {
         LOGGER_NAME: {"handlers": ["default"], "level": "DEBUG"},
+        "uvicorn.access": {"handlers": ["access"], "level": "INFO", "propagate": False},
     }
@@ -0,0 +1,231 @@
+import hashlib
+import math
+import mmap
+import os
+import tempfile
+import zlib
+from collections.abc import Iterator
+from typing import BinaryIO, Optional
+
+MOD_ADLER = 65521
+MIN_BLOCK_SIZE = 4 * 1024
+MAX_BLOCK_SIZE = 1024 * 1024
+COPY_CHUNK = 1024 * 1024
+
+
+def block_size_for(size: int) -> int:
+    """Picks a block size close to the square root of the file size, as a power of two.
+
+    Args:
+        size: Size of the file in bytes.
+
+    Returns:
+        int:
+        Block size in bytes.
+    """
+    if size <= 0:
+        return MIN_BLOCK_SIZE
+    return max(MIN_BLOCK_SIZE, min(MAX_BLOCK_SIZE, pow(2, math.ceil(math.log2(math.sqrt(size))))))
+
+
+def strong_checksum(block: bytes) -> str:
+    """Calculates the strong checksum of a block.
+
+    Args:
+        block: Content of the block.
+
+    Returns:
+        str:
+        128-bit blake2b digest as hex.
+    """
+    return hashlib.blake2b(block, digest_size=16).hexdigest()
+
+
+def signature(path: str, block_size: Optional[int] = None) -> dict:
+    """Calculates the rolling and strong checksums for each block of a file.
+
+    Args:
+        path: Path of the file.
+        block_size: Size of each block, defaults to ``block_size_for`` the size of the file.
+
+    Returns:
+        dict:
+        Block size, file size and a list of ``[adler32, blake2b]`` per block.
+    """
+    size = os.path.getsize(path)
+    block_size = block_size or block_size_for(size)
+    blocks = []
+    with open(path, "rb") as f_stream:
+        while block := f_stream.read(block_size):
+            blocks.append([zlib.adler32(block), strong_checksum(block)])
+    return {"block_size": block_size, "size": size, "blocks": blocks}
+
+
+def delta(sig: dict, path: str) -> Iterator[tuple]:
+    """Compares a file against the signature of an older version and yields the instructions to rebuild it.
+
+    Args:
+        sig: Signature of the older version, as returned by ``signature``
+        path: Path of the newer version.
+
+    Yields:
+        tuple:
+        ``("copy", index, count)`` to reuse ``count`` blocks starting at ``index`` or ``("data", bytes)`` for literals.
+
+    See Also:
+        Blocks that did not move are matched with a single ``zlib.adler32`` call per block. The checksum is rolled one
+        byte at a time only through the regions that changed, until the blocks line up again.
+    """
+    block_size = sig["block_size"]
+    table: dict[int, list[tuple[str, int]]] = {}
+    for index, (weak, strong) in enumerate(sig["blocks"]):
+        table.setdefault(weak, []).append((strong, index))
+    last_index = len(sig["blocks"]) - 1
+    last_size = sig["size"] - last_index * block_size if sig["blocks"] else 0
+
+    size = os.path.getsize(path)
+    if not size:
+        return
+    with open(path, "rb") as f_stream, mmap.mmap(f_stream.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        pos = literal = 0
+        copy_start = copy_count = None
+        weak = None
+
+        def match(start: int, length: int, checksum: int) -> Optional[int]:
+            """Finds the index of a block with the same checksums."""
+            if not (candidates := table.get(checksum)):
+                return
+            strong = strong_checksum(view[start:start + length])
+            for candidate, index in candidates:
+                if candidate == strong and (length == block_size or index == last_index):
+                    return index
+
+        while pos < size:
+            length = min(block_size, size - pos)
+            if length < block_size and length != last_size:
+                break
+            if weak is None:
+                weak = zlib.adler32(view[pos:pos + length])
+            if (index := match(pos, length, weak)) is not None:
+                if literal < pos:
+                    if copy_count:
+                        yield "copy", copy_start, copy_count
+                        copy_count = None
+                    yield "data", view[literal:pos]
+                if copy_count and copy_start + copy_count == index:
+                    copy_count += 1
+                else:
+                    if copy_count:
+                        yield "copy", copy_start, copy_count
+                    copy_start, copy_count = index, 1
+                pos += length
+                literal = pos
+                weak = None
+                continue
+            if pos + length >= size:
+                break
+            outgoing, incoming = view[pos], view[pos + length]
+            a = ((weak & 0xffff) - outgoing + incoming) % MOD_ADLER
+            b = ((weak >> 16) - length * outgoing + a - 1) % MOD_ADLER
+            weak = (b << 16) | a
+            pos += 1
+            if pos - literal >= COPY_CHUNK:
+                if copy_count:
+                    yield "copy", copy_start, copy_count
+                    copy_count = None
+                yield "data", view[literal:pos]
+                literal = pos
+        if copy_count:
+            yield "copy", copy_start, copy_count
+        if literal < size:
+            yield "data", view[literal:size]
+
+
+def write_delta(sig: dict, path: str, data: BinaryIO) -> list[list]:
+    """Runs ``delta`` and writes the literal data to a stream, so it can be uploaded as a single file.
+
+    Args:
+        sig: Signature of the older version.
+        path: Path of the newer version.
+        data: Binary stream where the literal data is written.
+
+    Returns:
+        list:
+        Instructions ``["copy", index, count]`` and ``["data", length]`` that consume ``data`` in order.
+    """
+    instructions = []
+    for instruction in delta(sig=sig, path=path):
+        if instruction[0] == "copy":
+            instructions.append(list(instruction))
+        else:
+            data.write(instruction[1])
+            if instructions and instructions[-1][0] == "data":
+                instructions[-1][1] += len(instruction[1])
+            else:
+                instructions.append(["data", len(instruction[1])])
+    return instructions
+
+
+def apply_delta(base: Optional[str], target: str, block_size: int, instructions: list[list], data: BinaryIO,
+                checksum: Optional[str] = None, partial: Optional[str] = None) -> dict:
+    """Rebuilds a file from an older version and a delta, replacing the target atomically.
+
+    Args:
+        base: Path of the older version, ``None`` if there is no older version.
+        target: Path where the rebuilt file is stored.
+        block_size: Block size of the signature the delta was created against.
+        instructions: Instructions as returned by ``write_delta``
+        data: Binary stream with the literal data.
+        checksum: Expected sha256 of the rebuilt file.
+        partial: Path to rebuild the file at, which the caller moves into place. Defaults to a temporary file that
+            replaces the target.
+
+    Returns:
+        dict:
+        Size of the rebuilt file, along with the bytes reused from the older version and received as literals.
+
+    Raises:
+        ValueError:
+        If an instruction is invalid, the literal data is short, or the checksum does not match.
+    """
+    if partial:
+        file_descriptor, temp_path = os.open(partial, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644), partial
+    else:
+        directory, name = os.path.split(target)
+        file_descriptor, temp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".sync", dir=directory or ".")
+    sha256 = hashlib.sha256()
+    reused = received = 0
+    try:
+        with os.fdopen(file_descriptor, "wb") as output, open(base or os.devnull, "rb") as source:
+            base_size = os.path.getsize(base) if base else 0
+            for instruction in instructions:
+                if instruction[0] == "copy" and len(instruction) == 3:
+                    start, count = int(instruction[1]) * block_size, int(instruction[2]) * block_size
+                    if start < 0 or count <= 0 or start >= base_size:
+                        raise ValueError(f"Invalid copy instruction: {instruction}")
+                    source.seek(start)
+                    remaining, stream, counter = min(count, base_size - start), source, "reused"
+                elif instruction[0] == "data" and len(instruction) == 2 and int(instruction[1]) >= 0:
+                    remaining, stream, counter = int(instruction[1]), data, "received"
+                else:
+                    raise ValueError(f"Invalid instruction: {instruction}")
+                while remaining:
+                    if not (chunk := stream.read(min(COPY_CHUNK, remaining))):
+                        raise ValueError(f"Unexpected end of {counter} data.")
+                    output.write(chunk)
+                    sha256.update(chunk)
+                    remaining -= len(chunk)
+                    if counter == "reused":
+                        reused += len(chunk)
+                    else:
+                        received += len(chunk)
+            output.flush()
+            os.fsync(output.fileno())
+        if checksum and checksum != sha256.hexdigest():
+            raise ValueError("Checksum of the rebuilt file does not match.")
+        if not partial:
+            os.replace(temp_path, target)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return {"size": reused + received, "reused": reused, "received": received, "sha256": sha256.hexdigest()}
@@ -1,5 +1 @@
-import time
-
-session_time: int = int(time.time())
-first_run: bool = True
 timeout: int = 900
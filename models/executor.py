@@ -1,15 +1,29 @@
+import asyncio
+import glob
+import hashlib
+import json
 import logging
 import math
 import os
-from typing import NoReturn
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, NoReturn, Optional, Union
+from urllib.parse import quote
 
 from fastapi import UploadFile, status
 from fastapi.exceptions import HTTPException
-from fastapi.responses import FileResponse
-from tortoise.models import Model
+from fastapi.responses import FileResponse, Response, StreamingResponse
 
-from models.classes import (DownloadHandler, ListHandler,
-                            MultiFileUploadHandler, UploadHandler)
+from models.cache import cache
+from models.classes import (UPLOAD_ROOT, BatchHandler, DownloadHandler,
+                            ListHandler, MoveHandler, MultiFileUploadHandler,
+                            PreviewHandler, SyncHandler, UploadHandler)
+from models.delta import apply_delta, signature
+from models.journal import journal
+from models.preview import previews
+from models.replication import replication
+from models.retention import engine
+from models.tracing import stage, timed
 
 
 def size_converter(byte_size: int) -> str:
@@ -27,7 +41,164 @@ def size_converter(byte_size: int) -> str:
     return f"{round(byte_size / pow(1024, index), 2)} {size_name[index]}"
 
 
-class Executor(Model):
+BATCH_POOL = ThreadPoolExecutor(max_workers=int(os.environ.get("BATCH_WORKERS", 16)),
+                                thread_name_prefix="batch")
+
+
+def resolve_path(root: str, path: str) -> Optional[str]:
+    """Resolves a path relative to the root, rejecting anything that escapes the root or is hidden.
+
+    Args:
+        root: Directory that the path must stay within.
+        path: Relative path, or an absolute path within the root.
+
+    Returns:
+        str:
+        Resolved absolute path, or ``None`` if the path is outside the root, is the root itself, or has a dot (.)
+        file or directory in it, such as the journals and previews that the server keeps in the root.
+    """
+    root = os.path.realpath(root)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if resolved == root or os.path.commonpath([root, resolved]) != root:
+        return
+    if not any(part.startswith(".") for part in os.path.relpath(resolved, root).split(os.path.sep)):
+        return resolved
+
+
+def upload_directory(path: str, parents: bool = False) -> bool:
+    """Checks if an upload directory exists, creating it when requested if it is within the upload root.
+
+    Args:
+        path: Directory where the files are uploaded.
+        parents: Takes a boolean flag to create the directory along with its parents.
+
+    Returns:
+        bool:
+        Returns a boolean flag to indicate whether the directory exists.
+    """
+    if os.path.isdir(path):
+        return True
+    if parents and resolve_path(root=UPLOAD_ROOT, path=path):
+        os.makedirs(path, exist_ok=True)
+        return True
+    return False
+
+
+def byte_range(header: Optional[str], size: int) -> Optional[tuple[int, int]]:
+    """Parses a single ``Range`` header of the form ``bytes=start-end``, ``bytes=start-`` or ``bytes=-suffix``.
+
+    Args:
+        header: Value of the ``Range`` header.
+        size: Size of the file in bytes.
+
+    Returns:
+        tuple:
+        First and last byte positions (inclusive), or ``None`` if the whole file has to be sent.
+
+    Raises:
+        HTTPExceptions:
+        - 416: If the range is beyond the end of the file.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return
+    start, _, end = header[6:].strip().partition("-")
+    try:
+        if start:
+            start, end = int(start), min(int(end), size - 1) if end else size - 1
+        else:
+            start, end = max(size - int(end), 0), size - 1
+    except ValueError:
+        return
+    if start < 0 or start >= size or start > end:
+        raise HTTPException(status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                            detail=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                            headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+
+def open_file(path: str) -> tuple[BinaryIO, os.stat_result]:
+    """Opens a file for reading along with the stat of the open file, runs in a thread.
+
+    Args:
+        path: Path of the file.
+
+    Returns:
+        tuple:
+        Open binary stream, and the stat of the version of the file that it reads.
+    """
+    f_stream = open(path, "rb")
+    return f_stream, os.fstat(f_stream.fileno())
+
+
+def read_file(f_stream: BinaryIO) -> bytes:
+    """Reads the whole content of an open file and closes it, runs in a thread."""
+    with f_stream:
+        return f_stream.read()
+
+
+def file_range(f_stream: BinaryIO, start: int, end: int, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+    """Reads a range of bytes from an open file in chunks, and closes it once the range is read.
+
+    Args:
+        f_stream: Binary stream of the file.
+        start: First byte position.
+        end: Last byte position (inclusive).
+        chunk_size: Number of bytes read at a time.
+
+    Yields:
+        bytes:
+        Chunks of the range.
+    """
+    remaining = end - start + 1
+    with f_stream:
+        f_stream.seek(start)
+        while remaining > 0 and (chunk := f_stream.read(min(chunk_size, remaining))):
+            remaining -= len(chunk)
+            yield chunk
+
+
+def file_digest(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Calculates the sha256 of a file without loading it into memory.
+
+    Args:
+        path: Path of the file.
+        chunk_size: Number of bytes read at a time.
+
+    Returns:
+        str:
+        Hex digest of the file.
+    """
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f_stream:
+        while chunk := f_stream.read(chunk_size):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+async def run_batch(items: list, func: Callable[..., dict]) -> list[dict]:
+    """Runs a blocking function for every item in the bounded ``BATCH_POOL`` and collects the per-item results.
+
+    Args:
+        items: Arguments for each call, a tuple is unpacked as positional arguments.
+        func: Function that returns the result of a single item as a dictionary.
+
+    Returns:
+        list:
+        Results in the same order as the items, with the error message for the items that failed.
+    """
+    loop = asyncio.get_running_loop()
+
+    def safe_call(item) -> dict:
+        """Calls the function and converts an ``OSError`` into a result."""
+        try:
+            return func(*item) if isinstance(item, tuple) else func(item)
+        except OSError as error:
+            return {"path": item[0] if isinstance(item, tuple) else item, "error": error.strerror or str(error)}
+
+    return list(await asyncio.gather(*(loop.run_in_executor(BATCH_POOL, safe_call, item) for item in items)))
+
+
+class Executor:
     """Base class to run all the executions when called.
 
     >>> Executor
@@ -36,6 +207,7 @@ class Executor(Model):
 
     LOGGER = logging.getLogger("LOGGER")
 
+    @timed("list-directory")
     async def execute_list_directory(self, argument: ListHandler) -> dict:
         """Executes task for the endpoint ``/list-directory``.
 
@@ -86,53 +258,151 @@ class Executor(Model):
             self.LOGGER.info(f"No Content: {file_path}")
             return {"status_code": status.HTTP_204_NO_CONTENT, "detail": "No Content"}
 
-    async def execute_download_file(self, argument: DownloadHandler) -> FileResponse:
+    @timed("download-file")
+    async def execute_download_file(self, argument: DownloadHandler, range_header: Optional[str] = None,
+                                    if_range: Optional[str] = None) -> Union[StreamingResponse, Response]:
         """Executes task for the endpoint ``/download-file``.
 
         Args:
             argument: Takes the class ``DownloadHandler`` as an argument.
+            range_header: Value of the ``Range`` header to download a part of the file.
+            if_range: Value of the ``If-Range`` header, the range is ignored if the ``ETag`` of the file changed.
 
         Returns:
-            FileResponse:
-            Returns the download-able version of the file.
+            Response:
+            Returns the download-able version of the file, served from memory if the file is small and cached.
 
         Raises:
             HTTPExceptions:
             - 403: If a dot (.) file is requested.
             - 404: If the file doesn't exist.
+            - 416: If the range is beyond the end of the file.
+
+        See Also:
+            - Every response carries an ``ETag`` built from the modified time and size of the file, so that clients can
+              resume a download with ``If-Range`` and get the whole file instead if it changed in the meantime.
+            - The cached stat is only used along with the content cached for it. Otherwise, the file is opened and
+              stat'ed again, so the headers always match the bytes that are sent even if another worker rewrote it.
         """
         file_name = argument.FileName
         file_path = f"{argument.FilePath}{os.path.sep}{file_name}"
-        if os.path.isfile(path=file_path):
-            if file_name.startswith("."):
-                self.LOGGER.warning(f"Access Denied: {file_name}")
-                raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
-                                    detail="Dot (.) files cannot be downloaded over API.")
-            else:
-                self.LOGGER.info(f"Download Requested: {file_name}")
-                return FileResponse(path=file_path, media_type="application/octet-stream", filename=file_name)
+        if not (stat_result := cache.stat(path=file_path)):
+            self.LOGGER.error(f"File Not Found: {file_name}")
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                                detail=f"{status.HTTP_404_NOT_FOUND}\n{file_name}")
+        if file_name.startswith("."):
+            self.LOGGER.warning(f"Access Denied: {file_name}")
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                                detail="Dot (.) files cannot be downloaded over API.")
+        self.LOGGER.info(f"Download Requested: {file_name}")
+        engine.touch(path=file_path)
+        f_stream = None
+        if (content := cache.lookup(path=file_path, stat_result=stat_result)) is None:
+            try:
+                f_stream, stat_result = await asyncio.to_thread(open_file, file_path)
+            except OSError:
+                cache.invalidate(path=file_path)
+                self.LOGGER.error(f"File Not Found: {file_name}")
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                                    detail=f"{status.HTTP_404_NOT_FOUND}\n{file_name}")
+            if stat_result.st_size <= cache.max_entry_bytes:
+                content, f_stream = await asyncio.to_thread(read_file, f_stream), None
+                cache.store(path=file_path, stat_result=stat_result, content=content)
+        etag = f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+        if (quoted := quote(file_name)) != file_name:
+            disposition = f"attachment; filename*=utf-8''{quoted}"
         else:
+            disposition = f'attachment; filename="{file_name}"'
+        headers = {"Content-Disposition": disposition, "Accept-Ranges": "bytes", "ETag": etag}
+        try:
+            requested = byte_range(header=range_header, size=stat_result.st_size) \
+                if not if_range or if_range == etag else None
+        except HTTPException:
+            if f_stream:
+                f_stream.close()
+            raise
+        if requested:
+            start, end = requested
+            headers["Content-Range"] = f"bytes {start}-{end}/{stat_result.st_size}"
+        if content is not None:
+            return Response(content=content[start:end + 1] if requested else content,
+                            status_code=status.HTTP_206_PARTIAL_CONTENT if requested else status.HTTP_200_OK,
+                            media_type="application/octet-stream", headers=headers)
+        start, end = requested or (0, stat_result.st_size - 1)
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(content=file_range(f_stream=f_stream, start=start, end=end),
+                                 status_code=status.HTTP_206_PARTIAL_CONTENT if requested else status.HTTP_200_OK,
+                                 media_type="application/octet-stream", headers=headers)
+
+    @timed("preview")
+    async def execute_preview(self, argument: PreviewHandler,
+                              if_none_match: Optional[str] = None) -> Union[FileResponse, Response]:
+        """Executes task for the endpoint ``/preview``.
+
+        Args:
+            argument: Takes the class ``PreviewHandler`` as an argument.
+            if_none_match: Value of the ``If-None-Match`` header sent by the client.
+
+        Returns:
+            FileResponse:
+            Returns a JPEG thumbnail for images, or the first and last lines as JSON for text files, or an empty
+            ``304`` response if the client already has the same preview.
+
+        Raises:
+            HTTPExceptions:
+            - 403: If a dot (.) file is requested.
+            - 404: If the file doesn't exist.
+            - 413: If the image has too many pixels to be decoded safely.
+            - 415: If the file cannot be previewed.
+            - 501: If an image is requested and ``Pillow`` is not installed.
+
+        See Also:
+            The ``ETag`` is the sha256 of the file along with the size of the thumbnail or the number of lines, so the
+            preview of a file that was uploaded again, or of another size, is never reused.
+        """
+        file_name = argument.FileName
+        file_path = f"{argument.FilePath}{os.path.sep}{file_name}"
+        if not (stat_result := cache.stat(path=file_path)):
             self.LOGGER.error(f"File Not Found: {file_name}")
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                                 detail=f"{status.HTTP_404_NOT_FOUND}\n{file_name}")
+        if file_name.startswith("."):
+            self.LOGGER.warning(f"Access Denied: {file_name}")
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                                detail="Dot (.) files cannot be previewed over API.")
+        with stage("render"):
+            preview, media_type, digest = await previews.get(path=file_path, stat_result=stat_result,
+                                                             width=argument.Width, height=argument.Height,
+                                                             lines=argument.Lines)
+        # Previews are named after the digest and the variant, eg: <sha256>-320x240.jpg or <sha256>-10.json
+        headers = {"ETag": f'"{os.path.splitext(os.path.basename(preview))[0]}"', "Cache-Control": "private, no-cache"}
+        if if_none_match and (if_none_match.strip() == "*" or headers["ETag"] in
+                              [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return FileResponse(path=preview, media_type=media_type, headers=headers)
 
-    async def execute_upload_file(self, file: UploadFile, argument: UploadHandler = None) -> None:
+    @timed("upload-file")
+    async def execute_upload_file(self, file: UploadFile, argument: UploadHandler = None,
+                                  owner: Optional[str] = None) -> None:
         """Executes task for the endpoint ``/upload-file``.
 
         Args:
             argument: Takes the class ``UploadHandler`` as an argument.
             file: Takes the file that has to be uploaded as an argument.
+            owner: APIKey or username of the user uploading the file, used for quotas.
 
         Raises:
             HTTPExceptions:
             - 200: If file was uploaded successfully.
             - 500: If failed to upload file to server.
             - 404: If file path is null or does not exist.
+            - 413: If the file is larger than the storage limit.
+            - 507: If the file exceeds the quota of the owner.
         """
         if not (upload_path := argument.FilePath):
             self.LOGGER.error("Received a `null` value for upload filepath.")
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="FilePath cannot be a `null` value")
-        if not os.path.exists(upload_path):
+        if not upload_directory(path=upload_path, parents=argument.Parents):
             self.LOGGER.error(f"Upload path received doesn't exist: {upload_path}")
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="UploadPath does not exist.")
         if not (filename := argument.FileName):
@@ -144,25 +414,39 @@ class Executor(Model):
                 filename = f"{upload_path}{filename}"
             else:
                 filename = f"{upload_path}{os.path.sep}{filename}"
-        content = await file.read()
-        with open(filename, "wb") as f_stream:
-            f_stream.write(content)
+        with stage("read"):
+            content = await file.read()
+        engine.check_quota(path=filename, size=len(content), owner=owner)
+        with stage("write"):
+            await journal.store(path=filename, content=content, owner=owner)
+        cache.invalidate(path=filename)
+        previews.invalidate(path=filename)
 
         file_name = filename.split(os.path.sep)[-1]
-        if os.path.isfile(filename):
+        with stage("verify"):
+            stored = os.path.isfile(filename)
+        if stored:
             self.LOGGER.info(f"Uploaded File: {file_name}")
+            engine.record(path=filename, size=len(content), owner=owner)
+            replication.record(op="put", path=filename)
             raise HTTPException(status_code=status.HTTP_200_OK, detail=f"{file_name} was uploaded to {upload_path}.")
         else:
             self.LOGGER.error(f"Failed to store: {file_name}")
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                                 detail=f"Unable to upload {filename} to {upload_path}.")
 
-    async def execute_upload_files(self, files: list[UploadFile], argument: MultiFileUploadHandler = None) -> NoReturn:
+    @timed("upload-files")
+    async def execute_upload_files(self, files: list[UploadFile], argument: MultiFileUploadHandler = None,
+                                   owner: Optional[str] = None) -> NoReturn:
         """Executes task for the endpoint ``/upload-files``.
 
         Args:
             argument: Takes the class ``MultiFileUploadHandler`` as an argument.
             files: Takes the list of files that has to be uploaded as an argument.
+            owner: APIKey or username of the user uploading the files, used for quotas.
+
+        See Also:
+            Files that exceed the storage limit or the quota are skipped and reported in the response.
 
         Raises:
             HTTPExceptions:
@@ -172,7 +456,7 @@ class Executor(Model):
         if not (upload_path := argument.FilePath):
             self.LOGGER.error("Received a `null` value for upload filepath.")
             raise HTTPException(status_code=404, detail="FilePath cannot be a `null` value")
-        if not os.path.exists(upload_path):
+        if not upload_directory(path=upload_path, parents=argument.Parents):
             self.LOGGER.error(f"Upload path received doesn't exist: {upload_path}")
             raise HTTPException(status_code=404, detail=status.HTTP_404_NOT_FOUND)
         return_val = {}
@@ -180,12 +464,237 @@ class Executor(Model):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No input received.")
         for file in files:
             self.LOGGER.info(f"Downloading file: {file.filename} to server.")
-            data = await file.read()
-            with open(os.path.join(upload_path, file.filename), "wb") as file_stream:
-                file_stream.write(data)
-            if os.path.isfile(os.path.join(upload_path, file.filename)):
+            with stage("read"):
+                data = await file.read()
+            try:
+                engine.check_quota(path=os.path.join(upload_path, file.filename), size=len(data), owner=owner)
+            except HTTPException as error:
+                self.LOGGER.warning(f"Skipped: {file.filename} - {error.detail}")
+                return_val[file.filename] = error.detail
+                continue
+            with stage("write"):
+                await journal.store(path=os.path.join(upload_path, file.filename), content=data, owner=owner)
+            cache.invalidate(path=os.path.join(upload_path, file.filename))
+            previews.invalidate(path=os.path.join(upload_path, file.filename))
+            with stage("verify"):
+                stored = os.path.isfile(os.path.join(upload_path, file.filename))
+            if stored:
                 self.LOGGER.info(f"Uploaded File: {file.filename}")
+                engine.record(path=os.path.join(upload_path, file.filename), size=len(data), owner=owner)
+                replication.record(op="put", path=os.path.join(upload_path, file.filename))
                 return_val[file.filename] = size_converter(len(data))
             else:
                 self.LOGGER.error(f"Failed to store: {file.filename}")
         raise HTTPException(status_code=status.HTTP_200_OK, detail=return_val)
+
+    @timed("batch-delete")
+    async def execute_batch_delete(self, argument: BatchHandler, root: str = UPLOAD_ROOT) -> dict:
+        """Executes task for the endpoint ``/batch/delete``.
+
+        Args:
+            argument: Takes the class ``BatchHandler`` as an argument.
+            root: Upload root that all the paths are scoped to.
+
+        Returns:
+            dict:
+            Returns the deletion status of every path, including the files that matched the glob pattern.
+
+        Raises:
+            HTTPExceptions:
+            - 400: If neither paths nor a valid pattern is received.
+        """
+        paths = list(argument.Paths)
+        if argument.Pattern:
+            if os.path.isabs(argument.Pattern) or ".." in argument.Pattern.split("/"):
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                    detail="Pattern must be relative to the upload root.")
+            paths.extend(os.path.relpath(match, root)
+                         for match in glob.glob(os.path.join(root, argument.Pattern), recursive=True)
+                         if os.path.isfile(match))
+        if not paths:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No input received.")
+
+        deleted: dict[str, str] = {}
+
+        def delete(path: str) -> dict:
+            """Deletes a single file."""
+            if not (resolved := resolve_path(root=root, path=path)):
+                return {"path": path, "deleted": False, "error": "Path is outside the upload root or hidden."}
+            if os.path.isdir(resolved):
+                return {"path": path, "deleted": False, "error": "Path is a directory."}
+            os.remove(resolved)
+            deleted[path] = resolved
+            return {"path": path, "deleted": True}
+
+        results = await run_batch(items=list(dict.fromkeys(paths)), func=delete)
+        for result in results:
+            if resolved := deleted.get(result["path"]):
+                engine.forget(path=resolved)
+                journal.deleted(path=resolved)
+                replication.record(op="delete", path=resolved)
+                cache.invalidate(path=resolved)
+                previews.invalidate(path=resolved)
+        self.LOGGER.info(f"Batch delete: {sum(result.get('deleted', False) for result in results)}/{len(results)}")
+        return {"results": results}
+
+    @timed("batch-stat")
+    async def execute_batch_stat(self, argument: BatchHandler, root: str = UPLOAD_ROOT) -> dict:
+        """Executes task for the endpoint ``/batch/stat``.
+
+        Args:
+            argument: Takes the class ``BatchHandler`` as an argument.
+            root: Upload root that all the paths are scoped to.
+
+        Returns:
+            dict:
+            Returns the size, modified time and optionally the sha256 digest of every path.
+
+        Raises:
+            HTTPExceptions:
+            - 400: If no paths are received.
+        """
+        if not argument.Paths:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No input received.")
+
+        def stat(path: str) -> dict:
+            """Gets the stat of a single file."""
+            if not (resolved := resolve_path(root=root, path=path)):
+                return {"path": path, "error": "Path is outside the upload root or hidden."}
+            stat_result = os.stat(resolved)
+            result = {"path": path, "size": stat_result.st_size, "mtime": stat_result.st_mtime,
+                      "is_dir": os.path.isdir(resolved)}
+            if argument.Digest and not result["is_dir"]:
+                result["sha256"] = file_digest(path=resolved)
+            return result
+
+        return {"results": await run_batch(items=argument.Paths, func=stat)}
+
+    @timed("batch-move")
+    async def execute_batch_move(self, argument: MoveHandler, root: str = UPLOAD_ROOT) -> dict:
+        """Executes task for the endpoint ``/batch/move``.
+
+        Args:
+            argument: Takes the class ``MoveHandler`` as an argument.
+            root: Upload root that all the paths are scoped to.
+
+        Returns:
+            dict:
+            Returns the status of every move.
+
+        Raises:
+            HTTPExceptions:
+            - 400: If the number of sources and destinations don't match.
+        """
+        if not argument.Sources or len(argument.Sources) != len(argument.Destinations):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail="Sources and Destinations must be non-empty lists of the same length.")
+
+        moved: dict[tuple[str, str], tuple[str, str]] = {}
+
+        def move(source: str, destination: str) -> dict:
+            """Renames a single file, creating the parent directories of the destination."""
+            result = {"path": source, "destination": destination, "moved": False}
+            if not (resolved_source := resolve_path(root=root, path=source)) or \
+                    not (resolved_destination := resolve_path(root=root, path=destination)):
+                return {**result, "error": "Path is outside the upload root or hidden."}
+            if not os.path.isfile(resolved_source):
+                return {**result, "error": "Source file not found."}
+            if os.path.exists(resolved_destination) and not argument.Overwrite:
+                return {**result, "error": "Destination already exists."}
+            os.makedirs(os.path.dirname(resolved_destination), exist_ok=True)
+            os.replace(resolved_source, resolved_destination)
+            moved[source, destination] = (resolved_source, resolved_destination)
+            return {**result, "moved": True}
+
+        results = await run_batch(items=list(zip(argument.Sources, argument.Destinations)), func=move)
+        for result in results:
+            if not result.get("moved"):
+                continue
+            source, destination = moved[result["path"], result["destination"]]
+            engine.moved(source=source, destination=destination)
+            journal.moved(source=source, destination=destination)
+            replication.record(op="move", path=source, destination=destination)
+            for path in (source, destination):
+                cache.invalidate(path=path)
+                previews.invalidate(path=path)
+        self.LOGGER.info(f"Batch move: {sum(result.get('moved', False) for result in results)}/{len(results)}")
+        return {"results": results}
+
+    @timed("sync-signature")
+    async def execute_sync_signature(self, argument: SyncHandler) -> dict:
+        """Executes task for the endpoint ``/sync/signature``.
+
+        Args:
+            argument: Takes the class ``SyncHandler`` as an argument.
+
+        Returns:
+            dict:
+            Returns the block size, file size and the rolling and strong checksums of every block.
+
+        Raises:
+            HTTPExceptions:
+            - 403: If a dot (.) file is requested.
+            - 404: If the file doesn't exist.
+        """
+        file_path = os.path.join(argument.FilePath, argument.FileName)
+        if argument.FileName.startswith("."):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                                detail="Dot (.) files cannot be synced over API.")
+        if not os.path.isfile(file_path):
+            self.LOGGER.error(f"File Not Found: {argument.FileName}")
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                                detail=f"{status.HTTP_404_NOT_FOUND}\n{argument.FileName}")
+        block_size = min(max(argument.BlockSize, 512), 16 * 1024 * 1024) if argument.BlockSize else None
+        with stage("signature"):
+            return await asyncio.to_thread(signature, file_path, block_size)
+
+    @timed("sync-patch")
+    async def execute_sync_patch(self, argument: SyncHandler, instructions: str, data: UploadFile,
+                                 block_size: int, checksum: Optional[str] = None, owner: Optional[str] = None) -> None:
+        """Executes task for the endpoint ``/sync/patch``.
+
+        Args:
+            argument: Takes the class ``SyncHandler`` as an argument.
+            instructions: JSON list of ``["copy", index, count]`` and ``["data", length]`` instructions.
+            data: Literal data consumed in order by the ``data`` instructions.
+            block_size: Block size of the signature that the delta was created against.
+            checksum: Expected sha256 of the rebuilt file.
+            owner: APIKey or username of the user syncing the file, used for quotas.
+
+        Raises:
+            HTTPExceptions:
+            - 200: If the file was rebuilt successfully.
+            - 400: If the instructions are invalid or the checksum does not match.
+            - 403: If a dot (.) file is requested.
+            - 404: If the file path does not exist.
+        """
+        if argument.FileName.startswith("."):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                                detail="Dot (.) files cannot be synced over API.")
+        if not upload_directory(path=argument.FilePath, parents=argument.Parents):
+            self.LOGGER.error(f"Upload path received doesn't exist: {argument.FilePath}")
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="UploadPath does not exist.")
+        file_path = os.path.join(argument.FilePath, argument.FileName)
+        try:
+            instructions = json.loads(instructions)
+            expected = sum(int(instruction[2]) * block_size if instruction[0] == "copy" else int(instruction[1])
+                           for instruction in instructions)
+        except (ValueError, TypeError, IndexError, KeyError) as error:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid instructions: {error}")
+        engine.check_quota(path=file_path, size=expected, owner=owner)
+        base = file_path if os.path.isfile(file_path) else None
+        try:
+            with stage("rebuild"):
+                result = await asyncio.to_thread(journal.run, file_path, lambda transfer: apply_delta(
+                    base, file_path, block_size, instructions, data.file, checksum, transfer.partial
+                ), owner)
+        except ValueError as error:
+            self.LOGGER.error(f"Failed to sync: {argument.FileName} - {error}")
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error))
+        cache.invalidate(path=file_path)
+        previews.invalidate(path=file_path)
+        engine.record(path=file_path, size=result["size"], owner=owner)
+        replication.record(op="put", path=file_path)
+        self.LOGGER.info(f"Synced File: {argument.FileName} - reused {result['reused']} bytes, "
+                         f"received {result['received']} bytes")
+        raise HTTPException(status_code=status.HTTP_200_OK, detail=result)
@@ -1,5 +1,7 @@
 from logging import Filter, LogRecord
 
+from models.logger import request_path
+
 
 class EndpointFilter(Filter):
     """Class to initiate ``/docs`` filter in logs while preserving other access logs.
@@ -17,8 +19,11 @@ class EndpointFilter(Filter):
         Returns:
             bool:
             False flag for the endpoint that needs to be filtered.
+
+        See Also:
+            Matches on the request path of the record, so the message is never formatted just to be filtered.
         """
-        return record.getMessage().find("/docs") == -1
+        return "/docs" not in request_path(record=record)
 
 
 class APIKeyFilter(Filter):
@@ -38,4 +43,4 @@ class APIKeyFilter(Filter):
             bool:
             False flag for the endpoint that needs to be filtered.
         """
-        return record.getMessage().find("?apikey=") == -1
+        return "?apikey=" not in request_path(record=record)
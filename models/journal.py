@@ -0,0 +1,500 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Optional
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+LOGGER = logging.getLogger("LOGGER")
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def repair_log(path: str, fileno: int, name: str) -> int:
+    """Truncates a partially written line at the end of a log, left behind if the server crashed.
+
+    Args:
+        path: Path of the log.
+        fileno: File descriptor the log is opened with for writing.
+        name: Name of the log, used in the warning.
+
+    Returns:
+        int:
+        Size of the log after the partial line was removed.
+    """
+    if not (size := os.fstat(fileno).st_size):
+        return size
+    with open(path, "rb") as f_stream:
+        f_stream.seek(max(size - 64 * 1024, 0))
+        tail = f_stream.read()
+    if tail.endswith(b"\n"):
+        return size
+    keep = size - len(tail) + tail.rfind(b"\n") + 1
+    LOGGER.warning(f"Removing {size - keep} bytes of a partial entry from the {name}")
+    os.ftruncate(fileno, keep)
+    return keep
+
+
+def parse(content: bytes) -> tuple[list[dict], int]:
+    """Parses the complete entries of the journal, skipping any that are corrupt.
+
+    Args:
+        content: Content of the journal, which may end with an entry that is still being written.
+
+    Returns:
+        tuple:
+        Entries and the number of bytes that were parsed.
+    """
+    complete = content[:content.rfind(b"\n") + 1]
+    entries = []
+    for line in complete.split(b"\n"):
+        if not line:
+            continue
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            LOGGER.warning(f"Skipping a corrupt entry in the transfer journal: {line[:64]}")
+    return entries, len(complete)
+
+
+def pending(entries: list[dict]) -> dict[str, dict]:
+    """Gets the transfers that were started but never committed or aborted.
+
+    Args:
+        entries: Entries of the journal.
+
+    Returns:
+        dict:
+        ``begin`` entries with the bytes checkpointed, keyed on the transfer ID.
+    """
+    transfers = {}
+    for entry in entries:
+        if entry["op"] == "begin":
+            transfers[entry["id"]] = entry
+        elif entry["op"] == "checkpoint" and entry["id"] in transfers:
+            transfers[entry["id"]]["bytes"] = entry["bytes"]
+        elif entry["op"] in ("commit", "abort"):
+            transfers.pop(entry["id"], None)
+    return transfers
+
+
+def running(pid: Optional[int]) -> bool:
+    """Checks if the worker that journaled an entry is still running.
+
+    Args:
+        pid: PID of the worker.
+
+    Returns:
+        bool:
+        ``False`` if the process is gone, or if the PID is the current one and was therefore reused after a restart.
+    """
+    if not pid or pid == os.getpid():
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Transfer:
+    """A file that is being written, under a partial name until it is committed.
+
+    >>> Transfer
+
+    """
+
+    __slots__ = ("id", "path", "partial", "written", "started")
+
+    def __init__(self, path: str, transfer_id: Optional[str] = None, started: Optional[float] = None):
+        """Instantiates a transfer.
+
+        Args:
+            path: Absolute path of the file once it is committed.
+            transfer_id: Unique ID of the transfer, generated if not given.
+            started: Timestamp when the transfer started.
+        """
+        self.id = transfer_id or uuid.uuid4().hex
+        self.path = path
+        directory, name = os.path.split(path)
+        # Dot files are hidden from listings and the retention scan, so a partial file is never served
+        self.partial = os.path.join(directory, f".{name}.{self.id[:12]}.partial")
+        self.written = 0
+        self.started = started or time.time()
+
+
+class TransferJournal:
+    """Append-only journal of the files that are written, moved and deleted, used to recover from a crash.
+
+    >>> TransferJournal
+
+    See Also:
+        - Every upload is written to a ``.partial`` file next to the target, which is renamed into place on commit,
+          so a file under its real name is always complete.
+        - Progress is checkpointed after every ``JOURNAL_CHECKPOINT_BYTES`` of a transfer.
+        - On startup, partial files of the transfers that were never committed are removed.
+        - The journal is rotated whenever the retention ledger is saved, which lets the ledger be rebuilt from the
+          last snapshot and the entries after it, instead of walking the upload root.
+        - All the workers of a server append to the same journal while holding a shared lock on ``.journal/lock``,
+          and a rotation holds it exclusively. Each entry carries the PID of its worker, so a worker that starts
+          recovers only the transfers of the workers that are no longer running.
+    """
+
+    def __init__(self, checkpoint_bytes: int = int(os.environ.get("JOURNAL_CHECKPOINT_BYTES", 16 * CHUNK_SIZE)),
+                 compact_bytes: int = int(os.environ.get("JOURNAL_COMPACT_BYTES", 4 * CHUNK_SIZE))):
+        """Instantiates the journal, which is opened when the server starts.
+
+        Args:
+            checkpoint_bytes: Bytes written to a transfer between checkpoints.
+            compact_bytes: Size of the journal after which the ledger is saved and the journal is rotated.
+        """
+        self.checkpoint_bytes = checkpoint_bytes
+        self.compact_bytes = compact_bytes
+        self.directory: Optional[str] = None
+        self.path: Optional[str] = None
+        self.fd: Optional[int] = None
+        self.lock_fd: Optional[int] = None
+        self.reader = None
+        self.offset = 0
+        self.followed: list[dict] = []
+        self.id: Optional[str] = None
+        self.lock = threading.RLock()
+        self.held = False
+
+    def start(self, root: str) -> None:
+        """Opens the journal and recovers the transfers that were interrupted.
+
+        Args:
+            root: Upload root, the journal is stored in ``<upload root>/.journal``
+        """
+        self.directory = os.path.join(os.path.realpath(root), ".journal")
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, "transfers.log")
+        self.lock_fd = os.open(os.path.join(self.directory, "lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        self.fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        with self.locked(exclusive=True):
+            self.repair()
+            entries, _ = self.read(offset=0)
+            if entries and entries[0]["op"] == "open":
+                self.id = entries[0]["id"]
+            else:
+                self.id = uuid.uuid4().hex
+                os.ftruncate(self.fd, 0)
+                self.append({"op": "open", "id": self.id})
+                entries = []
+            self.recover(entries=entries)
+            self.reader = open(self.path, "rb")
+            self.offset = os.fstat(self.fd).st_size
+
+    def stop(self) -> None:
+        """Flushes and closes the journal."""
+        with self.lock:
+            if self.fd is not None:
+                os.fsync(self.fd)
+                os.close(self.fd)
+                self.fd = None
+            if self.reader:
+                self.reader.close()
+                self.reader = None
+            if self.lock_fd is not None:
+                os.close(self.lock_fd)
+                self.lock_fd = None
+
+    @contextmanager
+    def locked(self, exclusive: bool = False) -> Iterator[None]:
+        """Holds the journal lock, reopening the journal if another worker rotated it.
+
+        Args:
+            exclusive: Takes a boolean flag to keep the other workers from appending while the block runs.
+        """
+        with self.lock:
+            if self.held:
+                # Nested blocks run under the lock that is already held, since flock would convert it instead
+                yield
+                return
+            shared = fcntl and self.lock_fd is not None
+            if shared:
+                fcntl.flock(self.lock_fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            self.held = True
+            try:
+                if self.fd is not None and self.rotated(fileno=self.fd):
+                    os.close(self.fd)
+                    self.fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                    self.id = self.header()
+                yield
+            finally:
+                self.held = False
+                if shared:
+                    fcntl.flock(self.lock_fd, fcntl.LOCK_UN)
+
+    def rotated(self, fileno: int) -> bool:
+        """Checks if a file descriptor is no longer the current journal, after a rotation."""
+        try:
+            return os.fstat(fileno).st_ino != os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return True
+
+    def header(self) -> Optional[str]:
+        """Reads the ID of the current journal from its first entry."""
+        with open(self.path, "rb") as f_stream:
+            entries, _ = parse(f_stream.readline())
+        if entries and entries[0]["op"] == "open":
+            return entries[0]["id"]
+
+    def repair(self) -> None:
+        """Truncates a partially written entry at the end of the journal, left behind if the server crashed."""
+        repair_log(path=self.path, fileno=self.fd, name="transfer journal")
+
+    def recover(self, entries: list[dict]) -> None:
+        """Cleans up the transfers that were started but never committed or aborted, by a worker that has stopped.
+
+        Args:
+            entries: Entries of the journal.
+        """
+        for entry in pending(entries=entries).values():
+            if running(pid=entry.get("pid")):
+                continue
+            transfer = Transfer(path=entry["path"], transfer_id=entry["id"], started=entry["time"])
+            if os.path.isfile(transfer.partial):
+                LOGGER.warning(f"Removing interrupted upload of {transfer.path}, "
+                               f"{entry.get('bytes', 0)} bytes were checkpointed")
+                self.abort(transfer=transfer)
+            elif os.path.isfile(transfer.path) and os.stat(transfer.path).st_mtime >= transfer.started:
+                # The server stopped after the file was renamed into place, but before the commit was journaled
+                LOGGER.info(f"Recovered completed upload of {transfer.path}")
+                self.commit(transfer=transfer, owner=entry.get("owner"), size=os.path.getsize(transfer.path))
+            else:
+                self.abort(transfer=transfer)
+
+    def append(self, entry: dict, sync: bool = False) -> None:
+        """Appends an entry to the journal, along with the PID of the worker.
+
+        Args:
+            entry: Entry to append.
+            sync: Flushes the journal to disk when set to ``True``
+        """
+        with self.locked():
+            if self.fd is None:
+                return
+            # A single write to a file opened for appending is never interleaved with the writes of other workers
+            os.write(self.fd, json.dumps({**entry, "pid": os.getpid()}).encode() + b"\n")
+            if sync:
+                os.fsync(self.fd)
+
+    def read(self, offset: int) -> tuple[list[dict], int]:
+        """Reads the complete entries after an offset.
+
+        Args:
+            offset: Byte offset in the journal.
+
+        Returns:
+            tuple:
+            Entries in the order they were appended, and the offset after the last complete entry.
+        """
+        with open(self.path, "rb") as f_stream:
+            f_stream.seek(offset)
+            entries, consumed = parse(f_stream.read())
+        return entries, offset + consumed
+
+    def follow(self, offset: Optional[int] = None) -> None:
+        """Reads the entries appended by all the workers since the last call, which are then returned by ``take``.
+
+        Args:
+            offset: Byte offset to read from, instead of where the last call stopped.
+
+        See Also:
+            If another worker rotated the journal, the rest of the old journal is read before the new one.
+        """
+        with self.locked():
+            if not self.reader:
+                return
+            if offset is not None:
+                self.offset = offset
+            self.reader.seek(self.offset)
+            entries, consumed = parse(self.reader.read())
+            self.offset += consumed
+            if self.rotated(fileno=self.reader.fileno()):
+                self.reader.close()
+                self.reader = open(self.path, "rb")
+                new_entries, self.offset = parse(self.reader.read())
+                entries.extend(new_entries)
+            self.followed.extend(entries)
+
+    def take(self) -> list[dict]:
+        """Gets the entries read by ``follow``, so entries are not lost if the caller was cancelled in between.
+
+        Returns:
+            list:
+            Entries in the order they were appended.
+        """
+        with self.lock:
+            entries, self.followed = self.followed, []
+            return entries
+
+    def size(self) -> int:
+        """Gets the current size of the journal in bytes, including the entries of all the workers.
+
+        Returns:
+            int:
+            Size of the journal.
+        """
+        try:
+            return os.path.getsize(self.path) if self.path else 0
+        except OSError:
+            return 0
+
+    def rotate(self) -> tuple[str, int]:
+        """Starts a new journal that carries over only the transfers that are still open, in any of the workers.
+
+        Returns:
+            tuple:
+            ID of the new journal and the offset after the carried over entries.
+
+        See Also:
+            The entries that were not followed yet are read before the journal is replaced, and returned by ``take``.
+        """
+        with self.locked(exclusive=True):
+            self.follow()
+            entries, _ = self.read(offset=0)
+            self.id = uuid.uuid4().hex
+            content = b"".join(json.dumps(entry).encode() + b"\n"
+                               for entry in [{"op": "open", "id": self.id}, *pending(entries=entries).values()])
+            with open(f"{self.path}.tmp", "wb") as f_stream:
+                f_stream.write(content)
+                f_stream.flush()
+                os.fsync(f_stream.fileno())
+            os.replace(f"{self.path}.tmp", self.path)
+            os.close(self.fd)
+            self.fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self.reader.close()
+            self.reader = open(self.path, "rb")
+            self.offset = len(content)
+            return self.id, self.offset
+
+    def begin(self, path: str, owner: Optional[str] = None) -> Transfer:
+        """Journals the start of a transfer.
+
+        Args:
+            path: Path of the file once it is committed.
+            owner: APIKey or username that is uploading the file.
+
+        Returns:
+            Transfer:
+            Transfer with the path of the partial file to write to.
+        """
+        transfer = Transfer(path=os.path.abspath(path))
+        self.append({"op": "begin", "id": transfer.id, "path": transfer.path, "time": transfer.started, "owner": owner})
+        return transfer
+
+    def write(self, transfer: Transfer, content: bytes) -> None:
+        """Writes the content to the partial file in chunks, checkpointing the progress, runs in a thread.
+
+        Args:
+            transfer: Transfer that is written.
+            content: Content of the file.
+        """
+        checkpoint = self.checkpoint_bytes
+        with open(transfer.partial, "wb") as f_stream:
+            for start in range(0, len(content), CHUNK_SIZE):
+                transfer.written += f_stream.write(content[start:start + CHUNK_SIZE])
+                if transfer.written >= checkpoint:
+                    f_stream.flush()
+                    os.fsync(f_stream.fileno())
+                    self.append({"op": "checkpoint", "id": transfer.id, "bytes": transfer.written})
+                    checkpoint += self.checkpoint_bytes
+            f_stream.flush()
+            os.fsync(f_stream.fileno())
+
+    def commit(self, transfer: Transfer, owner: Optional[str] = None, size: Optional[int] = None) -> None:
+        """Renames the partial file into place and journals the commit.
+
+        Args:
+            transfer: Transfer that was written completely.
+            owner: APIKey or username that uploaded the file.
+            size: Size of the file, defaults to the bytes written.
+        """
+        if os.path.isfile(transfer.partial):
+            os.replace(transfer.partial, transfer.path)
+        self.append({"op": "commit", "id": transfer.id, "path": transfer.path, "owner": owner,
+                     "size": transfer.written if size is None else size, "time": time.time()}, sync=True)
+
+    def abort(self, transfer: Transfer) -> None:
+        """Removes the partial file and journals the abort.
+
+        Args:
+            transfer: Transfer that failed.
+        """
+        try:
+            os.remove(transfer.partial)
+        except FileNotFoundError:
+            pass
+        self.append({"op": "abort", "id": transfer.id})
+
+    def run(self, path: str, func: Callable[[Transfer], Any], owner: Optional[str] = None) -> Any:
+        """Writes a file through a journaled transfer, committing it if the function succeeds and aborting it otherwise.
+
+        Args:
+            path: Path of the file once it is committed.
+            func: Function that writes the partial file of the transfer.
+            owner: APIKey or username that is uploading the file.
+
+        Returns:
+            Any:
+            Result of the function.
+
+        See Also:
+            Runs in a thread, since the commit renames the file into place and syncs the journal to disk.
+        """
+        transfer = self.begin(path=path, owner=owner)
+        try:
+            result = func(transfer)
+        except BaseException:
+            self.abort(transfer=transfer)
+            raise
+        self.commit(transfer=transfer, owner=owner,
+                    size=os.path.getsize(transfer.partial) if not transfer.written else None)
+        return result
+
+    async def store(self, path: str, content: bytes, owner: Optional[str] = None) -> None:
+        """Writes a file through a journaled transfer.
+
+        Args:
+            path: Path of the file.
+            content: Content of the file.
+            owner: APIKey or username that is uploading the file.
+        """
+        await asyncio.to_thread(self.run, path, partial(self.write, content=content), owner)
+
+    def deleted(self, path: str) -> None:
+        """Journals a file that was deleted.
+
+        Args:
+            path: Absolute path of the file.
+        """
+        if path:
+            self.append({"op": "delete", "path": os.path.abspath(path)})
+
+    def moved(self, source: str, destination: str) -> None:
+        """Journals a file that was moved.
+
+        Args:
+            source: Absolute path before the move.
+            destination: Absolute path after the move.
+        """
+        if source and destination:
+            self.append({"op": "move", "path": os.path.abspath(source), "destination": os.path.abspath(destination)})
+
+
+journal = TransferJournal()
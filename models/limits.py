@@ -0,0 +1,286 @@
+import json
+import logging
+import os
+import re
+from typing import Optional
+
+from pydantic import BaseModel
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LOGGER = logging.getLogger("LOGGER")
+
+GB = pow(1024, 3)
+
+BOUNDARY = re.compile(r'boundary="?([^";]+)"?', re.IGNORECASE)
+FILENAME = re.compile(r'filename="((?:[^"\\]|\\.)*)"|filename=([^;\s]+)', re.IGNORECASE)
+
+
+class BodyRejected(BaseException):
+    """Raised within the app once its request body was rejected, so that it stops without sending a response.
+
+    >>> BodyRejected
+
+    See Also:
+        Derives from ``BaseException``, since the body parsing of ``FastAPI`` turns any ``Exception`` into a ``400``
+    """
+
+
+class UploadLimits(BaseModel):
+    """Limits that are enforced on every ``multipart/form-data`` request, while the body is being received.
+
+    >>> UploadLimits
+
+    See Also:
+        - Sizes are in bytes, and every limit can be set using the env var with the ``UPLOAD_`` prefix.
+        - ``AllowedExtensions`` is a comma separated list in ``UPLOAD_ALLOWED_EXTENSIONS``, allows any if unset.
+        - ``FilenamePattern`` is a regular expression that every file name must match, if set.
+    """
+
+    MaxParts: int = int(os.environ.get("UPLOAD_MAX_PARTS", 1000))
+    MaxPartSize: int = int(os.environ.get("UPLOAD_MAX_PART_SIZE", 16 * GB))
+    MaxFieldSize: int = int(os.environ.get("UPLOAD_MAX_FIELD_SIZE", 1024 * 1024))
+    MaxTotalSize: int = int(os.environ.get("UPLOAD_MAX_TOTAL_SIZE", 16 * GB))
+    MaxHeaderSize: int = int(os.environ.get("UPLOAD_MAX_HEADER_SIZE", 16 * 1024))
+    MaxFilenameLength: int = int(os.environ.get("UPLOAD_MAX_FILENAME_LENGTH", 255))
+    AllowedExtensions: list[str] = [extension.strip().lower() if extension.strip().startswith(".")
+                                    else f".{extension.strip().lower()}"
+                                    for extension in os.environ.get("UPLOAD_ALLOWED_EXTENSIONS", "").split(",")
+                                    if extension.strip()]
+    FilenamePattern: Optional[str] = os.environ.get("UPLOAD_FILENAME_PATTERN")
+
+
+class UploadRejected(Exception):
+    """Raised when a multipart body violates the upload limits.
+
+    >>> UploadRejected
+
+    """
+
+    def __init__(self, status_code: int, detail: str):
+        """Instantiates the exception.
+
+        Args:
+            status_code: Status code of the response sent to the client.
+            detail: Reason for the rejection.
+        """
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class MultipartScanner:
+    """Incremental scanner that tracks the parts of a multipart body as it arrives, without buffering the content.
+
+    >>> MultipartScanner
+
+    See Also:
+        Only the boundaries and the part headers are looked at, the content is left for the app to parse.
+        At most one delimiter worth of bytes is held between chunks.
+    """
+
+    def __init__(self, boundary: bytes, limits: UploadLimits):
+        """Instantiates the scanner before the first byte of the body.
+
+        Args:
+            boundary: Boundary from the ``Content-Type`` header.
+            limits: Limits enforced on the body.
+        """
+        self.delimiter = b"\r\n--" + boundary
+        self.limits = limits
+        self.pattern = re.compile(limits.FilenamePattern) if limits.FilenamePattern else None
+        # The first delimiter has no leading line break, prefixing one lets every delimiter be found the same way
+        self.buffer = b"\r\n"
+        self.state = "preamble"
+        self.parts = 0
+        self.total = 0
+        self.part_size = 0
+        self.part_limit = limits.MaxFieldSize
+        self.filename = None
+
+    def feed(self, chunk: bytes) -> None:
+        """Scans the next chunk of the body.
+
+        Args:
+            chunk: Bytes received from the client.
+
+        Raises:
+            UploadRejected:
+            If the body violates any of the limits.
+        """
+        self.total += len(chunk)
+        if self.total > self.limits.MaxTotalSize:
+            raise UploadRejected(status_code=413, detail=f"Upload exceeds {self.limits.MaxTotalSize} bytes.")
+        if self.state == "done":
+            return
+        self.buffer += chunk
+        while True:
+            if self.state in ("preamble", "body"):
+                index = self.buffer.find(self.delimiter)
+                if index == -1:
+                    # Keeps the bytes that could be the beginning of a delimiter split across chunks
+                    consumed = max(len(self.buffer) - len(self.delimiter) + 1, 0)
+                    self.content(size=consumed)
+                    self.buffer = self.buffer[consumed:]
+                    return
+                self.content(size=index)
+                self.buffer = self.buffer[index + len(self.delimiter):]
+                self.state = "delimiter"
+            elif self.state == "delimiter":
+                if len(self.buffer) < 2:
+                    return
+                if self.buffer.startswith(b"--"):
+                    self.state, self.buffer = "done", b""
+                    return
+                if not self.buffer.startswith(b"\r\n"):
+                    raise UploadRejected(status_code=400, detail="Malformed multipart body.")
+                self.parts += 1
+                if self.parts > self.limits.MaxParts:
+                    raise UploadRejected(status_code=413, detail=f"Upload exceeds {self.limits.MaxParts} parts.")
+                self.buffer = self.buffer[2:]
+                self.state = "headers"
+            elif self.state == "headers":
+                if self.buffer.startswith(b"\r\n"):
+                    end, headers = 2, b""
+                elif (index := self.buffer.find(b"\r\n\r\n")) != -1:
+                    end, headers = index + 4, self.buffer[:index]
+                elif len(self.buffer) > self.limits.MaxHeaderSize:
+                    raise UploadRejected(status_code=431, detail="Part headers are too large.")
+                else:
+                    return
+                self.start_part(headers=headers.decode("latin-1"))
+                self.buffer = self.buffer[end:]
+                self.state = "body"
+
+    def content(self, size: int) -> None:
+        """Adds the content of the current part, checking it against the size limit for the part.
+
+        Args:
+            size: Number of content bytes.
+        """
+        if self.state != "body":
+            return
+        self.part_size += size
+        if self.part_size > self.part_limit:
+            name = f"{self.filename!r}" if self.filename is not None else "Form field"
+            raise UploadRejected(status_code=413, detail=f"{name} exceeds {self.part_limit} bytes.")
+
+    def start_part(self, headers: str) -> None:
+        """Validates the file name of a new part, and picks the size limit for files or form fields.
+
+        Args:
+            headers: Raw headers of the part.
+        """
+        self.part_size = 0
+        self.filename = None
+        for line in headers.split("\r\n"):
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "content-disposition" and (match := FILENAME.search(value)):
+                self.filename = match.group(1) if match.group(1) is not None else match.group(2)
+        if self.filename is None:
+            self.part_limit = self.limits.MaxFieldSize
+            return
+        self.part_limit = self.limits.MaxPartSize
+        if not self.filename:
+            # Browsers send an empty file name for a file input that was left empty
+            return
+        if len(self.filename) > self.limits.MaxFilenameLength:
+            raise UploadRejected(status_code=400,
+                                 detail=f"File name exceeds {self.limits.MaxFilenameLength} characters.")
+        if any(ord(character) < 32 or character == "\x7f" for character in self.filename):
+            raise UploadRejected(status_code=400, detail=f"{self.filename!r} has control characters.")
+        basename = os.path.basename(self.filename.replace("\\", "/"))
+        if self.limits.AllowedExtensions and os.path.splitext(basename)[1].lower() not in self.limits.AllowedExtensions:
+            raise UploadRejected(status_code=415, detail=f"{basename!r} is not an allowed file type.")
+        if self.pattern and not self.pattern.fullmatch(basename):
+            raise UploadRejected(status_code=400, detail=f"{basename!r} is not an allowed file name.")
+
+
+class UploadLimitMiddleware:
+    """ASGI middleware that enforces the upload limits on ``multipart/form-data`` requests while they stream in.
+
+    >>> UploadLimitMiddleware
+
+    See Also:
+        - A ``Content-Length`` above the total size limit is rejected before the body is read.
+        - On a violation, the error is sent to the client right away and the app is stopped with ``BodyRejected``
+          where it reads the body, so it stops parsing, nothing more is written to disk and no second response is sent.
+        - The response closes the connection, so the rest of the body is never read.
+    """
+
+    def __init__(self, app: ASGIApp, limits: UploadLimits = None):
+        """Instantiates the middleware.
+
+        Args:
+            app: ASGI application that is wrapped.
+            limits: Limits enforced on the uploads, defaults to the values from the env vars.
+        """
+        self.app = app
+        self.limits = limits or UploadLimits()
+
+    async def reject(self, scope: Scope, send: Send, error: UploadRejected) -> None:
+        """Sends the error response and logs the rejection.
+
+        Args:
+            scope: Scope of the request.
+            send: Sends the response to the client.
+            error: Reason for the rejection.
+        """
+        LOGGER.warning(f"Rejected upload to {scope['path']}: {error.detail}")
+        body = json.dumps({"detail": error.detail}).encode()
+        await send({"type": "http.response.start", "status": error.status_code,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+                                (b"connection", b"close")]})
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Scans the body of multipart requests as the app receives it."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        content_type = headers.get("content-type", "")
+        if not content_type.lower().startswith("multipart/form-data"):
+            await self.app(scope, receive, send)
+            return
+        if not (match := BOUNDARY.search(content_type)):
+            await self.reject(scope=scope, send=send,
+                              error=UploadRejected(status_code=400, detail="Multipart boundary is missing."))
+            return
+        if (length := headers.get("content-length", "")).isdigit() and int(length) > self.limits.MaxTotalSize:
+            await self.reject(scope=scope, send=send, error=UploadRejected(
+                status_code=413, detail=f"Upload exceeds {self.limits.MaxTotalSize} bytes."
+            ))
+            return
+
+        scanner = MultipartScanner(boundary=match.group(1).encode("latin-1"), limits=self.limits)
+        started = rejected = False
+
+        async def receive_wrapper() -> Message:
+            """Scans every chunk before the app gets it, stopping the app if the body is rejected."""
+            nonlocal rejected
+            if rejected:
+                raise BodyRejected
+            message = await receive()
+            if message["type"] == "http.request":
+                try:
+                    scanner.feed(chunk=message.get("body", b""))
+                except UploadRejected as error:
+                    rejected = True
+                    if not started:
+                        await self.reject(scope=scope, send=send, error=error)
+                    raise BodyRejected
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            """Drops the responses from the app once the body is rejected."""
+            nonlocal started
+            if rejected:
+                return
+            started = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        except BodyRejected:
+            return
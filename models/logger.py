@@ -0,0 +1,180 @@
+import json
+import logging
+import logging.config
+import queue
+from logging import Filter, LogRecord
+from logging.handlers import QueueHandler, QueueListener
+
+from models.config import LogConfig
+
+# Loggers with a record for every request, which are sampled when LOG_SAMPLE_RATE is set
+SAMPLED_LOGGERS = ("uvicorn.access",)
+
+
+def request_path(record: LogRecord) -> str:
+    """Gets the request path from an access log record without formatting the message.
+
+    Args:
+        record: ``LogRecord`` represents an event which is created every time something is logged.
+
+    Returns:
+        str:
+        Request path for ``uvicorn.access`` records, the unformatted message for all others.
+
+    See Also:
+        ``uvicorn.access`` records are created with the args ``(client_addr, method, full_path, http_version,
+        status_code)``, so the path is available without calling ``record.getMessage()``.
+    """
+    if isinstance(record.args, tuple) and len(record.args) == 5:
+        return str(record.args[2])
+    return str(record.msg)
+
+
+class JSONFormatter(logging.Formatter):
+    """Formats log records as a single line of JSON.
+
+    >>> JSONFormatter
+
+    """
+
+    def format(self, record: LogRecord) -> str:
+        """Converts a record into a JSON string, with separate fields for access log records.
+
+        Args:
+            record: ``LogRecord`` represents an event which is created every time something is logged.
+
+        Returns:
+            str:
+            JSON formatted log line.
+        """
+        payload = {
+            "time": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.name == "uvicorn.access" and isinstance(record.args, tuple) and len(record.args) == 5:
+            payload.update(zip(("client", "method", "path", "http_version", "status_code"), record.args))
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class SamplingFilter(Filter):
+    """Keeps one in every ``rate`` records below ``WARNING`` while passing all warnings and errors.
+
+    >>> SamplingFilter
+
+    See Also:
+        Only added to the ``SAMPLED_LOGGERS``, so the application logs such as the APIKey at startup are never dropped.
+    """
+
+    def __init__(self, rate: int):
+        """Instantiates the filter with a sampling rate.
+
+        Args:
+            rate: Keeps one out of every ``rate`` high-volume records.
+        """
+        super().__init__()
+        self.rate = rate
+        self.count = 0
+
+    def filter(self, record: LogRecord) -> bool:
+        """Drops the records that are not sampled.
+
+        Args:
+            record: ``LogRecord`` represents an event which is created every time something is logged.
+
+        Returns:
+            bool:
+            False flag for the records that are not sampled.
+        """
+        if record.levelno >= logging.WARNING:
+            return True
+        self.count += 1
+        return self.count % self.rate == 0
+
+
+class AsyncQueueHandler(QueueHandler):
+    """Hands the records over to a queue without formatting them in the calling thread.
+
+    >>> AsyncQueueHandler
+
+    """
+
+    def prepare(self, record: LogRecord) -> LogRecord:
+        """Skips the default formatting, since the listener lives in the same process.
+
+        Args:
+            record: ``LogRecord`` represents an event which is created every time something is logged.
+
+        Returns:
+            LogRecord:
+            The same record, unchanged.
+        """
+        return record
+
+
+class LoggerListener(QueueListener):
+    """Writes the records that a logger queued using its original handlers, in a background thread.
+
+    >>> LoggerListener
+
+    """
+
+    def __init__(self, logger: logging.Logger, handler: QueueHandler):
+        """Instantiates the listener with the handlers that are currently attached to the logger.
+
+        Args:
+            logger: Logger whose handlers are moved behind the queue.
+            handler: Queue handler that replaces them.
+        """
+        super().__init__(handler.queue, *logger.handlers, respect_handler_level=True)
+        self.logger = logger
+        self.handler = handler
+
+    def start(self) -> None:
+        """Starts the background thread, and attaches the queue handler in place of the original handlers."""
+        super().start()
+        self.logger.handlers = [self.handler]
+
+    def stop(self) -> None:
+        """Puts the original handlers back on the logger, then writes the pending records and stops the thread."""
+        self.logger.handlers = [handler for handler in self.logger.handlers if handler is not self.handler]
+        for handler in self.handlers:
+            self.logger.addHandler(handler)
+        super().stop()
+
+
+def start_logging(config: LogConfig = None) -> list[QueueListener]:
+    """Configures the loggers using LogConfig and moves their handlers behind a queue.
+
+    Args:
+        config: Takes the class ``LogConfig`` as an argument.
+
+    Returns:
+        list:
+        Started listeners that write the records using the original handlers in a background thread.
+    """
+    config = config or LogConfig()
+    logging.config.dictConfig(config=config.dict())
+    listeners = []
+    for name in config.loggers:
+        handler = AsyncQueueHandler(queue.SimpleQueue())
+        if config.SAMPLE_RATE > 1 and name in SAMPLED_LOGGERS:
+            handler.addFilter(SamplingFilter(rate=config.SAMPLE_RATE))
+        listener = LoggerListener(logger=logging.getLogger(name), handler=handler)
+        listener.start()
+        listeners.append(listener)
+    return listeners
+
+
+def stop_logging(listeners: list[QueueListener]) -> None:
+    """Flushes the pending records and stops the listeners, restoring the original handlers of the loggers.
+
+    Args:
+        listeners: Listeners returned by ``start_logging``.
+    """
+    for listener in listeners:
+        listener.stop()
+    listeners.clear()
@@ -0,0 +1,325 @@
+import asyncio
+import glob
+import json
+import logging
+import mimetypes
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from fastapi import status
+from fastapi.exceptions import HTTPException
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+LOGGER = logging.getLogger("LOGGER")
+
+# Raised by Pillow for images with more pixels than Image.MAX_IMAGE_PIXELS allows, before they are decoded
+BOMB_ERRORS = (Image.DecompressionBombError,) if Image else ()
+
+TEXT_TYPES = {"application/json", "application/xml", "application/javascript", "application/x-sh",
+              "application/x-yaml", "application/toml", "application/sql"}
+
+
+def render_thumbnail(source: str, target: str, width: int, height: int) -> None:
+    """Writes a downsized JPEG of an image, runs in a worker process.
+
+    Args:
+        source: Path of the image.
+        target: Path of the thumbnail.
+        width: Maximum width of the thumbnail.
+        height: Maximum height of the thumbnail.
+    """
+    with Image.open(source) as image:
+        # Lets the JPEG decoder downscale while decoding, which is much faster than resizing the full image
+        image.draft("RGB", (width, height))
+        image.thumbnail((width, height))
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        image.save(f"{target}.{os.getpid()}.tmp", format="JPEG", quality=80, optimize=True)
+    os.replace(f"{target}.{os.getpid()}.tmp", target)
+
+
+def render_snippet(source: str, target: str, lines: int, max_bytes: int) -> None:
+    """Writes the first and last lines of a text file as JSON, runs in a worker process.
+
+    Args:
+        source: Path of the text file.
+        target: Path of the snippet.
+        lines: Number of lines from the head and the tail.
+        max_bytes: Maximum bytes read from the head and the tail.
+
+    Raises:
+        ValueError:
+        If the file has binary content.
+    """
+    size = os.path.getsize(source)
+    with open(source, "rb") as f_stream:
+        head = f_stream.read(max_bytes)
+        if b"\0" in head:
+            raise ValueError(f"{source} has binary content")
+        head_lines = head.decode("utf-8", errors="replace").splitlines()
+        if size > max_bytes:
+            f_stream.seek(max(size - max_bytes, max_bytes))
+            # The first line read from the middle of the file is partial, so it is dropped
+            tail_lines = f_stream.read().decode("utf-8", errors="replace").splitlines()[1:]
+            head_lines = head_lines[:-1]
+        else:
+            tail_lines = head_lines
+    snippet = {
+        "size": size,
+        "head": head_lines[:lines],
+        "tail": tail_lines[-lines:] if len(tail_lines) > lines or size > max_bytes else [],
+        "truncated": size > max_bytes or len(head_lines) > lines,
+    }
+    with open(f"{target}.{os.getpid()}.tmp", "w") as f_stream:
+        json.dump(snippet, f_stream)
+    os.replace(f"{target}.{os.getpid()}.tmp", target)
+
+
+def digest(path: str) -> str:
+    """Calculates the sha256 of a file, runs in a worker process."""
+    from models.executor import file_digest
+    return file_digest(path=path)
+
+
+class PreviewStore:
+    """Generates image thumbnails and text snippets in a process pool, and caches them on disk.
+
+    >>> PreviewStore
+
+    See Also:
+        - Previews are stored in ``<upload root>/.previews`` and named after the sha256 of the file, so identical
+          files share their previews and a changed file never gets a stale one.
+        - The sha256 of each file is computed once, and reused for as long as the modified time and size match.
+        - The digests are saved to ``.previews/index.json`` on shutdown, so the previews of a file can still be removed
+          after a restart, and the previews that no file references are removed on startup.
+        - Thumbnails require ``Pillow``, which is an optional dependency.
+    """
+
+    def __init__(self, workers: int = int(os.environ.get("PREVIEW_WORKERS", min(4, os.cpu_count() or 1))),
+                 max_bytes: int = int(os.environ.get("PREVIEW_TEXT_BYTES", 64 * 1024))):
+        """Instantiates the store, the process pool is started on first use.
+
+        Args:
+            workers: Number of worker processes.
+            max_bytes: Maximum bytes read from the head and the tail of a text file.
+        """
+        self.workers = workers
+        self.max_bytes = max_bytes
+        self.root: Optional[str] = None
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self.digests: dict[str, tuple[tuple[int, int], str]] = {}
+        self.pending: dict[str, asyncio.Future] = {}
+        self.index: Optional[str] = None
+
+    def start(self, root: str) -> None:
+        """Sets the upload root, under which the previews are stored, and loads the index of the previews.
+
+        Args:
+            root: Upload root.
+        """
+        self.root = os.path.join(root, ".previews")
+        self.index = os.path.join(self.root, "index.json")
+        self.digests.update(self.load())
+        self.prune()
+
+    async def stop(self) -> None:
+        """Saves the index of the previews and stops the worker processes."""
+        if self.root:
+            await asyncio.to_thread(self.save)
+        self.shutdown()
+
+    def shutdown(self) -> None:
+        """Stops the worker processes without waiting for them, cancelling the pending renders."""
+        if self.pool:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+    def load(self) -> dict[str, tuple[tuple[int, int], str]]:
+        """Loads the digests of the files that were previewed, dropping the ones that changed since they were saved.
+
+        Returns:
+            dict:
+            Version and digest of each file, keyed on its path.
+        """
+        try:
+            with open(self.index) as f_stream:
+                saved = json.load(f_stream)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as error:
+            LOGGER.warning(f"Failed to load the preview index: {error}")
+            return {}
+        digests = {}
+        for path, (mtime_ns, size, value) in saved.items():
+            try:
+                stat_result = os.stat(path)
+            except OSError:
+                continue
+            if (stat_result.st_mtime_ns, stat_result.st_size) == (mtime_ns, size):
+                digests[path] = ((mtime_ns, size), value)
+        return digests
+
+    def save(self) -> None:
+        """Writes the digests of the files that were previewed, so the previews can be invalidated after a restart.
+
+        See Also:
+            Entries saved by other workers are kept for as long as their files are unchanged.
+        """
+        if not os.path.isdir(self.root):
+            return
+        index = {path: [*version, value] for path, (version, value) in {**self.load(), **self.digests}.items()}
+        with open(f"{self.index}.{os.getpid()}.tmp", "w") as f_stream:
+            json.dump(index, f_stream)
+        os.replace(f"{self.index}.{os.getpid()}.tmp", self.index)
+
+    def prune(self) -> None:
+        """Removes the previews that are not referenced by any file in the index."""
+        if not os.path.isdir(self.root):
+            return
+        referenced = {value for _, value in self.digests.values()}
+        removed = 0
+        for name in os.listdir(self.root):
+            if name == "index.json" or name.split("-", 1)[0] in referenced:
+                continue
+            try:
+                os.remove(os.path.join(self.root, name))
+                removed += 1
+            except OSError:
+                pass
+        if removed:
+            LOGGER.info(f"Removed {removed} previews that are no longer referenced")
+
+    async def run(self, func, *args):
+        """Runs a function in the process pool, starting the pool if required.
+
+        Raises:
+            HTTPExceptions:
+            - 503: If a worker process crashed.
+        """
+        if not self.pool:
+            # Spawned workers do not inherit the locks held by the server's threads, unlike forked ones
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.pool, func, *args)
+        except BrokenProcessPool as error:
+            # A worker that crashed breaks the whole pool, so a new one is started for the next request
+            LOGGER.error(f"Preview workers stopped: {error}")
+            self.shutdown()
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                detail="Preview workers are restarting, try again.")
+
+    @staticmethod
+    def kind(path: str) -> str:
+        """Gets the kind of preview for a file.
+
+        Args:
+            path: Path of the file.
+
+        Returns:
+            str:
+            ``image``, ``text`` or the media type of a file that cannot be previewed.
+        """
+        media_type = mimetypes.guess_type(path)[0]
+        if media_type and media_type.startswith("image/") and media_type != "image/svg+xml":
+            return "image"
+        if not media_type or media_type.startswith("text/") or media_type in TEXT_TYPES or media_type.endswith("+xml"):
+            return "text"
+        return media_type
+
+    async def file_digest(self, path: str, stat_result: os.stat_result) -> str:
+        """Gets the sha256 of a file, computing it only if the file changed since the last request.
+
+        Args:
+            path: Path of the file.
+            stat_result: Stat of the file.
+
+        Returns:
+            str:
+            Hex digest of the file.
+        """
+        version = (stat_result.st_mtime_ns, stat_result.st_size)
+        if (cached := self.digests.get(path)) and cached[0] == version:
+            return cached[1]
+        value = await self.run(digest, path)
+        self.digests[path] = (version, value)
+        return value
+
+    async def get(self, path: str, stat_result: os.stat_result, width: int, height: int,
+                  lines: int) -> tuple[str, str, str]:
+        """Gets the preview of a file, generating it if it is not cached.
+
+        Args:
+            path: Path of the file.
+            stat_result: Stat of the file.
+            width: Maximum width of a thumbnail.
+            height: Maximum height of a thumbnail.
+            lines: Number of lines from the head and the tail of a text file.
+
+        Returns:
+            tuple:
+            Path of the preview, its media type and the sha256 of the file.
+
+        Raises:
+            HTTPExceptions:
+            - 413: If the image has too many pixels to be decoded safely.
+            - 415: If the file cannot be previewed.
+            - 501: If ``Pillow`` is not installed for image thumbnails.
+        """
+        path = os.path.realpath(path)
+        if (kind := self.kind(path=path)) == "image":
+            if not Image:
+                raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED,
+                                    detail="Image previews require Pillow to be installed on the server.")
+        elif kind != "text":
+            raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                                detail=f"Previews are not supported for {kind}")
+        os.makedirs(self.root, exist_ok=True)
+        value = await self.file_digest(path=path, stat_result=stat_result)
+        if kind == "image":
+            target, media_type = os.path.join(self.root, f"{value}-{width}x{height}.jpg"), "image/jpeg"
+            func, args = render_thumbnail, (path, target, width, height)
+        else:
+            target, media_type = os.path.join(self.root, f"{value}-{lines}.json"), "application/json"
+            func, args = render_snippet, (path, target, lines, self.max_bytes)
+        if os.path.isfile(target):
+            return target, media_type, value
+        # Concurrent requests for the same preview wait on a single worker
+        if not (future := self.pending.get(target)):
+            future = self.pending[target] = asyncio.ensure_future(self.run(func, *args))
+            future.add_done_callback(lambda _: self.pending.pop(target, None))
+        try:
+            await asyncio.shield(future)
+        except BOMB_ERRORS as error:
+            LOGGER.warning(f"Preview refused for {path}: {error}")
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                detail=f"{os.path.basename(path)} is too large to be previewed.")
+        except (OSError, SyntaxError, ValueError) as error:
+            LOGGER.warning(f"Preview failed for {path}: {error}")
+            raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                                detail=f"{os.path.basename(path)} cannot be previewed.")
+        return target, media_type, value
+
+    def invalidate(self, path: str) -> None:
+        """Removes the previews of a file that was overwritten, moved or deleted.
+
+        Args:
+            path: Absolute path of the file.
+        """
+        if path and (cached := self.digests.pop(os.path.realpath(path), None)) and self.root:
+            if any(value == cached[1] for _, value in self.digests.values()):
+                return
+            for preview in glob.glob(os.path.join(self.root, f"{cached[1]}-*")):
+                try:
+                    os.remove(preview)
+                except FileNotFoundError:
+                    pass
+
+
+previews = PreviewStore()
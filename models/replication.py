@@ -0,0 +1,537 @@
+import asyncio
+import hmac
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import wait
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from models.journal import repair_log
+
+LOGGER = logging.getLogger("LOGGER")
+
+# Client errors that retrying cannot fix, such as a file that the peer does not allow or has no space for
+PERMANENT = {400, 404, 413, 415, 422, 507}
+
+_replicated: ContextVar[bool] = ContextVar("replicated", default=False)
+
+
+class ReplicationMiddleware:
+    """ASGI middleware that marks the requests sent by a replicating peer, so their changes are not journaled again.
+
+    >>> ReplicationMiddleware
+
+    See Also:
+        Peers send the shared secret in the header ``X-Replicated``, which keeps two nodes that replicate to each other
+        from looping. The header is ignored unless it matches the secret, so clients cannot skip the replication.
+    """
+
+    def __init__(self, app: ASGIApp, secret: Optional[str] = os.environ.get("REPLICATION_SECRET")):
+        """Instantiates the middleware.
+
+        Args:
+            app: ASGI application that is wrapped.
+            secret: Secret shared by the peers, defaults to the env var ``REPLICATION_SECRET``
+        """
+        self.app = app
+        self.secret = secret.encode() if secret else None
+
+    def replicated(self, scope: Scope) -> bool:
+        """Checks if the request was sent by a peer.
+
+        Args:
+            scope: Connection scope of the request.
+
+        Returns:
+            bool:
+            True flag if the request carries the header ``X-Replicated`` with the shared secret.
+        """
+        if scope["type"] != "http" or not self.secret:
+            return False
+        return any(name == b"x-replicated" and hmac.compare_digest(value, self.secret)
+                   for name, value in scope["headers"])
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Runs the request with the replicated flag set, if it was sent by a peer."""
+        if not self.replicated(scope=scope):
+            await self.app(scope, receive, send)
+            return
+        token = _replicated.set(True)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _replicated.reset(token)
+
+
+class Peer:
+    """Replication state of a single peer, with a cursor that is persisted after every acknowledged batch.
+
+    >>> Peer
+
+    """
+
+    def __init__(self, url: str, cursor_path: str):
+        """Instantiates the peer and loads its cursor.
+
+        Args:
+            url: Base url of the peer.
+            cursor_path: Path of the file that stores the cursor.
+        """
+        self.url = url
+        self.cursor_path = cursor_path
+        self.seq = 0
+        self.offset = 0
+        self.shipped = 0
+        self.failures = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+        self.last_success: Optional[float] = None
+        self.wake = asyncio.Event()
+        self.load()
+
+    def load(self) -> None:
+        """Loads the cursor stored by the worker that ships the journal."""
+        if os.path.isfile(self.cursor_path):
+            with open(self.cursor_path) as f_stream:
+                cursor = json.load(f_stream)
+            self.seq, self.offset = cursor["seq"], cursor["offset"]
+
+    def save(self) -> None:
+        """Stores the cursor, replacing the previous one atomically."""
+        with open(f"{self.cursor_path}.tmp", "w") as f_stream:
+            json.dump({"seq": self.seq, "offset": self.offset, "url": self.url}, f_stream)
+            f_stream.flush()
+            os.fsync(f_stream.fileno())
+        os.replace(f"{self.cursor_path}.tmp", self.cursor_path)
+
+
+class Replicator:
+    """Replicates the uploads to peer instances of the API, using a local journal as a write-behind log.
+
+    >>> Replicator
+
+    See Also:
+        - Every committed change within the upload root is appended to ``<upload root>/.replication/journal.log``
+          under ``.replication/lock``, so the workers of a server share a single sequence of entries.
+        - A single worker holds ``.replication/shipper.lock`` and runs a background task for each peer, which ships new
+          entries in batches and advances the peer's cursor once the peer acknowledges them, so a restart resumes
+          where it left off. Failed batches are retried with backoff. The other workers take over if it exits.
+        - The journal is truncated once every peer has caught up and it is larger than ``compact_bytes``
+        - Nothing is sent to the peers on the request path, requests only append a line to the journal.
+    """
+
+    def __init__(self, peers: list[str] = None, remote_root: Optional[str] = None,
+                 batch_size: int = int(os.environ.get("REPLICATION_BATCH_SIZE", 64)), max_backoff: float = 60,
+                 compact_bytes: int = 1024 * 1024, poll_interval: float = 5,
+                 secret: Optional[str] = os.environ.get("REPLICATION_SECRET")):
+        """Instantiates the replicator, nothing is journaled unless peers are configured.
+
+        Args:
+            peers: Base urls of the peers, defaults to the comma separated env var ``REPLICATION_PEERS``
+            remote_root: Upload root of the peers, defaults to the env var ``REPLICATION_REMOTE_ROOT`` or the local one.
+            batch_size: Maximum journal entries shipped in a batch.
+            max_backoff: Maximum delay in seconds between retries of a failed batch.
+            compact_bytes: Minimum size of the journal before it is truncated.
+            poll_interval: Seconds between checks for the entries appended by the other workers, and for the
+                shipper lock on the workers that do not hold it.
+            secret: Secret shared by the peers, defaults to the env var ``REPLICATION_SECRET``
+        """
+        self.urls = peers if peers is not None else [peer.strip().rstrip("/") for peer in
+                                                     os.environ.get("REPLICATION_PEERS", "").split(",") if peer.strip()]
+        self.remote_root = remote_root or os.environ.get("REPLICATION_REMOTE_ROOT")
+        self.batch_size = batch_size
+        self.max_backoff = max_backoff
+        self.compact_bytes = compact_bytes
+        self.poll_interval = poll_interval
+        self.secret = secret
+        self.root: Optional[str] = None
+        self.journal_path: Optional[str] = None
+        self.journal = None
+        self.lock_fd: Optional[int] = None
+        self.shipper_fd: Optional[int] = None
+        self.shipping = False
+        self.seq = 0
+        self.size = 0
+        self.lock = threading.Lock()
+        self.peers: list[Peer] = []
+        self.tasks: list[asyncio.Task] = []
+
+    async def start(self, root: str) -> None:
+        """Opens the journal, and starts shipping it to the peers if no other worker does.
+
+        Args:
+            root: Upload root, changes outside of it are not replicated.
+        """
+        if not self.urls:
+            return
+        if not self.secret:
+            # Without the secret, a peer cannot tell the replicated changes apart and would journal them again
+            LOGGER.error("Replication is disabled, since REPLICATION_SECRET is not set")
+            return
+        self.root = os.path.realpath(root)
+        self.remote_root = self.remote_root or self.root
+        directory = os.path.join(self.root, ".replication")
+        os.makedirs(directory, exist_ok=True)
+        self.journal_path = os.path.join(directory, "journal.log")
+        self.journal = open(self.journal_path, "ab")
+        self.lock_fd = os.open(os.path.join(directory, "lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        self.shipper_fd = os.open(os.path.join(directory, "shipper.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        self.peers = [Peer(url=url, cursor_path=os.path.join(directory, f"peer-{index}.cursor"))
+                      for index, url in enumerate(self.urls)]
+        with self.locked():
+            size = repair_log(path=self.journal_path, fileno=self.journal.fileno(), name="replication journal")
+            # An empty journal after compaction still continues the sequence that the peers acknowledged
+            self.seq = max([self.last_seq(size=size)] + [peer.seq for peer in self.peers])
+            self.size = size
+        self.tasks.append(asyncio.create_task(self.supervise()))
+        LOGGER.info(f"Replicating {self.root} to {', '.join(self.urls)} from journal entry {self.seq}")
+
+    async def stop(self) -> None:
+        """Stops the workers, and flushes the journal to disk."""
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks.clear()
+        if self.journal:
+            with self.lock:
+                os.fsync(self.journal.fileno())
+                self.journal.close()
+                self.journal = None
+        for fd in (self.lock_fd, self.shipper_fd):
+            if fd is not None:
+                os.close(fd)
+        self.lock_fd = self.shipper_fd = None
+        self.shipping = False
+        self.peers.clear()
+
+    @contextmanager
+    def locked(self) -> Iterator[int]:
+        """Holds the journal lock, which keeps the other workers from appending to or truncating the journal.
+
+        Yields:
+            int:
+            Size of the journal.
+        """
+        with self.lock:
+            if fcntl:
+                fcntl.flock(self.lock_fd, fcntl.LOCK_EX)
+            try:
+                yield os.fstat(self.journal.fileno()).st_size
+            finally:
+                if fcntl:
+                    fcntl.flock(self.lock_fd, fcntl.LOCK_UN)
+
+    def sync(self, size: int) -> None:
+        """Continues the sequence from the entries that the other workers appended, runs under the journal lock.
+
+        Args:
+            size: Size of the journal.
+        """
+        if size != self.size:
+            self.seq = max(self.seq, self.last_seq(size=size))
+            self.size = size
+
+    def elect(self) -> bool:
+        """Tries to become the worker that ships the journal, the lock is held until the worker exits.
+
+        Returns:
+            bool:
+            True flag if this worker holds the shipper lock.
+        """
+        if not fcntl:
+            return True
+        try:
+            fcntl.flock(self.shipper_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        return True
+
+    async def supervise(self) -> None:
+        """Waits until this worker holds the shipper lock, and starts a worker for each peer."""
+        while not self.elect():
+            await asyncio.sleep(self.poll_interval)
+        self.shipping = True
+        with self.locked() as size:
+            for peer in self.peers:
+                # Cursors were advanced by the worker that held the lock before
+                peer.load()
+                if peer.offset > size:
+                    # The journal was truncated while the peer was offline, entries that it missed are not available
+                    LOGGER.warning(f"Replication cursor of {peer.url} is ahead of the journal, "
+                                   "restarting from the beginning")
+                    peer.offset = 0
+        LOGGER.info(f"Shipping the replication journal from process {os.getpid()}")
+        self.tasks.extend(asyncio.create_task(self.worker(peer=peer)) for peer in self.peers)
+
+    def last_seq(self, size: int) -> int:
+        """Reads the sequence number of the last complete entry in the journal.
+
+        Args:
+            size: Size of the journal.
+
+        Returns:
+            int:
+            Sequence number, ``0`` if the journal is empty.
+        """
+        with open(self.journal_path, "rb") as f_stream:
+            f_stream.seek(max(size - 64 * 1024, 0))
+            for line in reversed(f_stream.read().split(b"\n")):
+                try:
+                    return json.loads(line)["seq"]
+                except (ValueError, KeyError):
+                    continue
+        return 0
+
+    def record(self, op: str, path: str, destination: Optional[str] = None) -> None:
+        """Appends a committed change to the journal, and wakes up the workers.
+
+        Args:
+            op: ``put``, ``delete`` or ``move``
+            path: Absolute path of the file.
+            destination: Absolute path where the file was moved to.
+
+        See Also:
+            Changes made by a replicating peer, and files outside the upload root are skipped.
+        """
+        if not self.journal or _replicated.get():
+            return
+        entry = {"op": op, "path": self.relative(path=path), "time": time.time()}
+        if destination:
+            entry["destination"] = self.relative(path=destination)
+        if not entry["path"] or (destination and not entry["destination"]):
+            return
+        with self.locked() as size:
+            self.sync(size=size)
+            self.seq += 1
+            line = json.dumps({"seq": self.seq, **entry}).encode() + b"\n"
+            self.journal.write(line)
+            self.journal.flush()
+            self.size = size + len(line)
+        for peer in self.peers:
+            peer.wake.set()
+
+    def relative(self, path: Optional[str]) -> Optional[str]:
+        """Converts an absolute path into a path relative to the upload root, ``None`` if it is outside the root."""
+        if path and (path := os.path.realpath(path)) != self.root and \
+                os.path.commonpath([self.root, path]) == self.root:
+            return os.path.relpath(path, self.root)
+
+    def read(self, offset: int) -> tuple[list[dict], int]:
+        """Reads the next batch of complete entries from the journal.
+
+        Args:
+            offset: Byte offset to read from.
+
+        Returns:
+            tuple:
+            Entries and the offset after the last one.
+        """
+        entries = []
+        with open(self.journal_path, "rb") as f_stream:
+            f_stream.seek(offset)
+            while len(entries) < self.batch_size and (line := f_stream.readline()).endswith(b"\n"):
+                entries.append(json.loads(line))
+                offset += len(line)
+        return entries, offset
+
+    def put(self, client, paths: list[str]) -> int:
+        """Uploads files to a peer concurrently, runs in a thread.
+
+        Args:
+            client: ``FileHandlerClient`` for the peer.
+            paths: Paths of the files, relative to the upload root.
+
+        Returns:
+            int:
+            Number of files that the peer rejected permanently.
+
+        Raises:
+            ClientError:
+            If the peer failed to store a file, and it should be retried.
+        """
+        from client.api import ClientError
+
+        futures = {}
+        for path in paths:
+            # A file that no longer exists was deleted or moved later on, which has its own entry
+            if os.path.isfile(local := os.path.join(self.root, path)):
+                futures[path] = client.file_pool.submit(
+                    client.upload_file, path=local, name=os.path.basename(path), parents=True,
+                    remote_dir=os.path.dirname(os.path.join(self.remote_root, path))
+                )
+        wait(futures.values())
+        rejected = 0
+        for path, future in futures.items():
+            try:
+                future.result()
+            except ClientError as error:
+                if error.status not in PERMANENT:
+                    raise
+                LOGGER.error(f"Replication of {path} rejected by {client.pool.prefix}: {error}")
+                rejected += 1
+        return rejected
+
+    def ship(self, client, entries: list[dict]) -> int:
+        """Sends a batch of entries to a peer, runs in a thread.
+
+        Args:
+            client: ``FileHandlerClient`` for the peer.
+            entries: Journal entries in the order they were recorded.
+
+        Returns:
+            int:
+            Number of files that the peer rejected permanently.
+        """
+        rejected = 0
+        # Consecutive entries of the same kind are sent together, which keeps the order of the changes intact
+        runs: list[tuple[str, list[dict]]] = []
+        for entry in entries:
+            if entry["op"] == "mark":
+                # Left by the compaction to continue the sequence, there is no change to send
+                continue
+            if runs and runs[-1][0] == entry["op"] and entry["op"] != "move":
+                runs[-1][1].append(entry)
+            else:
+                runs.append((entry["op"], [entry]))
+        for op, run in runs:
+            paths = list(dict.fromkeys(entry["path"] for entry in run))
+            if op == "put":
+                rejected += self.put(client=client, paths=paths)
+            elif op == "delete":
+                client.delete_files(paths=paths)
+            elif op == "move":
+                result = client.move_files(sources=paths, destinations=[run[0]["destination"]], overwrite=True)
+                if not result["results"][0].get("moved"):
+                    # The source never reached the peer when it was moved soon after the upload, so it is sent again
+                    rejected += self.put(client=client, paths=[run[0]["destination"]])
+        return rejected
+
+    async def worker(self, peer: Peer) -> None:
+        """Ships the journal to a peer, waiting for new entries once it has caught up.
+
+        Args:
+            peer: Peer that the journal is shipped to.
+        """
+        from client.api import FileHandlerClient
+
+        auth = os.environ.get("REPLICATION_AUTH", os.environ.get("AUTH_MODE", "apikey"))
+        client = FileHandlerClient(url=peer.url, auth="server" if auth == "server" else "apikey",
+                                   apikey=os.environ.get("REPLICATION_APIKEY", os.environ.get("APIKEY")),
+                                   username=os.environ.get("REPLICATION_USER", os.environ.get("USER")),
+                                   password=os.environ.get("REPLICATION_PASSWORD", os.environ.get("PASSWORD")),
+                                   workers=4, segments=1, retries=2, headers={"X-Replicated": self.secret})
+        attempt = 0
+        try:
+            while True:
+                peer.wake.clear()
+                entries, offset = self.read(offset=peer.offset)
+                if not entries:
+                    try:
+                        # Entries appended by the other workers do not wake this one up
+                        await asyncio.wait_for(peer.wake.wait(), timeout=self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                try:
+                    await asyncio.to_thread(os.fsync, self.journal.fileno())
+                    peer.rejected += await asyncio.to_thread(self.ship, client, entries)
+                except Exception as error:  # noqa: Retried until the peer recovers, whatever the failure
+                    attempt += 1
+                    peer.failures += 1
+                    peer.last_error = f"{type(error).__name__}: {error}"
+                    delay = random.uniform(0, min(self.max_backoff, pow(2, attempt)))
+                    LOGGER.warning(f"Replication to {peer.url} failed, retrying in {delay:.1f}s: {peer.last_error}")
+                    await asyncio.sleep(delay)
+                    continue
+                attempt = 0
+                peer.seq, peer.offset = entries[-1]["seq"], offset
+                peer.shipped += len(entries)
+                peer.last_success = time.time()
+                peer.last_error = None
+                peer.save()
+                self.compact()
+        finally:
+            await asyncio.to_thread(client.close)
+
+    def compact(self) -> None:
+        """Truncates the journal once every peer has acknowledged all of it, including the entries of other workers.
+
+        See Also:
+            The journal is left with a ``mark`` entry, which the peers skip, so the other workers continue the sequence.
+        """
+        with self.locked() as size:
+            if size < self.compact_bytes or any(peer.offset != size for peer in self.peers):
+                return
+            self.sync(size=size)
+            mark = json.dumps({"seq": self.seq, "op": "mark", "time": time.time()}).encode() + b"\n"
+            self.journal.truncate(0)
+            self.journal.write(mark)
+            self.journal.flush()
+            self.size = len(mark)
+            for peer in self.peers:
+                peer.offset = self.size
+                peer.save()
+        LOGGER.info(f"Replication journal compacted at entry {self.seq}")
+
+    def lag(self, peer: Peer) -> float:
+        """Gets the age of the oldest entry that the peer has not acknowledged.
+
+        Args:
+            peer: Peer to get the lag for.
+
+        Returns:
+            float:
+            Seconds, ``0`` if the peer has caught up.
+        """
+        entries, _ = self.read(offset=peer.offset)
+        return round(time.time() - entries[0]["time"], 3) if entries else 0.0
+
+    def metrics(self) -> dict:
+        """Gets the progress and the lag of every peer.
+
+        Returns:
+            dict:
+            Last journal entry, whether this worker ships it, and the acknowledged entry, pending entries, lag and
+            errors of each peer.
+        """
+        if not self.journal:
+            return {"enabled": False, "shipping": False, "journal_seq": 0, "journal_bytes": 0, "peers": {}}
+        with self.locked() as size:
+            self.sync(size=size)
+        if not self.shipping:
+            for peer in self.peers:
+                peer.load()
+        return {
+            "enabled": True,
+            "shipping": self.shipping,
+            "journal_seq": self.seq,
+            "journal_bytes": size,
+            "peers": {
+                peer.url: {
+                    "acked_seq": peer.seq,
+                    "pending": self.seq - peer.seq,
+                    "lag_seconds": self.lag(peer=peer),
+                    "shipped": peer.shipped,
+                    "rejected": peer.rejected,
+                    "failures": peer.failures,
+                    "last_error": peer.last_error,
+                    "last_success": peer.last_success,
+                } for peer in self.peers
+            }
+        }
+
+
+replication = Replicator()
@@ -0,0 +1,568 @@
+import asyncio
+import heapq
+import json
+import logging
+import os
+import time
+from typing import Optional
+
+from fastapi import status
+from fastapi.exceptions import HTTPException
+from pydantic import BaseModel, validator
+
+from models.cache import cache
+from models.journal import journal
+from models.preview import previews
+from models.replication import replication
+
+LOGGER = logging.getLogger("LOGGER")
+
+EVICTION_MODES = ("oldest", "lru")
+
+
+class RetentionPolicy(BaseModel):
+    """BaseModel that holds the retention and quota limits for the upload root.
+
+    >>> RetentionPolicy
+
+    See Also:
+        - ``TTL``: Seconds a file is kept after it was last modified, per directory relative to the upload root.
+          Use ``"."`` for the upload root, the longest matching directory wins.
+        - ``MaxBytes`` and ``MaxFiles``: Limits for the whole upload root, enforced by evicting files.
+        - ``Eviction``: ``oldest`` evicts the least recently modified files, ``lru`` the least recently downloaded.
+        - ``Quotas``: Maximum bytes per owner (APIKey or username), uploads beyond the quota are rejected.
+    """
+
+    TTL: dict[str, int] = {}
+    MaxBytes: Optional[int]
+    MaxFiles: Optional[int]
+    Eviction: str = "oldest"
+    Quotas: dict[str, int] = {}
+    SweepInterval: float = 60
+    BatchSize: int = 100
+    BatchPause: float = 0.05
+
+    @validator("Eviction")
+    def valid_eviction(cls, value: str) -> str:
+        """Validates the eviction mode.
+
+        Raises:
+            ValueError:
+            If the mode is not one of ``EVICTION_MODES``
+        """
+        if value not in EVICTION_MODES:
+            raise ValueError(f"Unsupported Eviction: {value!r}, use one of {', '.join(EVICTION_MODES)}")
+        return value
+
+    @classmethod
+    def load(cls) -> "RetentionPolicy":
+        """Loads the policy from the JSON file set in the env var ``RETENTION_POLICY``.
+
+        Returns:
+            RetentionPolicy:
+            Loaded policy, or a policy without any limits if the env var is not set.
+        """
+        if path := os.environ.get("RETENTION_POLICY"):
+            with open(path) as f_stream:
+                return cls(**json.load(f_stream))
+        return cls()
+
+
+class Entry:
+    """Usage of a single file as tracked by the ledger.
+
+    >>> Entry
+
+    """
+
+    __slots__ = ("size", "mtime", "atime", "owner")
+
+    def __init__(self, size: int, mtime: float, owner: Optional[str] = None):
+        """Instantiates an entry.
+
+        Args:
+            size: Size of the file in bytes.
+            mtime: Modified time of the file.
+            owner: APIKey or username that uploaded the file.
+        """
+        self.size = size
+        self.mtime = mtime
+        self.atime = mtime
+        self.owner = owner
+
+
+class UsageLedger:
+    """Incrementally maintained usage of the upload root, so limits are enforced without walking the tree.
+
+    >>> UsageLedger
+
+    See Also:
+        Heaps ordered by expiry, modified time and access time are updated lazily; stale heap items are skipped when
+        popped and the heaps are rebuilt once they grow to twice the number of entries.
+    """
+
+    def __init__(self, policy: RetentionPolicy):
+        """Instantiates an empty ledger.
+
+        Args:
+            policy: Retention policy used to calculate the expiry of each file.
+        """
+        self.policy = policy
+        self.entries: dict[str, Entry] = {}
+        self.total_bytes = 0
+        self.owners: dict[str, int] = {}
+        self.expiry_heap: list[tuple[float, float, str]] = []
+        self.eviction_heap: list[tuple[float, str]] = []
+
+    def ttl(self, path: str) -> Optional[int]:
+        """Gets the time-to-live for a path from the longest matching directory in the policy.
+
+        Args:
+            path: Path relative to the upload root.
+
+        Returns:
+            int:
+            Seconds to keep the file, or ``None`` if the file never expires.
+        """
+        directory = os.path.dirname(path) or "."
+        while True:
+            if directory in self.policy.TTL:
+                return self.policy.TTL[directory]
+            if directory == ".":
+                return
+            directory = os.path.dirname(directory) or "."
+
+    def add(self, path: str, size: int, mtime: float, owner: Optional[str] = None,
+            atime: Optional[float] = None) -> None:
+        """Adds or replaces the entry for a file.
+
+        Args:
+            path: Path relative to the upload root.
+            size: Size of the file in bytes.
+            mtime: Modified time of the file.
+            owner: APIKey or username that uploaded the file.
+            atime: Last time the file was downloaded, defaults to the modified time.
+        """
+        self.remove(path=path)
+        entry = Entry(size=size, mtime=mtime, owner=owner)
+        entry.atime = atime or mtime
+        self.entries[path] = entry
+        self.total_bytes += size
+        if owner:
+            self.owners[owner] = self.owners.get(owner, 0) + size
+        if (ttl := self.ttl(path=path)) is not None:
+            heapq.heappush(self.expiry_heap, (mtime + ttl, mtime, path))
+        heapq.heappush(self.eviction_heap, (entry.atime if self.policy.Eviction == "lru" else mtime, path))
+        self._compact()
+
+    def remove(self, path: str) -> Optional[Entry]:
+        """Removes the entry for a file.
+
+        Args:
+            path: Path relative to the upload root.
+
+        Returns:
+            Entry:
+            Entry that was removed, if it existed.
+        """
+        if (entry := self.entries.pop(path, None)) is None:
+            return
+        self.total_bytes -= entry.size
+        if entry.owner:
+            self.owners[entry.owner] -= entry.size
+        return entry
+
+    def move(self, source: str, destination: str) -> None:
+        """Moves an entry to a new path, keeping its owner.
+
+        Args:
+            source: Old path relative to the upload root.
+            destination: New path relative to the upload root.
+        """
+        if entry := self.remove(path=source):
+            self.add(path=destination, size=entry.size, mtime=entry.mtime, owner=entry.owner, atime=entry.atime)
+
+    def touch(self, path: str) -> None:
+        """Records an access to a file, used for ``lru`` eviction.
+
+        Args:
+            path: Path relative to the upload root.
+        """
+        if (entry := self.entries.get(path)) and self.policy.Eviction == "lru":
+            entry.atime = time.time()
+            heapq.heappush(self.eviction_heap, (entry.atime, path))
+            self._compact()
+
+    def expired(self, now: float, limit: int) -> list[str]:
+        """Pops the files whose time-to-live has elapsed.
+
+        Args:
+            now: Current timestamp.
+            limit: Maximum number of paths to return.
+
+        Returns:
+            list:
+            Paths relative to the upload root.
+        """
+        paths = []
+        while self.expiry_heap and self.expiry_heap[0][0] <= now and len(paths) < limit:
+            _, mtime, path = heapq.heappop(self.expiry_heap)
+            if (entry := self.entries.get(path)) and entry.mtime == mtime:
+                paths.append(path)
+        return paths
+
+    def evictable(self, limit: int) -> list[str]:
+        """Pops the files to be evicted until the usage is within ``MaxBytes`` and ``MaxFiles``.
+
+        Args:
+            limit: Maximum number of paths to return.
+
+        Returns:
+            list:
+            Paths relative to the upload root, oldest or least recently used first.
+        """
+        paths, excess_bytes, excess_files = [], 0, 0
+        if self.policy.MaxBytes is not None:
+            excess_bytes = self.total_bytes - self.policy.MaxBytes
+        if self.policy.MaxFiles is not None:
+            excess_files = len(self.entries) - self.policy.MaxFiles
+        while self.eviction_heap and (excess_bytes > 0 or excess_files > 0) and len(paths) < limit:
+            timestamp, path = heapq.heappop(self.eviction_heap)
+            if not (entry := self.entries.get(path)):
+                continue
+            if timestamp != (entry.atime if self.policy.Eviction == "lru" else entry.mtime):
+                continue
+            paths.append(path)
+            excess_bytes -= entry.size
+            excess_files -= 1
+        return paths
+
+    def _compact(self) -> None:
+        """Rebuilds the heaps once stale items make up more than half of them."""
+        if len(self.eviction_heap) > 2 * len(self.entries) + 1024:
+            key = "atime" if self.policy.Eviction == "lru" else "mtime"
+            self.eviction_heap = [(getattr(entry, key), path) for path, entry in self.entries.items()]
+            heapq.heapify(self.eviction_heap)
+        if len(self.expiry_heap) > 2 * len(self.entries) + 1024:
+            self.expiry_heap = [(entry.mtime + ttl, entry.mtime, path) for path, entry in self.entries.items()
+                                if (ttl := self.ttl(path=path)) is not None]
+            heapq.heapify(self.expiry_heap)
+
+
+class RetentionEngine:
+    """Enforces the retention policy and quotas for the upload root.
+
+    >>> RetentionEngine
+
+    See Also:
+        - The ledger is saved along with the position in the transfer journal, and rebuilt on startup from the
+          entries journaled after it. The upload root is walked only when there is no usable snapshot.
+        - Each worker of the server follows the journal, to apply the changes that the other workers made.
+        - Paths outside the upload root are not tracked.
+        - Expired and evicted files are deleted by a background task in rate-limited batches, and the deletes are
+          replicated to the peers like any other.
+    """
+
+    def __init__(self, policy: RetentionPolicy = None):
+        """Instantiates the engine.
+
+        Args:
+            policy: Takes the class ``RetentionPolicy`` as an argument, defaults to ``RetentionPolicy.load()``
+        """
+        self.policy = policy or RetentionPolicy.load()
+        self.ledger = UsageLedger(policy=self.policy)
+        self.root: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def relative(self, path: str) -> Optional[str]:
+        """Converts an absolute path into a path relative to the upload root.
+
+        Args:
+            path: Absolute path of a file.
+
+        Returns:
+            str:
+            Relative path, or ``None`` if the engine is not started or the path is outside the upload root.
+        """
+        if not self.root:
+            return
+        path = os.path.realpath(path)
+        if os.path.commonpath([self.root, path]) == self.root and path != self.root:
+            return os.path.relpath(path, self.root)
+
+    def scan(self) -> None:
+        """Walks the upload root once to build the ledger, skipping dot files and directories."""
+        for directory, sub_dirs, files in os.walk(self.root):
+            sub_dirs[:] = [sub_dir for sub_dir in sub_dirs if not sub_dir.startswith(".")]
+            for file in files:
+                if file.startswith("."):
+                    continue
+                try:
+                    stat_result = os.stat(os.path.join(directory, file))
+                except FileNotFoundError:
+                    # Deleted by a request or another worker while the upload root was walked
+                    continue
+                self.ledger.add(path=os.path.relpath(os.path.join(directory, file), self.root),
+                                size=stat_result.st_size, mtime=stat_result.st_mtime)
+
+    def load(self) -> bool:
+        """Loads the last saved ledger, and replays the transfer journal after it.
+
+        Returns:
+            bool:
+            ``True`` if the ledger was restored, ``False`` if the upload root has to be walked.
+        """
+        try:
+            with open(os.path.join(journal.directory, "ledger.json")) as f_stream:
+                snapshot = json.load(f_stream)
+            if snapshot["journal"] != journal.id:
+                # The journal was rotated after the snapshot was taken, so the changes in between are lost
+                return False
+            for path, size, mtime, atime, owner in snapshot["entries"]:
+                self.ledger.add(path=path, size=size, mtime=mtime, owner=owner, atime=atime)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError, KeyError, TypeError) as error:
+            LOGGER.warning(f"Failed to load the ledger snapshot: {error}")
+            return False
+        journal.follow(offset=snapshot["offset"])
+        entries = journal.take()
+        self.replay(entries=entries)
+        LOGGER.info(f"Restored {len(self.ledger.entries)} files from the ledger, replayed {len(entries)} entries")
+        return True
+
+    def replay(self, entries: list[dict], own: bool = True) -> None:
+        """Applies the entries of the transfer journal to the ledger.
+
+        Args:
+            entries: Entries in the order they were appended.
+            own: Takes a boolean flag to apply the entries of this worker, which are in the ledger already otherwise.
+        """
+        pid = os.getpid()
+        for entry in entries:
+            relative = self.relative(path=entry.get("path", ""))
+            if not own and entry.get("pid") == pid:
+                # A commit is journaled before the request records it, which a rotation in between would lose
+                if entry["op"] == "commit" and relative is not None and relative not in self.ledger.entries:
+                    try:
+                        stat_result = os.stat(entry["path"])
+                    except OSError:
+                        continue
+                    self.ledger.add(path=relative, size=stat_result.st_size, mtime=stat_result.st_mtime,
+                                    owner=entry["owner"])
+                continue
+            if entry["op"] == "commit" and relative is not None:
+                self.ledger.add(path=relative, size=entry["size"], mtime=entry["time"], owner=entry["owner"])
+            elif entry["op"] == "delete" and relative is not None:
+                self.ledger.remove(path=relative)
+            elif entry["op"] == "move":
+                self.moved(source=entry["path"], destination=entry["destination"])
+
+    async def follow(self) -> None:
+        """Applies the changes that the other workers of the server journaled since the last call."""
+        await asyncio.to_thread(journal.follow)
+        self.replay(entries=journal.take(), own=False)
+
+    async def save(self) -> None:
+        """Saves the ledger and rotates the transfer journal, so the next start only replays the newer entries."""
+        journal_id, offset = await asyncio.to_thread(journal.rotate)
+        # The entries up to the rotation are applied and the ledger is copied without yielding, so the snapshot
+        # covers the journal up to the offset
+        self.replay(entries=journal.take(), own=False)
+        entries = [(path, entry.size, entry.mtime, entry.atime, entry.owner)
+                   for path, entry in self.ledger.entries.items()]
+        await asyncio.to_thread(self._write, {"journal": journal_id, "offset": offset, "entries": entries})
+
+    def _write(self, snapshot: dict) -> None:
+        """Writes the snapshot of the ledger atomically, runs in a thread."""
+        path = os.path.join(journal.directory, "ledger.json")
+        with open(f"{path}.{os.getpid()}.tmp", "w") as f_stream:
+            json.dump(snapshot, f_stream)
+            f_stream.flush()
+            os.fsync(f_stream.fileno())
+        if journal.header() != snapshot["journal"]:
+            # Another worker rotated the journal since, and writes the snapshot that matches it
+            os.remove(f"{path}.{os.getpid()}.tmp")
+            return
+        os.replace(f"{path}.{os.getpid()}.tmp", path)
+
+    def check_quota(self, path: str, size: int, owner: Optional[str]) -> None:
+        """Verifies that storing a file does not exceed the quota of its owner.
+
+        Args:
+            path: Absolute path where the file will be stored.
+            size: Size of the file in bytes.
+            owner: APIKey or username that is uploading the file.
+
+        Raises:
+            HTTPExceptions:
+            - 413: If the file is larger than ``MaxBytes`` of the upload root.
+            - 507: If the file exceeds the quota of the owner.
+        """
+        if (relative := self.relative(path=path)) is None:
+            return
+        if self.policy.MaxBytes is not None and size > self.policy.MaxBytes:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                detail=f"{os.path.basename(path)} is larger than the storage limit.")
+        if owner is None or (quota := self.policy.Quotas.get(owner)) is None:
+            return
+        existing = self.ledger.entries.get(relative)
+        replaced = existing.size if existing and existing.owner == owner else 0
+        if self.ledger.owners.get(owner, 0) - replaced + size > quota:
+            raise HTTPException(status_code=status.HTTP_507_INSUFFICIENT_STORAGE,
+                                detail=f"Storing {os.path.basename(path)} exceeds the quota.")
+
+    def record(self, path: str, size: int, owner: Optional[str] = None) -> None:
+        """Records a file that was stored.
+
+        Args:
+            path: Absolute path of the file.
+            size: Size of the file in bytes.
+            owner: APIKey or username that uploaded the file.
+        """
+        if (relative := self.relative(path=path)) is not None:
+            self.ledger.add(path=relative, size=size, mtime=time.time(), owner=owner)
+
+    def forget(self, path: str) -> None:
+        """Records a file that was deleted.
+
+        Args:
+            path: Absolute path of the file.
+        """
+        if (relative := self.relative(path=path)) is not None:
+            self.ledger.remove(path=relative)
+
+    def moved(self, source: str, destination: str) -> None:
+        """Records a file that was moved.
+
+        Args:
+            source: Absolute path before the move.
+            destination: Absolute path after the move.
+        """
+        relative_source, relative_destination = self.relative(path=source), self.relative(path=destination)
+        if relative_source is not None and relative_destination is not None:
+            self.ledger.move(source=relative_source, destination=relative_destination)
+        elif relative_source is not None:
+            self.ledger.remove(path=relative_source)
+
+    def touch(self, path: str) -> None:
+        """Records a file that was downloaded.
+
+        Args:
+            path: Absolute path of the file.
+        """
+        if (relative := self.relative(path=path)) is not None:
+            self.ledger.touch(path=relative)
+
+    def usage(self, owner: Optional[str] = None) -> dict:
+        """Gets the current usage of the upload root, or of a single owner.
+
+        Args:
+            owner: APIKey or username.
+
+        Returns:
+            dict:
+            Bytes and number of files used, along with the limits.
+        """
+        if owner:
+            return {"bytes": self.ledger.owners.get(owner, 0), "quota": self.policy.Quotas.get(owner)}
+        return {"bytes": self.ledger.total_bytes, "files": len(self.ledger.entries),
+                "max_bytes": self.policy.MaxBytes, "max_files": self.policy.MaxFiles}
+
+    def _delete(self, candidates: dict[str, Entry]) -> tuple[list[str], dict[str, os.stat_result]]:
+        """Deletes a batch of files in a thread.
+
+        Args:
+            candidates: Entries of the files to delete, keyed on their paths.
+
+        Returns:
+            tuple:
+            Paths that no longer exist, and the stat of the files that were written again after they were picked.
+        """
+        removed, changed = [], {}
+        for path, entry in candidates.items():
+            try:
+                stat_result = os.stat(os.path.join(self.root, path))
+                if stat_result.st_size != entry.size or stat_result.st_mtime > entry.mtime:
+                    changed[path] = stat_result
+                    continue
+                os.remove(os.path.join(self.root, path))
+            except FileNotFoundError:
+                pass
+            except OSError as error:
+                LOGGER.error(f"Failed to delete {path}: {error}")
+                continue
+            removed.append(path)
+        return removed, changed
+
+    async def sweep(self) -> int:
+        """Deletes the expired and evicted files in rate-limited batches.
+
+        Returns:
+            int:
+            Number of files deleted.
+        """
+        deleted = 0
+        while paths := (self.ledger.expired(now=time.time(), limit=self.policy.BatchSize) or
+                        self.ledger.evictable(limit=self.policy.BatchSize)):
+            candidates = {path: self.ledger.entries[path] for path in paths}
+            removed, changed = await asyncio.to_thread(self._delete, candidates)
+            for path, stat_result in changed.items():
+                # Files that changed on disk without the ledger knowing are tracked again with their new stat
+                if (entry := self.ledger.entries.get(path)) is candidates[path]:
+                    self.ledger.add(path=path, size=stat_result.st_size, mtime=stat_result.st_mtime, owner=entry.owner)
+            for path in removed:
+                # The entry is replaced if the file was uploaded again while the batch was being deleted
+                if self.ledger.entries.get(path) is candidates[path]:
+                    self.ledger.remove(path=path)
+                    journal.deleted(path=os.path.join(self.root, path))
+                    replication.record(op="delete", path=os.path.join(self.root, path))
+                cache.invalidate(path=os.path.join(self.root, path))
+                previews.invalidate(path=os.path.join(self.root, path))
+                deleted += 1
+            await asyncio.sleep(self.policy.BatchPause)
+        if deleted:
+            LOGGER.info(f"Retention sweep removed {deleted} files.")
+        return deleted
+
+    async def _run(self) -> None:
+        """Runs the sweep at every ``SweepInterval`` until cancelled, saving the ledger once the journal grows.
+
+        See Also:
+            The changes journaled by the other workers of the server are applied to the ledger before every sweep.
+        """
+        while True:
+            try:
+                await self.follow()
+                if self.policy.TTL or self.policy.MaxBytes is not None or self.policy.MaxFiles is not None:
+                    await self.sweep()
+                if journal.size() >= journal.compact_bytes:
+                    await self.save()
+            except Exception as error:
+                LOGGER.error(f"Retention sweep failed: {error}")
+            await asyncio.sleep(self.policy.SweepInterval)
+
+    async def start(self, root: str) -> None:
+        """Restores or builds the ledger for the upload root and starts the background sweeper.
+
+        Args:
+            root: Upload root that is tracked, the transfer journal must be started before.
+        """
+        self.root = os.path.realpath(root)
+        if not await asyncio.to_thread(self.load):
+            LOGGER.info(f"No usable ledger snapshot, scanning {self.root}")
+            self.ledger = UsageLedger(policy=self.policy)
+            await asyncio.to_thread(self.scan)
+            await self.save()
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Cancels the background sweeper and saves the ledger."""
+        if self.task:
+            self.task.cancel()
+            self.task = None
+        if self.root and journal.fd is not None:
+            await self.save()
+
+
+engine = RetentionEngine()
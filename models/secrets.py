@@ -1,24 +1,58 @@
+import functools
 import getpass
 import os
-import pwd
+import sys
 
-from tortoise.models import Model
 
-
-class Secrets(Model):
+class Credentials:
     """Looks for the env vars ``USER`` and ``PASSWORD``, requests from the user if unavailable.
 
-    >>> Secrets
+    >>> Credentials
 
+    See Also:
+        Nothing is read during import. Each value is resolved on first use, and the user is prompted only if the
+        standard input is a terminal, so that workers spawned by a process manager never block on a prompt.
     """
 
-    USERNAME: str = os.environ.get('USER', getpass.getuser() or pwd.getpwuid(os.getuid())[0])
-    PASSWORD: str = os.environ.get('PASSWORD')
-
-    if not USERNAME:
-        USERNAME: str = input(__prompt='Enter username: ')
-        os.environ['USER'] = USERNAME  # Store as env var so, value remains despite restart
-
-    if not PASSWORD:
-        PASSWORD: str = getpass.getpass(prompt='Enter PASSWORD: ')
-        os.environ['PASSWORD'] = PASSWORD  # Store as env var so, value remains despite restart
+    @staticmethod
+    def _prompt(prompt: str, secret: bool = False) -> str:
+        """Requests a value from the user, only when running in a terminal.
+
+        Args:
+            prompt: Text displayed to the user.
+            secret: Takes a boolean flag to hide the input.
+
+        Returns:
+            str:
+            Value entered by the user.
+
+        Raises:
+            RuntimeError:
+            If the standard input is not a terminal.
+        """
+        if not sys.stdin or not sys.stdin.isatty():
+            raise RuntimeError(f"{prompt.split()[-1].rstrip(':')} is not set as an env var and cannot be requested "
+                               "without a terminal.")
+        return getpass.getpass(prompt=prompt) if secret else input(prompt)
+
+    @functools.cached_property
+    def USERNAME(self) -> str:
+        """Username from the env var ``USER``, defaults to the user running the server."""
+        if not (username := os.environ.get("USER")):
+            try:
+                username = getpass.getuser()
+            except (KeyError, OSError):
+                username = self._prompt(prompt="Enter USER: ")
+            os.environ["USER"] = username  # Store as env var so, value remains despite restart
+        return username
+
+    @functools.cached_property
+    def PASSWORD(self) -> str:
+        """Password from the env var ``PASSWORD``, requested from the user if unavailable."""
+        if not (password := os.environ.get("PASSWORD")):
+            password = self._prompt(prompt="Enter PASSWORD: ", secret=True)
+            os.environ["PASSWORD"] = password  # Store as env var so, value remains despite restart
+        return password
+
+
+Secrets = Credentials()
@@ -0,0 +1,170 @@
+import base64
+import hashlib
+import hmac
+import logging
+import os
+import sys
+import time
+from typing import Optional
+
+from pydantic import BaseModel
+
+from models import env
+
+LOGGER = logging.getLogger("LOGGER")
+
+
+class Session(BaseModel):
+    """BaseModel that holds the state of an authenticated session, carried within its signed token.
+
+    >>> Session
+
+    """
+
+    username: str
+    created: float
+    expiry: float
+
+
+def worker_count() -> int:
+    """Gets the number of server processes, from ``--workers`` or the env var ``WEB_CONCURRENCY`` used by uvicorn.
+
+    Returns:
+        int:
+        Number of worker processes, ``1`` if it is not set or is not a number.
+    """
+    workers = os.environ.get("WEB_CONCURRENCY", "1")
+    for index, argument in enumerate(sys.argv):
+        if argument == "--workers" and index + 1 < len(sys.argv):
+            workers = sys.argv[index + 1]
+        elif argument.startswith("--workers="):
+            workers = argument.split("=", 1)[1]
+    try:
+        return int(workers)
+    except ValueError:
+        # uvicorn reports an invalid value itself, the session store must not fail to import before that
+        return 1
+
+
+class SessionStore:
+    """Issues and verifies self-contained session tokens, signed with a shared secret.
+
+    >>> SessionStore
+
+    See Also:
+        - Token is ``<payload>.<signature>`` where the payload holds the username, creation time and expiry, and the
+          signature is an HMAC-SHA256 of the payload. Any worker with the same ``SESSION_SECRET`` can verify it.
+        - Tokens removed at logout are revoked in the current process until they expire.
+        - Revoked tokens are swept lazily, at most once every ``sweep_interval`` seconds.
+    """
+
+    COOKIE_NAME = "session_token"
+
+    def __init__(self, ttl: int = env.timeout, sweep_interval: int = 60, secret: bytes = None):
+        """Instantiates the store with a time-to-live and a signing secret.
+
+        Args:
+            ttl: Number of seconds a session stays valid after the login.
+            sweep_interval: Minimum number of seconds between two sweeps for revoked tokens.
+            secret: Key used to sign the tokens. Defaults to the env var ``SESSION_SECRET`` or random bytes.
+        """
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self.secret = secret or os.environ.get("SESSION_SECRET", "").encode()
+        self.generated = not self.secret
+        self.secret = self.secret or os.urandom(32)
+        self.revoked: dict[str, float] = {}
+        self.last_sweep = time.time()
+
+    def startup(self) -> None:
+        """Verifies the signing secret before the server starts accepting requests.
+
+        Raises:
+            RuntimeError:
+            If the secret was generated while the server runs more than one worker, as each worker would have its
+            own secret and reject the tokens issued by the others.
+        """
+        if not self.generated:
+            return
+        if (workers := worker_count()) > 1:
+            raise RuntimeError(f"SESSION_SECRET must be set to run {workers} workers, so they share the same secret.")
+        LOGGER.warning("SESSION_SECRET is not set, using a random secret that changes on every restart.")
+
+    def _sign(self, payload: str) -> str:
+        """Creates a url safe signature for the payload.
+
+        Args:
+            payload: Encoded payload that has to be signed.
+
+        Returns:
+            str:
+            Url safe base64 encoded signature.
+        """
+        digest = hmac.new(key=self.secret, msg=payload.encode(), digestmod=hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+    def create(self, username: str) -> str:
+        """Creates a new session for an authenticated user.
+
+        Args:
+            username: Name of the user who was authenticated.
+
+        Returns:
+            str:
+            Signed token that holds the session.
+        """
+        now = time.time()
+        session = Session(username=username, created=now, expiry=now + self.ttl)
+        payload = base64.urlsafe_b64encode(session.json().encode()).rstrip(b"=").decode("ascii")
+        return f"{payload}.{self._sign(payload)}"
+
+    def get(self, token: Optional[str]) -> Optional[Session]:
+        """Verifies a signed token and reads its session.
+
+        Args:
+            token: Signed token received from the client.
+
+        Returns:
+            Session:
+            Session if the signature is valid, and the token has neither expired nor been revoked, otherwise ``None``.
+        """
+        self.sweep()
+        if not token or "." not in token:
+            return
+        payload, signature = token.rsplit(".", 1)
+        if not hmac.compare_digest(signature, self._sign(payload)) or token in self.revoked:
+            return
+        try:
+            session = Session.parse_raw(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        except ValueError:
+            return
+        if session.expiry > time.time():
+            return session
+
+    def delete(self, token: Optional[str]) -> None:
+        """Revokes a signed token.
+
+        Args:
+            token: Signed token received from the client.
+        """
+        if session := self.get(token=token):
+            self.revoked[token] = session.expiry
+
+    def sweep(self, force: bool = False) -> int:
+        """Removes the revoked tokens that have expired anyway.
+
+        Args:
+            force: Takes a boolean flag to sweep regardless of the time elapsed since the previous sweep.
+
+        Returns:
+            int:
+            Number of tokens that were removed.
+        """
+        now = time.time()
+        if not force and now - self.last_sweep < self.sweep_interval:
+            return 0
+        self.last_sweep = now
+        expired = [token for token, expiry in self.revoked.items() if expiry <= now]
+        for token in expired:
+            del self.revoked[token]
+        return len(expired)
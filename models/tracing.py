@@ -0,0 +1,384 @@
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import urllib.request
+from collections import Counter
+from collections.abc import Callable
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LOGGER = logging.getLogger("LOGGER")
+
+HOOKS: list[Callable[["Trace"], None]] = []
+_current: ContextVar[Optional["Trace"]] = ContextVar("trace", default=None)
+
+
+class Span:
+    """Timing of a single stage within a request.
+
+    >>> Span
+
+    """
+
+    __slots__ = ("name", "span_id", "parent_id", "start", "end", "attributes")
+
+    def __init__(self, name: str, parent_id: Optional[str], start: int, attributes: dict = None):
+        """Instantiates a span.
+
+        Args:
+            name: Name of the stage.
+            parent_id: Span id of the enclosing stage.
+            start: Start time from ``time.perf_counter_ns``.
+            attributes: Additional attributes exported along with the span.
+        """
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start = start
+        self.end = start
+        self.attributes = attributes or {}
+
+    @property
+    def duration(self) -> float:
+        """Duration of the span in milliseconds."""
+        return (self.end - self.start) / 1e6
+
+
+class Trace:
+    """Collects the spans of a single request.
+
+    >>> Trace
+
+    See Also:
+        The time between the start of the request and the first stage is recorded as ``parse``, which is where the
+        request body is received and the multipart form is parsed before the endpoint is called.
+    """
+
+    def __init__(self, name: str, attributes: dict = None):
+        """Instantiates a trace with its root span.
+
+        Args:
+            name: Name of the root span, usually the request method and path.
+            attributes: Attributes of the root span.
+        """
+        self.trace_id = os.urandom(16).hex()
+        self.wall_start = time.time_ns()
+        self.root = Span(name=name, parent_id=None, start=time.perf_counter_ns(), attributes=attributes)
+        self.spans: list[Span] = []
+        self.stack: list[str] = [self.root.span_id]
+
+    def finish(self) -> None:
+        """Marks the end of the request."""
+        self.root.end = time.perf_counter_ns()
+
+    def server_timing(self) -> str:
+        """Creates the value for the ``Server-Timing`` header, adding up the spans that share a name.
+
+        Returns:
+            str:
+            Header value such as ``parse;dur=1.2, auth;dur=0.1, total;dur=3.4``
+        """
+        durations = {}
+        for span in self.spans:
+            durations[span.name] = durations.get(span.name, 0) + span.duration
+        durations["total"] = (time.perf_counter_ns() - self.root.start) / 1e6
+        return ", ".join(f"{name};dur={duration:.3f}" for name, duration in durations.items())
+
+    def to_otlp(self) -> list[dict]:
+        """Converts the trace into OpenTelemetry spans using the OTLP/JSON encoding.
+
+        Returns:
+            list:
+            List of spans as dictionaries.
+        """
+        offset = self.wall_start - self.root.start
+
+        def encode(span: Span, kind: int) -> dict:
+            """Encodes a single span."""
+            return {
+                "traceId": self.trace_id,
+                "spanId": span.span_id,
+                "parentSpanId": span.parent_id or "",
+                "name": span.name,
+                "kind": kind,
+                "startTimeUnixNano": str(span.start + offset),
+                "endTimeUnixNano": str(span.end + offset),
+                "attributes": [{"key": key, "value": {"stringValue": str(value)}}
+                               for key, value in span.attributes.items()],
+            }
+
+        return [encode(self.root, kind=2)] + [encode(span, kind=1) for span in self.spans]
+
+
+def current_trace() -> Optional[Trace]:
+    """Gets the trace of the request that is being processed.
+
+    Returns:
+        Trace:
+        Trace of the current request, or ``None`` outside a traced request.
+    """
+    return _current.get()
+
+
+@contextmanager
+def stage(name: str, **attributes):
+    """Times a stage of the current request, does nothing when the request is not traced.
+
+    Args:
+        name: Name of the stage, used as the metric name in the ``Server-Timing`` header.
+        **attributes: Additional attributes exported along with the span.
+    """
+    if (trace := _current.get()) is None:
+        yield
+        return
+    start = time.perf_counter_ns()
+    if not trace.spans:
+        parse = Span(name="parse", parent_id=trace.root.span_id, start=trace.root.start)
+        parse.end = start
+        trace.spans.append(parse)
+    span = Span(name=name, parent_id=trace.stack[-1], start=start, attributes=attributes)
+    trace.stack.append(span.span_id)
+    try:
+        yield span
+    finally:
+        span.end = time.perf_counter_ns()
+        trace.stack.pop()
+        trace.spans.append(span)
+
+
+def timed(name: str) -> Callable:
+    """Decorator that times a coroutine as a stage of the current request.
+
+    Args:
+        name: Name of the stage.
+
+    Returns:
+        Callable:
+        Decorator for the coroutine.
+    """
+    def decorator(func: Callable) -> Callable:
+        """Wraps the coroutine."""
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            """Runs the coroutine within a stage."""
+            with stage(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TracingMiddleware:
+    """ASGI middleware that traces every request and adds the ``Server-Timing`` header to the response.
+
+    >>> TracingMiddleware
+
+    """
+
+    def __init__(self, app: ASGIApp):
+        """Instantiates the middleware.
+
+        Args:
+            app: ASGI application that is wrapped.
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Runs the request within a trace and hands the finished trace over to the registered hooks."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trace = Trace(name=f"{scope['method']} {scope['path']}",
+                      attributes={"http.method": scope["method"], "http.target": scope["path"]})
+        token = _current.set(trace)
+
+        async def send_wrapper(message: Message) -> None:
+            """Adds the ``Server-Timing`` header when the response starts."""
+            if message["type"] == "http.response.start":
+                trace.root.attributes["http.status_code"] = message["status"]
+                MutableHeaders(scope=message).append("Server-Timing", trace.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            trace.finish()
+            _current.reset(token)
+            for hook in HOOKS:
+                hook(trace)
+
+
+class OTLPExporter:
+    """Exports the sampled traces to an OpenTelemetry collector over OTLP/HTTP with JSON encoding.
+
+    >>> OTLPExporter
+
+    """
+
+    def __init__(self, endpoint: str, sample_rate: float = 1.0, batch_size: int = 512, interval: float = 1.0,
+                 service_name: str = "filehandler"):
+        """Instantiates the exporter.
+
+        Args:
+            endpoint: Base url of the collector, for example ``http://localhost:4318``
+            sample_rate: Fraction of the traces that are exported.
+            batch_size: Maximum number of traces per request to the collector.
+            interval: Maximum number of seconds a trace waits before it is exported.
+            service_name: Value of the ``service.name`` resource attribute.
+        """
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.sample_rate = sample_rate
+        self.batch_size = batch_size
+        self.interval = interval
+        self.service_name = service_name
+        self.queue = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.running = False
+
+    def __call__(self, trace: Trace) -> None:
+        """Queues a finished trace if it is sampled."""
+        if self.sample_rate >= 1 or random.random() < self.sample_rate:
+            self.queue.put(trace)
+
+    def start(self) -> None:
+        """Starts the background thread that exports the traces."""
+        self.running = True
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Stops the background thread after exporting the pending traces."""
+        self.running = False
+        self.queue.put(None)
+        self.thread.join(timeout=5)
+
+    def _run(self) -> None:
+        """Collects traces into batches and posts them to the collector."""
+        while self.running:
+            batch = []
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.batch_size and (timeout := deadline - time.monotonic()) > 0:
+                try:
+                    if (trace := self.queue.get(timeout=timeout)) is None:
+                        break
+                except queue.Empty:
+                    break
+                batch.append(trace)
+            if batch:
+                self.export(traces=batch)
+
+    def export(self, traces: list[Trace]) -> None:
+        """Posts a batch of traces to the collector.
+
+        Args:
+            traces: Finished traces.
+        """
+        payload = {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{"scope": {"name": __name__}, "spans": [span for trace in traces
+                                                                   for span in trace.to_otlp()]}]
+        }]}
+        request = urllib.request.Request(url=self.url, data=json.dumps(payload).encode(), method="POST",
+                                         headers={"Content-Type": "application/json"})
+        try:
+            urllib.request.urlopen(request, timeout=5).close()
+        except OSError as error:
+            LOGGER.warning(f"Failed to export {len(traces)} traces: {error}")
+
+
+class SamplingProfiler:
+    """Statistical profiler that samples the stack of a thread and aggregates them as collapsed stacks.
+
+    >>> SamplingProfiler
+
+    See Also:
+        The output can be rendered using ``flamegraph.pl`` or `speedscope <https://www.speedscope.app>`__
+    """
+
+    def __init__(self, interval: float, output: str, thread_id: int = None):
+        """Instantiates the profiler.
+
+        Args:
+            interval: Seconds between two samples.
+            output: Path of the file where the collapsed stacks are written.
+            thread_id: Identifier of the thread that is sampled, defaults to the current thread.
+        """
+        self.interval = interval
+        self.output = output
+        self.thread_id = thread_id or threading.get_ident()
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        """Starts sampling in a background thread."""
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Stops sampling and writes the collapsed stacks."""
+        self.stopped.set()
+        self.thread.join(timeout=5)
+        with open(self.output, "w") as f_stream:
+            for stack, count in self.stacks.most_common():
+                f_stream.write(f"{stack} {count}\n")
+
+    def _run(self) -> None:
+        """Samples the stack of the thread until stopped."""
+        while not self.stopped.wait(self.interval):
+            if not (frame := sys._current_frames().get(self.thread_id)):
+                continue
+            stack = []
+            while frame:
+                stack.append(f"{frame.f_code.co_name} ({os.path.basename(frame.f_code.co_filename)})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+
+
+def start_tracing() -> list:
+    """Starts the exporter and the profiler when enabled using env vars.
+
+    Returns:
+        list:
+        Background workers that have to be stopped during shutdown.
+
+    See Also:
+        - ``OTEL_EXPORTER_OTLP_ENDPOINT``: Base url of the OpenTelemetry collector, enables exporting traces.
+        - ``TRACE_SAMPLE_RATE``: Fraction of the traces that are exported, defaults to ``1``
+        - ``PROFILE_INTERVAL_MS``: Enables the sampling profiler with the given interval.
+        - ``PROFILE_OUTPUT``: Path for the collapsed stacks, defaults to ``profile.{pid}.folded``. ``{pid}`` is replaced
+          with the process id, so every worker started with ``--workers`` writes its own file.
+    """
+    workers = []
+    if endpoint := os.environ.get("OTEL_EXPORTER_OTLP_ENDPOINT"):
+        exporter = OTLPExporter(endpoint=endpoint, sample_rate=float(os.environ.get("TRACE_SAMPLE_RATE", 1)))
+        exporter.start()
+        HOOKS.append(exporter)
+        workers.append(exporter)
+    if interval := os.environ.get("PROFILE_INTERVAL_MS"):
+        profiler = SamplingProfiler(interval=float(interval) / 1000,
+                                    output=os.environ.get("PROFILE_OUTPUT", "profile.{pid}.folded").replace(
+                                        "{pid}", str(os.getpid())))
+        profiler.start()
+        workers.append(profiler)
+    return workers
+
+
+def stop_tracing(workers: list) -> None:
+    """Stops the background workers started by ``start_tracing``.
+
+    Args:
+        workers: Exporters and profilers to be stopped.
+    """
+    for worker in workers:
+        if worker in HOOKS:
+            HOOKS.remove(worker)
+        worker.stop()
+    workers.clear()
@@ -0,0 +1,11 @@
+import os
+import sys
+
+# Tests import the models from the repository root, without the package being installed
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("APIKEY", "test-apikey")
+os.environ.setdefault("USER", "test-user")
+os.environ.setdefault("PASSWORD", "test-password")
+os.environ.setdefault("SESSION_SECRET", "test-secret")
+os.environ.setdefault("LOG_JSON", "false")
@@ -0,0 +1,74 @@
+import logging
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import create_app
+from models.filters import APIKeyFilter, EndpointFilter
+from models.secrets import Secrets
+
+
+@pytest.fixture
+def directory(tmp_path) -> str:
+    """Directory with a file to be listed."""
+    (tmp_path / "a.txt").write_text("a")
+    return str(tmp_path)
+
+
+def test_unsupported_mode():
+    """Only the known authentication modes are accepted."""
+    with pytest.raises(ValueError):
+        create_app(auth_mode="token")
+
+
+def test_filters_are_added_once():
+    """Creating more apps in the same process does not stack the access log filters."""
+    for _ in range(3):
+        create_app(auth_mode="apikey")
+    filters = logging.getLogger("uvicorn.access").filters
+    assert [type(f) for f in filters].count(EndpointFilter) == 1
+    assert [type(f) for f in filters].count(APIKeyFilter) == 1
+
+
+def test_apikey(directory):
+    """Credentials are sent as a form field, so the endpoints that read data use ``POST``."""
+    client = TestClient(create_app(auth_mode="apikey"))
+    response = client.post("/list-directory/", params={"FilePath": directory}, data={"apikey": os.environ["APIKEY"]})
+    assert response.status_code == 200 and "a.txt" in response.text
+    assert client.post("/list-directory/", params={"FilePath": directory},
+                       data={"apikey": "wrong"}).status_code == 401
+    assert client.get("/list-directory/", params={"FilePath": directory}).status_code == 405
+
+
+def test_server(directory):
+    """Bearer tokens are issued for the server's credentials, and accepted until they expire."""
+    client = TestClient(create_app(auth_mode="server"))
+    assert client.post("/authenticator/", data={"username": Secrets.USERNAME,
+                                                "password": "wrong"}).status_code == 401
+    token = client.post("/authenticator/", data={"username": Secrets.USERNAME,
+                                                 "password": Secrets.PASSWORD}).json()["access_token"]
+    response = client.get("/list-directory/", params={"FilePath": directory},
+                          headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200 and "a.txt" in response.text
+    assert client.get("/list-directory/", params={"FilePath": directory},
+                      headers={"Authorization": "Bearer wrong"}).status_code == 401
+
+
+def test_basic():
+    """The browser uploader authenticates with http basic auth, and the rest of the API is not served."""
+    client = TestClient(create_app(auth_mode="basic"))
+    assert client.get("/session/", auth=(Secrets.USERNAME, Secrets.PASSWORD)).status_code == 200
+    assert client.get("/session/", auth=(Secrets.USERNAME, "wrong")).status_code == 401
+    assert client.get("/", follow_redirects=False).headers["location"] == "/login"
+    assert client.post("/list-directory/").status_code == 404
+
+
+@pytest.mark.parametrize("path", ["/metrics/cache/", "/metrics/replication/"])
+def test_metrics_require_authentication(path):
+    """Metrics take the same credentials as the rest of the API."""
+    client = TestClient(create_app(auth_mode="basic"))
+    assert client.get(path).status_code == 401
+    assert client.get(path, auth=(Secrets.USERNAME, Secrets.PASSWORD)).status_code == 200
+    client = TestClient(create_app(auth_mode="apikey"))
+    assert client.post(path, data={"apikey": "wrong"}).status_code == 401
@@ -0,0 +1,52 @@
+import gzip
+
+import pytest
+from fastapi.exceptions import HTTPException
+
+from models.assets import AssetStore
+
+
+@pytest.fixture
+def store(tmp_path) -> AssetStore:
+    """Asset store with a single html file."""
+    (tmp_path / "upload.html").write_text("<html>" + "upload " * 100 + "</html>")
+    (tmp_path / ".hidden").write_text("hidden")
+    return AssetStore(source_dir=str(tmp_path))
+
+
+def test_hashed_name(store, tmp_path):
+    """Assets are served under a name that changes with their content."""
+    url = store.url(file_name="upload.html")
+    assert url.startswith("/static/upload.") and url.endswith(".html")
+    (tmp_path / "upload.html").write_text("<html>changed</html>")
+    assert AssetStore(source_dir=str(tmp_path)).url(file_name="upload.html") != url
+    assert len(store.assets) == 1
+
+
+def test_negotiates_encoding(store):
+    """The gzip variant is sent when the client accepts it, and the identity otherwise."""
+    name = store.names["upload.html"]
+    compressed = store.response(name=name, accept_encoding="gzip, deflate")
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(compressed.body) == store.assets[name].content
+    assert compressed.headers["Cache-Control"] == "private, max-age=31536000, immutable"
+    plain = store.response(name=name, accept_encoding="gzip;q=0")
+    assert "Content-Encoding" not in plain.headers
+    assert plain.body == store.assets[name].content
+
+
+def test_not_modified(store):
+    """A request with the ETag of the same variant gets a 304 without a body."""
+    name = store.names["upload.html"]
+    etag = store.response(name=name, accept_encoding="gzip").headers["ETag"]
+    cached = store.response(name=name, accept_encoding="gzip", if_none_match=f"W/{etag}")
+    assert cached.status_code == 304 and not cached.body
+    # The ETag differs per encoding, so a cached gzip variant does not match the identity
+    assert store.response(name=name, if_none_match=etag).status_code == 200
+
+
+def test_unknown_asset(store):
+    """Names that are not hashed assets are not found."""
+    with pytest.raises(HTTPException) as error:
+        store.response(name="upload.html")
+    assert error.value.status_code == 404
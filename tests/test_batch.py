@@ -0,0 +1,76 @@
+import asyncio
+import os
+
+import pytest
+from fastapi import HTTPException
+
+from models.classes import BatchHandler, MoveHandler
+from models.executor import Executor
+
+
+@pytest.fixture
+def root(tmp_path) -> str:
+    """Upload root with nested, hidden and outside files."""
+    (tmp_path / "outside.txt").write_text("outside")
+    root = tmp_path / "uploads"
+    (root / "logs" / "old").mkdir(parents=True)
+    (root / "logs" / "a.log").write_text("a")
+    (root / "logs" / "old" / "b.log").write_text("b")
+    (root / "logs" / "c.txt").write_text("c")
+    (root / ".journal").mkdir()
+    (root / ".journal" / "transfers.log").write_text("journal")
+    (root / "escape").symlink_to(tmp_path / "outside.txt")
+    return str(root)
+
+
+def delete(root: str, **kwargs) -> dict:
+    """Runs a batch delete and maps every path to its result."""
+    response = asyncio.run(Executor().execute_batch_delete(argument=BatchHandler(**kwargs), root=root))
+    return {result["path"]: result.get("deleted") for result in response["results"]}
+
+
+def move(root: str, sources: list[str], destinations: list[str]) -> list[dict]:
+    """Runs a batch move."""
+    argument = MoveHandler(Sources=sources, Destinations=destinations)
+    return asyncio.run(Executor().execute_batch_move(argument=argument, root=root))["results"]
+
+
+def test_parent_traversal(root):
+    """Paths that climb out of the root are rejected, and the file outside is left alone."""
+    assert delete(root, Paths=["../outside.txt", "logs/../../outside.txt"]) == {
+        "../outside.txt": False, "logs/../../outside.txt": False
+    }
+    assert os.path.isfile(os.path.join(os.path.dirname(root), "outside.txt"))
+
+
+def test_symlink_escape(root):
+    """A symlink within the root that points outside of it is rejected, for both delete and move."""
+    assert delete(root, Paths=["escape"]) == {"escape": False}
+    assert not move(root, sources=["escape"], destinations=["logs/escape.txt"])[0]["moved"]
+    assert not move(root, sources=["logs/a.log"], destinations=["escape"])[0]["moved"]
+    assert os.path.isfile(os.path.join(os.path.dirname(root), "outside.txt"))
+
+
+def test_hidden_files(root):
+    """Dot files and directories such as the journal are never touched, even when a pattern matches them."""
+    assert delete(root, Paths=[".journal/transfers.log"]) == {".journal/transfers.log": False}
+    assert delete(root, Pattern="**/*.log") == {"logs/a.log": True, "logs/old/b.log": True}
+    assert os.path.isfile(os.path.join(root, ".journal", "transfers.log"))
+    assert not move(root, sources=["logs/c.txt"], destinations=[".hidden/c.txt"])[0]["moved"]
+
+
+def test_glob_pattern(root):
+    """Patterns are matched recursively within the root, and patterns that leave the root are refused."""
+    assert delete(root, Pattern="logs/*.log") == {"logs/a.log": True}
+    assert os.path.isfile(os.path.join(root, "logs", "old", "b.log"))
+    for pattern in ("../*.txt", os.path.join(os.path.dirname(root), "*.txt")):
+        with pytest.raises(HTTPException) as error:
+            delete(root, Pattern=pattern)
+        assert error.value.status_code == 400
+
+
+def test_move(root):
+    """Files are moved within the root, and a missing source is reported without failing the batch."""
+    results = move(root, sources=["logs/a.log", "missing.txt"], destinations=["archive/a.log", "b.txt"])
+    assert [result["moved"] for result in results] == [True, False]
+    assert os.path.isfile(os.path.join(root, "archive", "a.log"))
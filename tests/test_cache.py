@@ -0,0 +1,109 @@
+import asyncio
+import os
+
+import pytest
+from fastapi.responses import StreamingResponse
+
+from models.cache import ContentCache
+from models.cache import cache as executor_cache
+from models.classes import DownloadHandler
+from models.executor import Executor
+
+
+@pytest.fixture
+def cache() -> ContentCache:
+    """Cache that holds at most two small files."""
+    return ContentCache(max_bytes=10, max_entry_bytes=5, stat_ttl=60)
+
+
+def get(cache: ContentCache, path: str):
+    """Gets a file through the cache."""
+    return asyncio.run(cache.get(path=path, stat_result=cache.stat(path=path)))
+
+
+def test_hit_and_miss(cache, tmp_path):
+    """The first read is a miss, and the next one is served from memory."""
+    (path := tmp_path / "a").write_bytes(b"hello")
+    assert get(cache, str(path)) == b"hello"
+    assert get(cache, str(path)) == b"hello"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_large_files_are_not_cached(cache, tmp_path):
+    """Files above the entry limit are left to be streamed."""
+    (path := tmp_path / "a").write_bytes(b"too large")
+    assert get(cache, str(path)) is None
+    assert not cache.entries
+
+
+def test_lru_eviction(cache, tmp_path):
+    """The least recently used file is evicted once the byte budget is exceeded."""
+    for name in "abc":
+        (tmp_path / name).write_bytes(b"12345")
+    get(cache, str(tmp_path / "a"))
+    get(cache, str(tmp_path / "b"))
+    get(cache, str(tmp_path / "a"))
+    get(cache, str(tmp_path / "c"))
+    assert set(cache.entries) == {str(tmp_path / "a"), str(tmp_path / "c")}
+    assert cache.evictions == 1 and cache.size == 10
+
+
+def test_invalidate(cache, tmp_path):
+    """A file that was deleted or rewritten is not served from the cached stat or content."""
+    (path := tmp_path / "a").write_bytes(b"hello")
+    get(cache, str(path))
+    os.remove(path)
+    # The stat is reused for the TTL, so the deleted file would still be found without invalidating it
+    assert cache.stat(path=str(path)) is not None
+    cache.invalidate(path=str(path))
+    assert cache.stat(path=str(path)) is None and not cache.entries
+    path.write_bytes(b"world")
+    cache.invalidate(path=str(path))
+    assert get(cache, str(path)) == b"world"
+
+
+def test_changed_version_is_a_miss(cache, tmp_path):
+    """A cached entry is only used while the modified time and size match."""
+    (path := tmp_path / "a").write_bytes(b"hello")
+    get(cache, str(path))
+    path.write_bytes(b"hi")
+    cache.invalidate(path=str(path))
+    assert get(cache, str(path)) == b"hi"
+    assert cache.misses == 2 and cache.size == 2
+
+
+async def download(path, range_header: str = None) -> tuple:
+    """Downloads a file through the executor, and collects the body."""
+    response = await Executor().execute_download_file(
+        argument=DownloadHandler(FileName=path.name, FilePath=str(path.parent)), range_header=range_header
+    )
+    if isinstance(response, StreamingResponse):
+        return response, b"".join([chunk async for chunk in response.body_iterator])
+    return response, response.body
+
+
+def test_download_rewritten_by_another_worker(tmp_path, monkeypatch):
+    """A file rewritten without an invalidation is streamed with the headers of the new version."""
+    monkeypatch.setattr(executor_cache, "max_entry_bytes", 4)
+    monkeypatch.setattr(executor_cache, "stat_ttl", 60)
+    (path := tmp_path / "a.bin").write_bytes(b"original")
+    response, content = asyncio.run(download(path))
+    assert content == b"original" and response.headers["Content-Length"] == "8"
+    path.write_bytes(b"rewritten content")
+    response, content = asyncio.run(download(path))
+    assert content == b"rewritten content" and response.headers["Content-Length"] == "17"
+    response, content = asyncio.run(download(path, range_header="bytes=10-"))
+    assert content == b"content" and response.headers["Content-Range"] == "bytes 10-16/17"
+
+
+def test_download_from_memory(tmp_path, monkeypatch):
+    """A cached file is served with the stat that its content was cached for."""
+    monkeypatch.setattr(executor_cache, "stat_ttl", 60)
+    (path := tmp_path / "a.txt").write_bytes(b"hello")
+    response, content = asyncio.run(download(path))
+    path.write_bytes(b"hi")
+    response, content = asyncio.run(download(path, range_header="bytes=1-"))
+    assert content == b"ello" and response.status_code == 206
+    assert response.headers["Content-Range"] == "bytes 1-4/5" and response.headers["Content-Length"] == "4"
+    executor_cache.invalidate(path=str(path))
+    assert asyncio.run(download(path))[1] == b"hi"
@@ -0,0 +1,74 @@
+import io
+import os
+import threading
+import time
+from collections.abc import Iterator
+
+import pytest
+import uvicorn
+
+from app import create_app
+from client.api import ClientError, FileHandlerClient, multipart
+
+
+@pytest.fixture(scope="module")
+def url() -> Iterator[str]:
+    """Serves the apikey app on a free port, since the client talks to it over its own connections."""
+    server = uvicorn.Server(uvicorn.Config(create_app(auth_mode="apikey"), host="127.0.0.1", port=0,
+                                           lifespan="off", log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    yield f"http://127.0.0.1:{server.servers[0].sockets[0].getsockname()[1]}"
+    server.should_exit = True
+    thread.join()
+
+
+@pytest.fixture
+def client(url) -> Iterator[FileHandlerClient]:
+    """Client that downloads the files larger than 4 KB in segments."""
+    with FileHandlerClient(url=url, apikey=os.environ["APIKEY"], segment_size=4096, retries=0) as client:
+        yield client
+
+
+def test_upload_and_download(client, tmp_path):
+    """A file uploaded to a directory is listed, and downloaded back in segments."""
+    (remote := tmp_path / "remote").mkdir()
+    (local := tmp_path / "data.bin").write_bytes(os.urandom(10_000))
+    client.upload_file(path=str(local), remote_dir=str(remote))
+    assert client.list_directory(remote_dir=str(remote))["files"] == ["data.bin"]
+    result = client.download_file(name="data.bin", remote_dir=str(remote), local_path=str(tmp_path / "copy.bin"))
+    assert result["segments"] == 3
+    assert (tmp_path / "copy.bin").read_bytes() == local.read_bytes()
+    assert not os.path.exists(tmp_path / "copy.bin.part")
+
+
+def test_sync(client, tmp_path):
+    """A changed file is patched on the server, and a new one is uploaded whole."""
+    (remote := tmp_path / "remote").mkdir()
+    (local := tmp_path / "log.txt").write_bytes(b"line\n" * 10_000)
+    client.sync_file(path=str(local), remote_dir=str(remote))
+    local.write_bytes(b"line\n" * 5_000 + b"changed\n" + b"line\n" * 5_000)
+    client.sync_file(path=str(local), remote_dir=str(remote))
+    assert (remote / "log.txt").read_bytes() == local.read_bytes()
+
+
+def test_errors(client, tmp_path):
+    """Errors from the server are raised with the status code, and a wrong apikey is refused."""
+    with pytest.raises(ClientError) as error:
+        client.download_file(name="missing.txt", remote_dir=str(tmp_path), local_path=str(tmp_path / "missing.txt"))
+    assert error.value.status == 404
+    client.apikey = "wrong"
+    with pytest.raises(ClientError) as error:
+        client.list_directory(remote_dir=str(tmp_path))
+    assert error.value.status == 401
+
+
+def test_multipart_escapes_names():
+    """Quotes and line breaks in a file name cannot end the header of its part."""
+    content_type, length, chunks = multipart(fields={"apikey": "key"},
+                                             files=[("data", 'a"b\r\nX-Injected: 1.txt', io.BytesIO(b"abc"), 3)])
+    body = b"".join(chunks)
+    assert len(body) == length and b"\r\nX-Injected" not in body
+    assert b'filename="a%22b%0D%0AX-Injected: 1.txt"\r\n' in body
@@ -0,0 +1,68 @@
+import hashlib
+import io
+import os
+
+import pytest
+
+from models.delta import apply_delta, signature, write_delta
+
+
+def rebuild(base: str, new: str, target: str, checksum: str = None) -> dict:
+    """Creates the delta of a new version against a base, and rebuilds the new version from it."""
+    sig = signature(path=base)
+    data = io.BytesIO()
+    instructions = write_delta(sig=sig, path=new, data=data)
+    data.seek(0)
+    return apply_delta(base=base, target=target, block_size=sig["block_size"], instructions=instructions,
+                       data=data, checksum=checksum)
+
+
+def test_unchanged_blocks_are_reused(tmp_path):
+    """Inserting bytes in the middle of a file resends only the blocks around the insert."""
+    content = os.urandom(256 * 1024)
+    base, new, target = tmp_path / "base", tmp_path / "new", tmp_path / "target"
+    base.write_bytes(content)
+    new.write_bytes(content[:100_000] + b"inserted" + content[100_000:])
+    result = rebuild(base=str(base), new=str(new), target=str(target),
+                     checksum=hashlib.sha256(new.read_bytes()).hexdigest())
+    assert target.read_bytes() == new.read_bytes()
+    assert result["received"] < 16 * 1024
+    assert result["reused"] + result["received"] == result["size"] == len(content) + 8
+
+
+def test_without_base(tmp_path):
+    """A file without an older version is sent entirely as literal data."""
+    new, target = tmp_path / "new", tmp_path / "target"
+    new.write_bytes(b"hello world")
+    data = io.BytesIO(b"hello world")
+    result = apply_delta(base=None, target=str(target), block_size=4096, instructions=[["data", 11]], data=data)
+    assert target.read_bytes() == b"hello world" and result["received"] == 11
+
+
+@pytest.mark.parametrize("instructions,data", [
+    ([["copy", 99, 1]], b""),
+    ([["copy", -1, 1]], b""),
+    ([["data", 10]], b"short"),
+    ([["move", 0]], b""),
+    ([["data", -1]], b""),
+])
+def test_invalid_delta(tmp_path, instructions, data):
+    """Invalid instructions or short literal data fail without touching the target."""
+    base, target = tmp_path / "base", tmp_path / "target"
+    base.write_bytes(b"x" * 4096)
+    target.write_bytes(b"original")
+    with pytest.raises(ValueError):
+        apply_delta(base=str(base), target=str(target), block_size=4096, instructions=instructions,
+                    data=io.BytesIO(data))
+    assert target.read_bytes() == b"original"
+    assert sorted(os.listdir(tmp_path)) == ["base", "target"]
+
+
+def test_checksum_mismatch(tmp_path):
+    """A rebuilt file that does not match the expected checksum is discarded."""
+    base, new, target = tmp_path / "base", tmp_path / "new", tmp_path / "target"
+    base.write_bytes(os.urandom(8192))
+    new.write_bytes(base.read_bytes() + b"tail")
+    with pytest.raises(ValueError):
+        rebuild(base=str(base), new=str(new), target=str(target), checksum="0" * 64)
+    assert not target.exists()
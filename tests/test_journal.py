@@ -0,0 +1,117 @@
+import json
+import os
+
+import pytest
+
+from models.journal import Transfer, TransferJournal
+
+
+@pytest.fixture
+def root(tmp_path) -> str:
+    """Upload root with an empty journal."""
+    return str(tmp_path)
+
+
+def started(root: str) -> TransferJournal:
+    """Starts a new journal on the upload root, as a worker does on startup."""
+    journal = TransferJournal(checkpoint_bytes=4)
+    journal.start(root=root)
+    return journal
+
+
+def ops(journal: TransferJournal) -> list[str]:
+    """Lists the operations in the journal."""
+    return [entry["op"] for entry in journal.read(offset=0)[0]]
+
+
+def test_interrupted_upload_is_removed(root):
+    """The partial file of an upload that never committed is removed on the next start."""
+    journal = started(root)
+    transfer = journal.begin(path=os.path.join(root, "a.bin"))
+    journal.write(transfer=transfer, content=b"12345678")
+    journal.stop()
+    assert os.path.isfile(transfer.partial)
+    journal = started(root)
+    assert not os.path.exists(transfer.partial) and not os.path.exists(transfer.path)
+    assert ops(journal) == ["open", "begin", "checkpoint", "abort"]
+    journal.stop()
+
+
+def test_renamed_upload_is_committed(root):
+    """An upload that was renamed into place before the crash is journaled as committed."""
+    journal = started(root)
+    transfer = journal.begin(path=os.path.join(root, "a.bin"))
+    journal.write(transfer=transfer, content=b"abc")
+    os.replace(transfer.partial, transfer.path)
+    journal.stop()
+    journal = started(root)
+    commit = journal.read(offset=0)[0][-1]
+    assert commit["op"] == "commit" and commit["size"] == 3
+    journal.stop()
+
+
+def test_uploads_of_running_workers_are_kept(root):
+    """A worker that starts leaves the open transfers of the other workers alone."""
+    transfer = Transfer(path=os.path.join(root, "a.bin"))
+    with open(transfer.partial, "wb") as f_stream:
+        f_stream.write(b"in progress")
+    entries = [{"op": "open", "id": "journal"},
+               {"op": "begin", "id": transfer.id, "path": transfer.path, "time": transfer.started, "owner": None,
+                "pid": os.getppid()}]
+    os.makedirs(os.path.join(root, ".journal"))
+    with open(os.path.join(root, ".journal", "transfers.log"), "w") as f_stream:
+        f_stream.write("".join(json.dumps(entry) + "\n" for entry in entries))
+    journal = started(root)
+    assert os.path.isfile(transfer.partial)
+    assert ops(journal) == ["open", "begin"]
+    # The rotation carries the transfer over, so it can still be recovered once that worker stops
+    journal.rotate()
+    assert ops(journal) == ["open", "begin"]
+    journal.stop()
+
+
+def test_damaged_entries_are_skipped(root):
+    """A corrupt line is skipped and a partial line at the end is truncated, instead of failing the start."""
+    journal = started(root)
+    journal.stop()
+    with open(os.path.join(root, ".journal", "transfers.log"), "ab") as f_stream:
+        f_stream.write(b'not json\n{"op": "delete", "path": "/a"}\n{"op": "del')
+    journal = started(root)
+    assert ops(journal) == ["open", "delete"]
+    journal.stop()
+
+
+def test_failed_run_is_aborted(root):
+    """A transfer whose writer fails is aborted, and the target is left untouched."""
+    journal = started(root)
+    target = os.path.join(root, "a.bin")
+    with open(target, "wb") as f_stream:
+        f_stream.write(b"original")
+
+    def fail(transfer: Transfer) -> None:
+        """Writes part of the file and fails."""
+        with open(transfer.partial, "wb") as partial:
+            partial.write(b"partial")
+        raise ValueError("failed")
+
+    with pytest.raises(ValueError):
+        journal.run(path=target, func=fail)
+    with open(target, "rb") as f_stream:
+        assert f_stream.read() == b"original"
+    assert sorted(os.listdir(root)) == [".journal", "a.bin"]
+    assert ops(journal) == ["open", "begin", "abort"]
+    journal.stop()
+
+
+def test_rotation_by_another_worker(root):
+    """A worker follows the entries of the others, including those from before another worker rotated."""
+    first, second = started(root), started(root)
+    first.deleted(path=os.path.join(root, "a"))
+    second.rotate()
+    assert [entry["op"] for entry in second.take()] == ["delete"]
+    first.moved(source=os.path.join(root, "b"), destination=os.path.join(root, "c"))
+    first.follow()
+    assert [entry["op"] for entry in first.take()] == ["delete", "open", "move"]
+    assert first.id == second.id
+    first.stop()
+    second.stop()
@@ -0,0 +1,84 @@
+import pytest
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+from models.limits import (MultipartScanner, UploadLimitMiddleware,
+                           UploadLimits, UploadRejected)
+
+
+def body(files: list[tuple[str, bytes]], boundary: str = "boundary") -> bytes:
+    """Builds a multipart body with a part for every file."""
+    parts = [f'--{boundary}\r\nContent-Disposition: form-data; name="data"; filename="{name}"\r\n\r\n'.encode() +
+             content + b"\r\n" for name, content in files]
+    return b"".join(parts) + f"--{boundary}--\r\n".encode()
+
+
+def scan(content: bytes, limits: UploadLimits, chunk_size: int) -> MultipartScanner:
+    """Feeds a body to a scanner in chunks of the given size."""
+    scanner = MultipartScanner(boundary=b"boundary", limits=limits)
+    for start in range(0, len(content), chunk_size):
+        scanner.feed(chunk=content[start:start + chunk_size])
+    return scanner
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 65536])
+def test_counts_parts_across_chunks(chunk_size):
+    """Delimiters split across chunks are still found."""
+    scanner = scan(body([("a.txt", b"a" * 100), ("b.txt", b"b" * 100)]), UploadLimits(), chunk_size=chunk_size)
+    assert scanner.parts == 2 and scanner.state == "done"
+
+
+@pytest.mark.parametrize("limits,files,status_code", [
+    (UploadLimits(MaxParts=2), [("a.txt", b"a"), ("b.txt", b"b"), ("c.txt", b"c")], 413),
+    (UploadLimits(MaxPartSize=10), [("a.txt", b"a" * 11)], 413),
+    (UploadLimits(AllowedExtensions=[".txt"]), [("a.exe", b"a")], 415),
+    (UploadLimits(FilenamePattern=r"[a-z]+\.txt"), [("A1.txt", b"a")], 400),
+    (UploadLimits(MaxFilenameLength=5), [("abcdef.txt", b"a")], 400),
+])
+def test_rejects(limits, files, status_code):
+    """Bodies that violate a limit are rejected with the matching status code."""
+    with pytest.raises(UploadRejected) as error:
+        scan(body(files), limits, chunk_size=3)
+    assert error.value.status_code == status_code
+
+
+def test_middleware():
+    """The middleware answers with the rejection before the app stores anything."""
+    stored = []
+    app = FastAPI()
+
+    @app.post("/upload/")
+    async def upload(data: list[UploadFile] = File(...)) -> dict:
+        """Records the names of the files that reached the app."""
+        stored.extend(file.filename for file in data)
+        return {"stored": len(data)}
+
+    app.add_middleware(UploadLimitMiddleware, limits=UploadLimits(MaxParts=2, AllowedExtensions=[".txt"]))
+    client = TestClient(app)
+    headers = {"Content-Type": "multipart/form-data; boundary=boundary"}
+    assert client.post("/upload/", content=body([("a.txt", b"a")]), headers=headers).json() == {"stored": 1}
+    response = client.post("/upload/", content=body([("a.txt", b"a"), ("b.txt", b"b"), ("c.txt", b"c")]),
+                           headers=headers)
+    assert response.status_code == 413
+    response = client.post("/upload/", content=body([("a.sh", b"a")]), headers=headers)
+    assert response.status_code == 415
+    assert stored == ["a.txt"]
+
+
+def test_middleware_stops_the_app():
+    """Once the body is rejected, the app stops where it reads the body and does not attempt a second response."""
+    attempts = []
+
+    async def app(scope, receive, send) -> None:
+        """Reads the whole body, and answers with a 400 if the client disconnected like the body parsing does."""
+        while (message := await receive())["type"] == "http.request" and message.get("more_body"):
+            pass
+        status_code = 400 if message["type"] == "http.disconnect" else 200
+        attempts.append(status_code)
+        await send({"type": "http.response.start", "status": status_code, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    client = TestClient(UploadLimitMiddleware(app, limits=UploadLimits(AllowedExtensions=[".txt"])))
+    response = client.post("/upload/", content=body([("a.sh", b"a")]),
+                           headers={"Content-Type": "multipart/form-data; boundary=boundary"})
+    assert response.status_code == 415 and attempts == []
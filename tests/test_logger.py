@@ -0,0 +1,39 @@
+import logging
+
+import pytest
+
+from models.config import LogConfig
+from models.logger import start_logging, stop_logging
+
+
+@pytest.fixture
+def listeners() -> list:
+    """Listeners started by a test, stopped once it is done."""
+    started = []
+    yield started
+    stop_logging(listeners=started)
+
+
+def test_only_access_logs_are_sampled(capsys, listeners):
+    """Access log records are sampled, while application records below ``WARNING`` are all written."""
+    listeners.extend(start_logging(config=LogConfig(SAMPLE_RATE=3)))
+    for index in range(6):
+        logging.getLogger("LOGGER").info(f"application {index}")
+        logging.getLogger("uvicorn.access").info('%s - "%s %s HTTP/%s" %d', "127.0.0.1", "GET", f"/{index}", "1.1",
+                                                 200)
+    logging.getLogger("uvicorn.access").warning("access warning")
+    stop_logging(listeners=listeners)
+    captured = capsys.readouterr()
+    assert all(f"application {index}" in captured.err for index in range(6))
+    assert captured.out.count("GET /") == 2 and "access warning" in captured.out
+
+
+def test_stop_restores_the_handlers(capsys, listeners):
+    """Records logged after the listeners stopped are written by the original handlers, instead of a queue."""
+    logger = logging.getLogger("LOGGER")
+    listeners.extend(start_logging(config=LogConfig()))
+    originals = listeners[0].handlers
+    stop_logging(listeners=listeners)
+    assert tuple(logger.handlers) == originals
+    logger.info("after shutdown")
+    assert "after shutdown" in capsys.readouterr().err
@@ -0,0 +1,101 @@
+import asyncio
+import io
+import json
+import struct
+import zlib
+
+import pytest
+from fastapi import HTTPException
+from fastapi.responses import FileResponse
+
+from models.classes import PreviewHandler
+from models.executor import Executor
+from models.preview import previews
+
+
+@pytest.fixture(scope="module", autouse=True)
+def pool():
+    """Stops the worker processes once the previews were tested."""
+    yield
+    previews.shutdown()
+
+
+@pytest.fixture
+def root(tmp_path, monkeypatch) -> str:
+    """Upload root where the previews are stored."""
+    monkeypatch.setattr(previews, "digests", {})
+    monkeypatch.setattr(previews, "root", None)
+    monkeypatch.setattr(previews, "index", None)
+    previews.start(root=str(tmp_path))
+    return str(tmp_path)
+
+
+def image(width: int, height: int) -> bytes:
+    """Creates a PNG image."""
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), color="red").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def preview(root: str, name: str, if_none_match: str = None, **kwargs):
+    """Gets the preview of a file in the root."""
+    argument = PreviewHandler(FileName=name, FilePath=root, **kwargs)
+    return asyncio.run(Executor().execute_preview(argument=argument, if_none_match=if_none_match))
+
+
+def test_image(root):
+    """Images are downsized to fit within the requested size."""
+    Image = pytest.importorskip("PIL.Image")
+    with open(f"{root}/photo.png", "wb") as f_stream:
+        f_stream.write(image(width=400, height=200))
+    response = preview(root, "photo.png", Width=100, Height=100)
+    assert isinstance(response, FileResponse) and response.media_type == "image/jpeg"
+    with Image.open(response.path) as thumbnail:
+        assert thumbnail.size == (100, 50)
+
+
+def test_text(root):
+    """Text files are previewed with the first and last lines."""
+    with open(f"{root}/notes.txt", "w") as f_stream:
+        f_stream.write("\n".join(str(line) for line in range(100)))
+    response = preview(root, "notes.txt", Lines=2)
+    with open(response.path) as f_stream:
+        snippet = json.load(f_stream)
+    assert (snippet["head"], snippet["tail"], snippet["truncated"]) == (["0", "1"], ["98", "99"], True)
+
+
+@pytest.mark.parametrize("name,content", [("archive.zip", b"PK\x03\x04"), ("data.txt", b"\0binary")])
+def test_unsupported(root, name, content):
+    """Files of other types and binary content are refused."""
+    with open(f"{root}/{name}", "wb") as f_stream:
+        f_stream.write(content)
+    with pytest.raises(HTTPException) as error:
+        preview(root, name)
+    assert error.value.status_code == 415
+
+
+def test_decompression_bomb(root):
+    """Images that claim more pixels than Pillow decodes safely are refused before they are decoded."""
+    pytest.importorskip("PIL")
+    content = bytearray(image(width=16, height=16))
+    # The IHDR chunk follows the 8 byte signature and its own length and type, and is followed by its checksum
+    content[16:24] = struct.pack(">II", 20000, 20000)
+    content[29:33] = struct.pack(">I", zlib.crc32(bytes(content[12:29])))
+    with open(f"{root}/bomb.png", "wb") as f_stream:
+        f_stream.write(content)
+    with pytest.raises(HTTPException) as error:
+        preview(root, "bomb.png")
+    assert error.value.status_code == 413
+
+
+def test_conditional_requests(root):
+    """Every variant of a preview has its own ETag, and a matching ETag gets an empty 304."""
+    with open(f"{root}/notes.txt", "w") as f_stream:
+        f_stream.write("a\nb\nc\n")
+    etag = preview(root, "notes.txt", Lines=1).headers["ETag"]
+    assert preview(root, "notes.txt", Lines=2).headers["ETag"] != etag
+    assert preview(root, "notes.txt", if_none_match=etag, Lines=1).status_code == 304
+    assert preview(root, "notes.txt", if_none_match=f'W/{etag}, "other"', Lines=1).status_code == 304
+    assert preview(root, "notes.txt", if_none_match=etag, Lines=2).status_code == 200
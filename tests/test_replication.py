@@ -0,0 +1,125 @@
+import asyncio
+import json
+import os
+
+import pytest
+from starlette.testclient import TestClient
+
+from models.replication import ReplicationMiddleware, Replicator, _replicated
+
+
+@pytest.fixture
+def shipped() -> list[str]:
+    """Paths shipped to the peer, in order."""
+    return []
+
+
+def session(root: str, shipped: list[str], paths: list[str]) -> None:
+    """Starts a replicator, records a put for every path, and stops it once the peer acknowledged them."""
+    async def run() -> None:
+        """Runs the replicator until the peer caught up."""
+        replicator = Replicator(peers=["http://127.0.0.1:9"], secret="secret")
+
+        def ship(client, entries: list[dict]) -> int:
+            """Acknowledges the entries without sending them anywhere."""
+            shipped.extend(entry["path"] for entry in entries)
+            return 0
+
+        replicator.ship = ship
+        await replicator.start(root=root)
+        for path in paths:
+            replicator.record(op="put", path=os.path.join(root, path))
+        for _ in range(500):
+            if replicator.peers[0].offset == replicator.journal.tell():
+                break
+            await asyncio.sleep(0.01)
+        await replicator.stop()
+
+    asyncio.run(run())
+
+
+def test_cursor_resumes_after_restart(tmp_path, shipped):
+    """Entries acknowledged before a restart are not shipped again, and new ones continue the sequence."""
+    session(root=str(tmp_path), shipped=shipped, paths=["a", "b"])
+    session(root=str(tmp_path), shipped=shipped, paths=["c"])
+    assert shipped == ["a", "b", "c"]
+    with open(tmp_path / ".replication" / "journal.log") as f_stream:
+        assert f_stream.read().count("\n") == 3
+
+
+def test_changes_outside_the_root_are_skipped(tmp_path, shipped):
+    """Only changes within the upload root are journaled."""
+    session(root=str(tmp_path / "root"), shipped=shipped, paths=["../outside", "inside"])
+    assert shipped == ["inside"]
+
+
+def test_workers_share_the_journal(tmp_path, shipped):
+    """Workers append to a single sequence, and only the one that holds the shipper lock ships it to the peer."""
+    async def run() -> None:
+        """Runs two replicators on the same root, like two workers of a server."""
+        workers = [Replicator(peers=["http://127.0.0.1:9"], secret="secret", poll_interval=0.01) for _ in range(2)]
+        for worker in workers:
+            worker.ship = lambda client, entries: shipped.extend(entry["path"] for entry in entries) or 0
+            await worker.start(root=str(tmp_path))
+        for index in range(6):
+            workers[index % 2].record(op="put", path=str(tmp_path / str(index)))
+        for _ in range(500):
+            if len(shipped) == 6:
+                break
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        for worker in workers:
+            await worker.stop()
+
+    asyncio.run(run())
+    assert shipped == [str(index) for index in range(6)]
+    with open(tmp_path / ".replication" / "journal.log") as f_stream:
+        assert [json.loads(line)["seq"] for line in f_stream] == [1, 2, 3, 4, 5, 6]
+
+
+def test_compaction_waits_for_all_workers(tmp_path):
+    """The journal is not truncated while the entries of another worker are pending, and the sequence continues."""
+    async def run() -> None:
+        """Compacts the journal of one worker while another one appends to it."""
+        shipper = Replicator(peers=["http://127.0.0.1:9"], secret="secret", compact_bytes=1)
+        other = Replicator(peers=["http://127.0.0.1:9"], secret="secret", compact_bytes=1)
+        await shipper.start(root=str(tmp_path))
+        await other.start(root=str(tmp_path))
+        await asyncio.sleep(0)
+        assert shipper.shipping and not other.shipping
+        for task in shipper.tasks[1:]:
+            task.cancel()
+        shipper.record(op="put", path=str(tmp_path / "a"))
+        shipper.peers[0].offset = shipper.size
+        other.record(op="put", path=str(tmp_path / "b"))
+        shipper.compact()
+        assert os.path.getsize(shipper.journal_path) > shipper.peers[0].offset
+        shipper.peers[0].offset = os.path.getsize(shipper.journal_path)
+        shipper.compact()
+        other.record(op="put", path=str(tmp_path / "c"))
+        await shipper.stop()
+        await other.stop()
+
+    asyncio.run(run())
+    with open(tmp_path / ".replication" / "journal.log") as f_stream:
+        assert [(entry["seq"], entry["op"]) for entry in map(json.loads, f_stream)] == [(2, "mark"), (3, "put")]
+
+
+def test_disabled_without_a_secret(tmp_path):
+    """Replication does not start unless the peers share a secret."""
+    replicator = Replicator(peers=["http://127.0.0.1:9"], secret=None)
+    asyncio.run(replicator.start(root=str(tmp_path)))
+    assert not replicator.journal and not os.path.exists(tmp_path / ".replication")
+
+
+@pytest.mark.parametrize("header,replicated", [(None, False), ("1", False), ("secret", True)])
+def test_middleware_requires_the_secret(header, replicated):
+    """Only the requests that carry the shared secret are marked as replicated."""
+    async def app(scope, receive, send) -> None:
+        """Answers with the replicated flag."""
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": str(_replicated.get()).encode()})
+
+    client = TestClient(ReplicationMiddleware(app, secret="secret"))
+    response = client.get("/", headers={"X-Replicated": header} if header else {})
+    assert response.text == str(replicated)
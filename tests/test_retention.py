@@ -0,0 +1,118 @@
+import asyncio
+import os
+import time
+
+import pytest
+from fastapi.exceptions import HTTPException
+from pydantic import ValidationError
+
+from models.retention import RetentionEngine, RetentionPolicy, UsageLedger
+
+
+def engine_for(root, **policy) -> RetentionEngine:
+    """Retention engine for an upload root, without the background sweeper."""
+    engine = RetentionEngine(policy=RetentionPolicy(BatchPause=0, **policy))
+    engine.root = os.path.realpath(root)
+    return engine
+
+
+def stored(engine: RetentionEngine, path: str, size: int, age: float = 0, owner: str = None) -> str:
+    """Writes a file in the upload root and records it, with its modified time set back by its age."""
+    full_path = os.path.join(engine.root, path)
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    with open(full_path, "wb") as f_stream:
+        f_stream.write(b"x" * size)
+    mtime = time.time() - age
+    os.utime(full_path, (mtime, mtime))
+    engine.ledger.add(path=path, size=size, mtime=mtime, owner=owner)
+    return full_path
+
+
+def test_ttl_per_directory():
+    """The TTL of the longest matching directory applies, and the root's TTL covers the rest."""
+    ledger = UsageLedger(policy=RetentionPolicy(TTL={".": 100, "tmp": 10, "tmp/keep": 1000}))
+    now = time.time()
+    for path in ("a", "tmp/b", "tmp/keep/c", "tmp/keep/deeper/d"):
+        ledger.add(path=path, size=1, mtime=now - 50)
+    assert ledger.expired(now=now, limit=10) == ["tmp/b"]
+    assert ledger.expired(now=now + 60, limit=10) == ["a"]
+
+
+def test_eviction_order():
+    """``oldest`` evicts by modified time, ``lru`` by the last download."""
+    for eviction, expected in (("oldest", ["a"]), ("lru", ["b"])):
+        ledger = UsageLedger(policy=RetentionPolicy(MaxFiles=1, Eviction=eviction))
+        ledger.add(path="a", size=1, mtime=1)
+        ledger.add(path="b", size=1, mtime=2)
+        ledger.touch(path="a")
+        assert ledger.evictable(limit=10) == expected
+
+
+def test_invalid_eviction():
+    """An unknown eviction mode is rejected when the policy is loaded."""
+    with pytest.raises(ValidationError):
+        RetentionPolicy(Eviction="newest")
+
+
+def test_quota(tmp_path):
+    """Uploads beyond the owner's quota or the size limit are rejected, replacing a file only counts the change."""
+    engine = engine_for(tmp_path, MaxBytes=100, Quotas={"owner": 10})
+    stored(engine, path="a", size=8, owner="owner")
+    engine.check_quota(path=os.path.join(engine.root, "a"), size=10, owner="owner")
+    with pytest.raises(HTTPException) as error:
+        engine.check_quota(path=os.path.join(engine.root, "b"), size=3, owner="owner")
+    assert error.value.status_code == 507
+    with pytest.raises(HTTPException) as error:
+        engine.check_quota(path=os.path.join(engine.root, "c"), size=101, owner="other")
+    assert error.value.status_code == 413
+    assert engine.usage(owner="owner") == {"bytes": 8, "quota": 10}
+
+
+def test_sweep_expired(tmp_path):
+    """Expired files are deleted from disk and from the ledger."""
+    engine = engine_for(tmp_path, TTL={".": 60})
+    expired = stored(engine, path="old/a", size=1, age=120)
+    fresh = stored(engine, path="new/b", size=1)
+    assert asyncio.run(engine.sweep()) == 1
+    assert not os.path.exists(expired) and os.path.exists(fresh)
+    assert list(engine.ledger.entries) == ["new/b"]
+
+
+def test_sweep_evicts_to_the_limit(tmp_path):
+    """The oldest files are evicted until the usage is within ``MaxBytes``."""
+    engine = engine_for(tmp_path, MaxBytes=25)
+    for index in range(4):
+        stored(engine, path=f"f{index}", size=10, age=100 - index)
+    assert asyncio.run(engine.sweep()) == 2
+    assert sorted(os.listdir(engine.root)) == ["f2", "f3"]
+    assert engine.ledger.total_bytes == 20
+
+
+def test_sweep_skips_rewritten_files(tmp_path):
+    """A file that was written again after the ledger recorded it is tracked again instead of being deleted."""
+    engine = engine_for(tmp_path, TTL={".": 60})
+    path = stored(engine, path="a", size=1, age=120)
+    with open(path, "wb") as f_stream:
+        f_stream.write(b"rewritten")
+    assert asyncio.run(engine.sweep()) == 0
+    assert os.path.exists(path) and engine.ledger.entries["a"].size == 9
+
+
+def test_scan_skips_files_deleted_during_the_walk(tmp_path, monkeypatch):
+    """A file that disappears between listing its directory and the stat is left out of the ledger."""
+    engine = engine_for(tmp_path)
+    for name in ("a", "b"):
+        (tmp_path / name).write_bytes(b"x")
+    stat, deleted = os.stat, []
+
+    def vanishing(path, *args, **kwargs):
+        """Deletes ``a`` right before it is stat'ed."""
+        if os.path.basename(path) == "a" and not deleted:
+            deleted.append(path)
+            os.remove(path)
+        return stat(path, *args, **kwargs)
+
+    monkeypatch.setattr(os, "stat", vanishing)
+    engine.scan()
+    monkeypatch.undo()
+    assert list(engine.ledger.entries) == ["b"]
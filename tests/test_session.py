@@ -0,0 +1,68 @@
+import sys
+import time
+
+import pytest
+
+from models.session import SessionStore, worker_count
+
+
+def test_token_round_trip():
+    """A token issued by one store is accepted by another store with the same secret."""
+    token = SessionStore(ttl=60, secret=b"secret").create(username="user")
+    session = SessionStore(ttl=60, secret=b"secret").get(token=token)
+    assert session and session.username == "user"
+
+
+def test_token_signed_with_another_secret():
+    """A token signed with a different secret is rejected."""
+    token = SessionStore(ttl=60, secret=b"secret").create(username="user")
+    assert SessionStore(ttl=60, secret=b"other").get(token=token) is None
+
+
+def test_tampered_token():
+    """A token whose payload was changed no longer matches its signature."""
+    store = SessionStore(ttl=60, secret=b"secret")
+    payload, signature = store.create(username="user").rsplit(".", 1)
+    forged = SessionStore(ttl=60, secret=b"secret").create(username="admin").rsplit(".", 1)[0]
+    assert store.get(token=f"{forged}.{signature}") is None
+    assert store.get(token=f"{payload}.{signature}") is not None
+    assert store.get(token="not-a-token") is None
+
+
+def test_expired_token():
+    """A token is rejected once its time-to-live has passed."""
+    store = SessionStore(ttl=1, secret=b"secret")
+    token = store.create(username="user")
+    assert store.get(token=token)
+    time.sleep(1.1)
+    assert store.get(token=token) is None
+
+
+def test_revoked_token():
+    """A token deleted at logout is rejected, and swept once it expires."""
+    store = SessionStore(ttl=1, secret=b"secret")
+    token = store.create(username="user")
+    store.delete(token=token)
+    assert store.get(token=token) is None
+    time.sleep(1.1)
+    assert store.sweep(force=True) == 1
+    assert not store.revoked
+
+
+@pytest.mark.parametrize("argv, env, expected", [
+    (["uvicorn", "app:create_app", "--workers", "4"], None, 4),
+    (["uvicorn", "app:create_app", "--workers=3"], "2", 3),
+    (["uvicorn", "app:create_app"], "2", 2),
+    (["uvicorn", "app:create_app"], None, 1),
+    (["uvicorn", "app:create_app", "--workers", "abc"], None, 1),
+    (["uvicorn", "app:create_app", "--workers="], None, 1),
+    (["uvicorn", "app:create_app"], "many", 1),
+])
+def test_worker_count(monkeypatch, argv, env, expected):
+    """The number of workers is read from the command line or ``WEB_CONCURRENCY``, and falls back to one."""
+    monkeypatch.setattr(sys, "argv", argv)
+    if env is None:
+        monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    else:
+        monkeypatch.setenv("WEB_CONCURRENCY", env)
+    assert worker_count() == expected
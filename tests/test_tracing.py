@@ -0,0 +1,95 @@
+import json
+import os
+import urllib.request
+
+import pytest
+from starlette.testclient import TestClient
+
+from models import tracing
+from models.tracing import (OTLPExporter, Trace, TracingMiddleware, stage,
+                            start_tracing, stop_tracing)
+
+
+@pytest.fixture
+def traces(monkeypatch) -> list[Trace]:
+    """Traces of the finished requests, collected through a hook."""
+    finished = []
+    monkeypatch.setattr(tracing, "HOOKS", [finished.append])
+    return finished
+
+
+async def endpoint(scope, receive, send) -> None:
+    """ASGI app with a nested stage."""
+    with stage("auth"):
+        pass
+    with stage("write", file="a.txt"):
+        with stage("disk"):
+            pass
+    await send({"type": "http.response.start", "status": 201, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def test_nested_stages(traces):
+    """Stages are parented to the enclosing stage, and the time before the first one is recorded as ``parse``."""
+    TestClient(TracingMiddleware(endpoint)).post("/upload-file/")
+    trace = traces.pop()
+    spans = {span.name: span for span in trace.spans}
+    assert [span.name for span in trace.spans] == ["parse", "auth", "disk", "write"]
+    assert spans["parse"].start == trace.root.start and spans["parse"].end <= spans["auth"].start
+    assert spans["auth"].parent_id == spans["write"].parent_id == trace.root.span_id
+    assert spans["disk"].parent_id == spans["write"].span_id
+    assert spans["write"].attributes == {"file": "a.txt"}
+    assert trace.root.attributes["http.status_code"] == 201
+
+
+def test_server_timing_header(traces):
+    """The response carries the duration of every stage, and the total."""
+    response = TestClient(TracingMiddleware(endpoint)).post("/upload-file/")
+    names = [metric.split(";")[0] for metric in response.headers["Server-Timing"].split(", ")]
+    assert names == ["parse", "auth", "disk", "write", "total"]
+    assert all(float(metric.split(";dur=")[1]) >= 0 for metric in response.headers["Server-Timing"].split(", "))
+
+
+def test_stage_outside_a_request():
+    """A stage outside a traced request does nothing."""
+    with stage("write") as span:
+        assert span is None
+
+
+def test_otlp_payload(traces, monkeypatch):
+    """Traces are exported as OTLP/JSON spans, with the request as the server span."""
+    TestClient(TracingMiddleware(endpoint)).post("/upload-file/")
+    requests = []
+    monkeypatch.setattr(urllib.request, "urlopen", lambda request, timeout: requests.append(request) or
+                        open(os.devnull, "rb"))
+    OTLPExporter(endpoint="http://collector:4318/").export(traces=traces)
+    request = requests.pop()
+    assert request.full_url == "http://collector:4318/v1/traces"
+    resource_spans = json.loads(request.data)["resourceSpans"][0]
+    assert resource_spans["resource"]["attributes"] == [{"key": "service.name",
+                                                         "value": {"stringValue": "filehandler"}}]
+    root, *children = resource_spans["scopeSpans"][0]["spans"]
+    assert (root["kind"], root["parentSpanId"], root["name"]) == (2, "", "POST /upload-file/")
+    assert len(root["traceId"]) == 32 and len(root["spanId"]) == 16
+    assert {"key": "http.status_code", "value": {"stringValue": "201"}} in root["attributes"]
+    assert [child["name"] for child in children] == ["parse", "auth", "disk", "write"]
+    for child in children:
+        assert child["kind"] == 1 and child["traceId"] == root["traceId"]
+        assert int(root["startTimeUnixNano"]) <= int(child["startTimeUnixNano"]) <= int(child["endTimeUnixNano"])
+
+
+def test_sampling():
+    """Only the sampled fraction of the traces is queued for export."""
+    exporter = OTLPExporter(endpoint="http://collector:4318", sample_rate=0)
+    exporter(Trace(name="GET /"))
+    assert exporter.queue.empty()
+
+
+def test_profile_per_worker(tmp_path, monkeypatch):
+    """Each worker writes its profile to a file named after its process id."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("PROFILE_INTERVAL_MS", "1")
+    monkeypatch.delenv("PROFILE_OUTPUT", raising=False)
+    monkeypatch.delenv("OTEL_EXPORTER_OTLP_ENDPOINT", raising=False)
+    stop_tracing(workers=start_tracing())
+    assert os.listdir(tmp_path) == [f"profile.{os.getpid()}.folded"]